@@ -20,23 +20,61 @@ notation.
 #  If not, see <http://www.gnu.org/licenses/>.                                                   #
 #  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
 
-from clockblocks import Clock, TempoEnvelope, MetricPhaseTarget, wait, fork_unsynchronized, fork, current_clock, \
-    wait_forever, wait_for_children_to_finish
-from expenvelope import Envelope, EnvelopeSegment
-from .session import Session
-from .instruments import Ensemble, ScampInstrument, NoteHandle, ChordHandle
-from .playback_implementations import PlaybackImplementation, OSCPlaybackImplementation, \
-    MIDIStreamPlaybackImplementation, SoundfontPlaybackImplementation
-from .transcriber import Transcriber
-from .performance import Performance, PerformancePart
-from .spelling import SpellingPolicy
-from .score import Score, StaffGroup, Staff, Measure, Voice, Tuplet, NoteLike
-from .quantization import TimeSignature, QuantizationScheme, MeasureQuantizationScheme, BeatQuantizationScheme
-from .settings import playback_settings, quantization_settings, engraving_settings
-from ._midi import get_available_midi_input_devices, get_available_midi_output_devices, \
-    print_available_midi_input_devices, print_available_midi_output_devices, get_port_number_of_midi_device
-from .playback_adjustments import NotePlaybackAdjustment, ParamPlaybackAdjustment, PlaybackAdjustmentsDictionary
+import importlib
+import sys
+
+# To keep `import scamp` fast, the classes and functions below are only imported the first time they are accessed
+# (e.g. `scamp.Session` or `from scamp import Session`). This way, a script that only quantizes or engraves never
+# has to load the playback machinery, and vice-versa. Each entry maps a name to the module it comes from.
+_lazy_imports = {
+    **{name: "clockblocks" for name in ("Clock", "TempoEnvelope", "MetricPhaseTarget", "wait", "fork_unsynchronized",
+                                        "fork", "current_clock", "wait_forever", "wait_for_children_to_finish")},
+    **{name: "expenvelope" for name in ("Envelope", "EnvelopeSegment")},
+    "Session": ".session",
+    **{name: ".instruments" for name in ("Ensemble", "ScampInstrument", "NoteHandle", "ChordHandle")},
+    **{name: ".playback_implementations" for name in ("PlaybackImplementation", "OSCPlaybackImplementation",
+                                                      "MIDIStreamPlaybackImplementation",
+                                                      "SoundfontPlaybackImplementation", "NullPlaybackImplementation",
+                                                      "RecordingPlaybackImplementation")},
+    "Transcriber": ".transcriber",
+    **{name: ".performance" for name in ("Performance", "PerformancePart")},
+    "PerformanceArchive": ".performance_archive",
+    "PlaybackMetrics": ".playback_metrics",
+    "PlaybackTrace": ".playback_trace",
+    "SpellingPolicy": ".spelling",
+    **{name: ".score" for name in ("Score", "StaffGroup", "Staff", "Measure", "Voice", "Tuplet", "NoteLike")},
+    **{name: ".quantization" for name in ("TimeSignature", "QuantizationScheme", "MeasureQuantizationScheme",
+                                          "BeatQuantizationScheme")},
+    **{name: ".settings" for name in ("playback_settings", "quantization_settings", "engraving_settings")},
+    **{name: "._midi" for name in ("get_available_midi_input_devices", "get_available_midi_output_devices",
+                                   "print_available_midi_input_devices", "print_available_midi_output_devices",
+                                   "get_port_number_of_midi_device")},
+    **{name: ".playback_adjustments" for name in ("NotePlaybackAdjustment", "ParamPlaybackAdjustment",
+                                                  "PlaybackAdjustmentsDictionary")},
+}
+
+__all__ = list(_lazy_imports)
+
+
+def __getattr__(name):
+    # only called when name is not (yet) a module global (PEP 562)
+    if name in _lazy_imports:
+        value = getattr(importlib.import_module(_lazy_imports[name], __name__), name)
+        # store it as a global, so that subsequent lookups don't come through here
+        globals()[name] = value
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_imports))
+
+
+if sys.version_info < (3, 7):
+    # module-level __getattr__ is not available, so we have to import everything up front
+    for _name in _lazy_imports:
+        __getattr__(_name)
+
+
 from ._package_info import version as __version__
 from ._package_info import author as __author__
-
-assert isinstance(playback_settings.adjustments, PlaybackAdjustmentsDictionary)
@@ -15,81 +15,244 @@
 #  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
 
 from .settings import playback_settings
+from .utilities import resolve_relative_path
+from typing import Optional
+import threading
 import logging
+import ctypes
+import json
 import os
 import platform
+import sys
+import time
 
 ABJAD_MINIMUM_VERSION = "3.1"
 
 
-try:
-    if playback_settings.try_system_fluidsynth_first:
-        # first choice: import using an installed version of pyfluidsynth
-        logging.debug("Trying to load system copy of pyfluidsynth.")
-        import fluidsynth
-    else:
-        # first choice: use the use the local, tweaked copy of pyfluidsynth (which will also try to
-        # load up a local copy of the fluidsynth dll on Windows or dylib on MacOS)
-        logging.debug("Trying to copy of pyfluidsynth from within SCAMP package.")
-        from ._thirdparty import fluidsynth
-    logging.debug("Loading of pyfluidsynth succeeded.")
-except (ImportError, AttributeError):
-    logging.debug("Loading of pyfluidsynth failed.")
+# The optional dependencies below (as well as the fluidsynth library itself) can be slow to load, so rather than
+# importing them when this module is imported, we load each one the first time it is requested, e.g. by
+# `from ._dependencies import fluidsynth`. This way, code that only quantizes or engraves never pays for them.
+
+def _load_fluidsynth():
     try:
         if playback_settings.try_system_fluidsynth_first:
-            # second choice: use the use the local, tweaked copy of pyfluidsynth (which will also try to
+            # first choice: import using an installed version of pyfluidsynth
+            logging.debug("Trying to load system copy of pyfluidsynth.")
+            import fluidsynth
+        else:
+            # first choice: use the use the local, tweaked copy of pyfluidsynth (which will also try to
             # load up a local copy of the fluidsynth dll on Windows or dylib on MacOS)
             logging.debug("Trying to copy of pyfluidsynth from within SCAMP package.")
             from ._thirdparty import fluidsynth
-        else:
-            # second choice: import using an installed version of pyfluidsynth
-            logging.debug("Trying to load system copy of pyfluidsynth.")
-            import fluidsynth
         logging.debug("Loading of pyfluidsynth succeeded.")
     except (ImportError, AttributeError):
-        # if we're here, it's probably because fluidsynth wasn't installed
-        logging.debug("Loading of pyfluidsynth failed again.")
-        fluidsynth = None
-        logging.warning("Fluidsynth could not be loaded; synth output will not be available.")
+        logging.debug("Loading of pyfluidsynth failed.")
+        try:
+            if playback_settings.try_system_fluidsynth_first:
+                # second choice: use the use the local, tweaked copy of pyfluidsynth (which will also try to
+                # load up a local copy of the fluidsynth dll on Windows or dylib on MacOS)
+                logging.debug("Trying to copy of pyfluidsynth from within SCAMP package.")
+                from ._thirdparty import fluidsynth
+            else:
+                # second choice: import using an installed version of pyfluidsynth
+                logging.debug("Trying to load system copy of pyfluidsynth.")
+                import fluidsynth
+            logging.debug("Loading of pyfluidsynth succeeded.")
+        except (ImportError, AttributeError):
+            # if we're here, it's probably because fluidsynth wasn't installed
+            logging.debug("Loading of pyfluidsynth failed again.")
+            fluidsynth = None
+            logging.warning("Fluidsynth could not be loaded; synth output will not be available.")
+    return fluidsynth
 
-if fluidsynth is not None and playback_settings.default_audio_driver == "auto":
-    print("Testing for working audio driver...")
-    found_driver = False
-    for driver in ['alsa', 'coreaudio', 'dsound', 'Direct Sound', 'oss', 'pulseaudio', 'jack', 'portaudio', 'sndmgr']:
+
+def _load_sf2utils():
+    try:
+        from sf2utils.sf2parse import Sf2File
+    except ImportError:
+        Sf2File = None
+        logging.warning("sf2utils was not found; info about soundfont presets will not be available.")
+    return Sf2File
+
+
+def _load_pythonosc():
+    try:
+        import pythonosc
+        import pythonosc.udp_client
+        import pythonosc.dispatcher
+        import pythonosc.osc_server
+    except ImportError:
+        pythonosc = None
+        logging.warning("pythonosc was not found; OSCScampInstrument will not function.")
+    return pythonosc
+
+
+def _load_rtmidi():
+    try:
+        import rtmidi
+    except ImportError:
+        rtmidi = None
+        logging.warning("python-rtmidi was not found; streaming midi input / output will not be available.")
+    return rtmidi
+
+
+def _load_pynput():
+    try:
+        import pynput
+    except ImportError:
+        pynput = None
+        logging.warning("pynput was not found; mouse and keyboard input will not be available.")
+    return pynput
+
+
+_lazy_dependency_loaders = {
+    "fluidsynth": _load_fluidsynth,
+    "Sf2File": _load_sf2utils,
+    "pythonosc": _load_pythonosc,
+    "rtmidi": _load_rtmidi,
+    "pynput": _load_pynput,
+}
+
+
+def _get_dependency(name):
+    if name not in globals():
+        # load the dependency and store it as a module global, so that it only gets loaded once
+        globals()[name] = _lazy_dependency_loaders[name]()
+    return globals()[name]
+
+
+def __getattr__(name):
+    # only called when name is not (yet) a module global
+    if name in _lazy_dependency_loaders:
+        return _get_dependency(name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+if sys.version_info < (3, 7):
+    # module-level __getattr__ (PEP 562) is not available, so we have to load everything up front
+    for _dependency_name in _lazy_dependency_loaders:
+        _get_dependency(_dependency_name)
+
+
+_AUDIO_DRIVER_CANDIDATES = ['alsa', 'coreaudio', 'dsound', 'Direct Sound', 'oss', 'pulseaudio', 'jack', 'portaudio',
+                            'sndmgr']
+
+# results of probing for a working audio driver get stored here, keyed by platform, fluidsynth version and environment
+_AUDIO_DRIVER_CACHE_PATH = "settings/audioDriverCache.json"
+
+# environment variables that can change which audio backends are reachable
+_AUDIO_ENVIRONMENT_VARIABLES = ("PULSE_SERVER", "JACK_DEFAULT_SERVER", "XDG_RUNTIME_DIR", "AUDIODEV")
+
+# a failure to find any working audio driver is only trusted for this long (in seconds) before testing again, since
+# it is often temporary (e.g. a sound server that has not started yet)
+_FAILED_AUDIO_DRIVER_PROBE_TTL = 3600
+
+# the driver resolved from "auto" during this run of the program, so that we only consult the cache once
+# (None if it hasn't been resolved yet, or if no working driver could be found)
+_resolved_audio_driver = None
+_audio_driver_resolved = False
+
+
+def _get_fluidsynth_version(fluidsynth) -> str:
+    try:
+        return fluidsynth.cfunc('fluid_version_str', ctypes.c_char_p)().decode()
+    except (AttributeError, TypeError, ValueError, OSError):
+        return getattr(fluidsynth, "api_version", "unknown")
+
+
+def _get_audio_driver_cache_key(fluidsynth) -> str:
+    return "|".join([platform.system(), platform.release(), _get_fluidsynth_version(fluidsynth)] +
+                    ["{}={}".format(variable, os.environ.get(variable, "")) for variable in _AUDIO_ENVIRONMENT_VARIABLES])
+
+
+def _load_audio_driver_cache() -> dict:
+    try:
+        with open(resolve_relative_path(_AUDIO_DRIVER_CACHE_PATH), "r") as file:
+            cache = json.load(file)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_audio_driver_cache(cache: dict) -> None:
+    try:
+        with open(resolve_relative_path(_AUDIO_DRIVER_CACHE_PATH), "w") as file:
+            json.dump(cache, file, sort_keys=True, indent=4)
+    except OSError:
+        logging.debug("Could not save the audio driver cache.")
+
+
+def _test_audio_driver(fluidsynth, driver: str, timeout: float) -> bool:
+    # some backends block for a long time (or forever) when they fail, so the test is done on a daemon thread, which
+    # is simply abandoned if it does not finish within the timeout
+    result = []
+
+    def test():
         test_synth = fluidsynth.Synth()
-        test_synth.start(driver=driver)
-        if test_synth.audio_driver is not None:
-            playback_settings.default_audio_driver = driver
-            playback_settings.make_persistent()
-            found_driver = True
+        try:
+            test_synth.start(driver=driver)
+            result.append(test_synth.audio_driver is not None)
+        finally:
+            # if we have timed out, but the driver does eventually finish starting up (or fail to), the synth is still
+            # cleaned up here; only a backend that blocks forever keeps hold of it
             test_synth.delete()
-            print("Found audio driver '{}'. This has been made the default, but it can be altered via "
+
+    test_thread = threading.Thread(target=test, daemon=True)
+    test_thread.start()
+    test_thread.join(timeout)
+    if test_thread.is_alive():
+        logging.debug("Testing audio driver '{}' timed out after {} seconds.".format(driver, timeout))
+        return False
+    return len(result) > 0 and result[0]
+
+
+def _probe_audio_driver(fluidsynth) -> Optional[str]:
+    print("Testing for working audio driver...")
+    for driver in _AUDIO_DRIVER_CANDIDATES:
+        if _test_audio_driver(fluidsynth, driver, playback_settings.audio_driver_probe_timeout):
+            print("Found audio driver '{}'. This result has been cached, but a specific driver can be set via "
                   "the playback settings.".format(driver))
-            break
-        test_synth.delete()
-    if not found_driver:
-        logging.warning("No working audio driver was found; synth output will not be available.")
-
-try:
-    from sf2utils.sf2parse import Sf2File
-except ImportError:
-    Sf2File = None
-    logging.warning("sf2utils was not found; info about soundfont presets will not be available.")
-
-try:
-    import pythonosc
-    import pythonosc.udp_client
-    import pythonosc.dispatcher
-    import pythonosc.osc_server
-except ImportError:
-    pythonosc = None
-    logging.warning("pythonosc was not found; OSCScampInstrument will not function.")
-
-try:
-    import rtmidi
-except ImportError:
-    rtmidi = None
-    logging.warning("python-rtmidi was not found; streaming midi input / output will not be available.")
+            return driver
+    logging.warning("No working audio driver was found; synth output will not be available.")
+    return None
+
+
+def _is_usable_cache_entry(entry) -> bool:
+    # a working driver is cached as its name; a failure as a dictionary recording when the test was done
+    if isinstance(entry, str):
+        return True
+    return isinstance(entry, dict) and time.time() - entry.get("probed_at", 0) < _FAILED_AUDIO_DRIVER_PROBE_TTL
+
+
+def get_default_audio_driver(reprobe: bool = False) -> Optional[str]:
+    """
+    Returns the audio driver set in playback_settings.default_audio_driver. If that setting is "auto", we test for a
+    working audio driver (creating a test fluidsynth synth for each candidate) the first time a soundfont instrument
+    needs one. The result is cached on disk under a key made from the platform, the fluidsynth version and the
+    audio-related environment variables, so that later runs in the same environment skip the test entirely. A failure
+    to find any working driver is cached too, but only for an hour, after which we test again.
+
+    :param reprobe: if True, ignore any cached result and test again (e.g. because the cached driver stopped working)
+    :return: the name of the default audio driver, or None if no working driver could be found (in which case synths
+        should be started without audio output)
+    """
+    global _resolved_audio_driver, _audio_driver_resolved
+    fluidsynth = _get_dependency("fluidsynth")
+    if fluidsynth is None or playback_settings.default_audio_driver != "auto":
+        return playback_settings.default_audio_driver
+
+    if not _audio_driver_resolved or reprobe:
+        cache = _load_audio_driver_cache()
+        cache_key = _get_audio_driver_cache_key(fluidsynth)
+        if reprobe or not _is_usable_cache_entry(cache.get(cache_key)):
+            driver = _probe_audio_driver(fluidsynth)
+            cache[cache_key] = driver if driver is not None else {"driver": None, "probed_at": time.time()}
+            _save_audio_driver_cache(cache)
+        elif not isinstance(cache[cache_key], str):
+            logging.warning("No working audio driver was found when last tested; synth output will not be available.")
+        _resolved_audio_driver = cache[cache_key] if isinstance(cache[cache_key], str) else None
+        _audio_driver_resolved = True
+    return _resolved_audio_driver
 
 
 # On Mac and Windows, try to add LilyPond to PATH, if it is installed, so that abjad can just work.
@@ -126,9 +289,3 @@ def abjad():
         logging.warning("abjad was not found; lilypond output will not be available.")
     return abjad_library
 
-
-try:
-    import pynput
-except ImportError:
-    pynput = None
-    logging.warning("pynput was not found; mouse and keyboard input will not be available.")
@@ -0,0 +1,92 @@
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+#  SCAMP (Suite for Computer-Assisted Music in Python)                                           #
+#  Copyright © 2020 Marc Evanstein <marc@marcevanstein.com>.                                     #
+#                                                                                                #
+#  This program is free software: you can redistribute it and/or modify it under the terms of    #
+#  the GNU General Public License as published by the Free Software Foundation, either version   #
+#  3 of the License, or (at your option) any later version.                                      #
+#                                                                                                #
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;     #
+#  without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#  See the GNU General Public License for more details.                                          #
+#                                                                                                #
+#  You should have received a copy of the GNU General Public License along with this program.    #
+#  If not, see <http://www.gnu.org/licenses/>.                                                   #
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+
+from collections import OrderedDict
+import threading
+import logging
+import time
+
+
+class InputCoalescer:
+
+    """
+    Stands between streams of incoming events (mouse movements, OSC messages, etc.) and the callbacks that respond to
+    them, so that each stream is passed on at a bounded rate. Events are grouped by a key (e.g. the OSC address), and
+    the callback for a given key is called at most once every `min_interval` seconds, with the arguments of the latest
+    event; any events that get superseded in the meantime are dropped. The callbacks are called on a thread of the
+    coalescer's own, which rouses the clock once for all of the events that are due at the same moment.
+
+    :param clock: the clock to rouse when calling the callbacks
+    :ivar num_dropped_events: how many events have been superseded by a later event before they could be passed on
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.num_dropped_events = 0
+        # maps key to a list of [due time, callback, args] for the events waiting to be passed on
+        self._pending = OrderedDict()
+        self._last_call_times = {}
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, key, min_interval, callback, args=()) -> None:
+        """
+        Hands over an incoming event, to be passed on to the callback as soon as its key's rate limit allows, unless a
+        later event with the same key arrives first.
+
+        :param key: the stream that this event belongs to; only the latest pending event with each key is kept
+        :param min_interval: the minimum time in seconds between calls of the callback for this key
+        :param callback: the function to call
+        :param args: the arguments to call it with
+        """
+        with self._condition:
+            if key in self._pending:
+                self._pending[key][1:] = callback, args
+                self.num_dropped_events += 1
+                return
+            due_time = max(time.time(), self._last_call_times.get(key, -min_interval) + min_interval)
+            self._pending[key] = [due_time, callback, args]
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="SCAMP_INPUT_COALESCER")
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.time()
+                    due_keys = [key for key, (due_time, _, _) in self._pending.items() if due_time <= now]
+                    if len(due_keys) > 0:
+                        break
+                    self._condition.wait(timeout=min((due_time for due_time, _, _ in self._pending.values()),
+                                                     default=now + 1) - now)
+                calls = [self._pending.pop(key)[1:] for key in due_keys]
+                for key in due_keys:
+                    self._last_call_times[key] = now
+
+            self.clock.rouse_and_hold()
+            threading.current_thread().__clock__ = self.clock
+            for callback, args in calls:
+                try:
+                    callback(*args)
+                except Exception as e:
+                    logging.exception(e)
+            threading.current_thread().__clock__ = None
+            self.clock.release_from_suspension()
+
+    def __repr__(self):
+        return "InputCoalescer({})".format(self.clock)
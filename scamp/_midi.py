@@ -20,7 +20,11 @@ import inspect
 from ._dependencies import rtmidi
 import threading
 from .utilities import get_average_square_correlation
+from .settings import playback_settings
+from collections import deque
+import logging
 import functools
+import time
 
 
 def get_available_midi_input_devices():
@@ -83,7 +87,8 @@ def get_port_number_of_midi_device(device_name, input_or_output="input"):
     return best_match
 
 
-def start_midi_listener(port_number_or_device_name, callback_function, clock):
+def start_midi_listener(port_number_or_device_name, callback_function, clock, batch_interval=None,
+                        coalesce_controllers=False):
     """
     Start a midi listener on a given port (or for the given device)
 
@@ -94,7 +99,16 @@ def start_midi_listener(port_number_or_device_name, callback_function, clock):
         argument (the midi message) or two arguments (the midi message, and the dt since the last message)
     :param clock: the clock to rouse when this callback operates
     :type clock: Clock
+    :param batch_interval: if None, the clock is roused for each incoming message as it arrives. Otherwise, incoming
+        messages are queued up and handed to the callback function in batches, rousing the clock only once per batch,
+        with at least this many seconds between the batches. (0 means that each batch is delivered as soon as the
+        previous one is done.) This saves a great deal of work with dense streams of messages.
+    :param coalesce_controllers: if True (only possible when batching), then within a batch, only the latest value of
+        each controller (and of each channel's pitch bend and aftertouch) is passed on, except where other messages,
+        such as note ons, come in between.
     """
+    if coalesce_controllers and batch_interval is None:
+        raise ValueError("Controller coalescing is only possible when MIDI input is batched.")
 
     port_number = get_port_number_of_midi_device(port_number_or_device_name, "input") \
         if isinstance(port_number_or_device_name, str) else port_number_or_device_name
@@ -113,6 +127,11 @@ def start_midi_listener(port_number_or_device_name, callback_function, clock):
     from rtmidi.midiutil import open_midiinput
     midi_in, _ = open_midiinput(port_number)
 
+    if batch_interval is not None:
+        midi_in.set_callback(_MIDIInputBatcher(midi_in, callback_function, callback_accepts_dt, clock,
+                                               batch_interval, coalesce_controllers).enqueue)
+        return midi_in
+
     @functools.wraps(callback_function)
     def callback_wrapper(message, data=None):
         clock.rouse_and_hold()
@@ -128,6 +147,101 @@ def start_midi_listener(port_number_or_device_name, callback_function, clock):
     return midi_in
 
 
+class _MIDIInputBatcher:
+    """
+    Queues up the messages coming in on an rtmidi input, and delivers them to the callback function in batches on a
+    thread of its own, rousing the clock once per batch rather than once per message. The thread stops once the input
+    port has been closed.
+    """
+
+    # the data entry, data increment/decrement and (N)RPN select controllers, which only make sense as a sequence
+    _non_coalescable_controllers = {6, 38, 96, 97, 98, 99, 100, 101}
+
+    def __init__(self, midi_in, callback_function, callback_accepts_dt, clock, batch_interval, coalesce_controllers):
+        self.midi_in = midi_in
+        self.callback_function = callback_function
+        self.callback_accepts_dt = callback_accepts_dt
+        self.clock = clock
+        self.batch_interval = batch_interval
+        self.coalesce_controllers = coalesce_controllers
+        self._queue = deque()
+        self._condition = threading.Condition()
+        threading.Thread(target=self._run, daemon=True, name="SCAMP_MIDI_INPUT").start()
+
+    def enqueue(self, message, data=None):
+        # message is a tuple of (midi message, dt since the last message)
+        with self._condition:
+            self._queue.append(message)
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while len(self._queue) == 0:
+                    if not self.midi_in.is_port_open():
+                        return
+                    self._condition.wait(timeout=1)
+                batch = list(self._queue)
+                self._queue.clear()
+            if self.coalesce_controllers:
+                batch = _MIDIInputBatcher._coalesce(batch)
+            self.clock.rouse_and_hold()
+            threading.current_thread().__clock__ = self.clock
+            for message, dt in batch:
+                # a failure on one message mustn't cost us the rest of the batch (e.g. a note off)
+                try:
+                    if self.callback_accepts_dt:
+                        self.callback_function(message, dt)
+                    else:
+                        self.callback_function(message)
+                except Exception as e:
+                    logging.exception(e)
+            threading.current_thread().__clock__ = None
+            self.clock.release_from_suspension()
+            if self.batch_interval > 0:
+                time.sleep(self.batch_interval)
+
+    @staticmethod
+    def _coalescing_key(message):
+        # messages with the same key just set a new value for the same thing, so only the latest one matters
+        status = message[0] & 0xF0 if len(message) > 0 else None
+        if status == 0xB0 and len(message) > 1 \
+                and message[1] not in _MIDIInputBatcher._non_coalescable_controllers:
+            return message[0], message[1]  # control change, by channel and controller
+        elif status == 0xA0 and len(message) > 1:
+            return message[0], message[1]  # polyphonic aftertouch, by channel and key
+        elif status in (0xD0, 0xE0):
+            return message[0],  # channel aftertouch / pitch bend, by channel
+        return None
+
+    @staticmethod
+    def _coalesce(batch):
+        # working backwards, drop any message superseded by a later one with the same key, unless some other kind of
+        # message (e.g. a note on) came in between, since the earlier value may have mattered to it
+        superseded = set()
+        kept = []
+        for message, dt in reversed(batch):
+            key = _MIDIInputBatcher._coalescing_key(message)
+            if key is None:
+                superseded.clear()
+            elif key in superseded:
+                kept.append((None, dt))
+                continue
+            else:
+                superseded.add(key)
+            kept.append((message, dt))
+        # now go forwards, folding the time deltas of the dropped messages into the next message that is kept
+        coalesced = []
+        carried_dt = 0
+        for message, dt in reversed(kept):
+            if message is None:
+                carried_dt += dt
+            else:
+                coalesced.append((message, dt + carried_dt))
+                carried_dt = 0
+        return coalesced
+
+
 class SimpleRtMidiOut:
     """
     Wraps a single output of rtmidi to:
@@ -177,4 +291,85 @@ class SimpleRtMidiOut:
 
     def cc(self, chan, cc_number, value):
         if rtmidi is not None:
-            self.midiout.send_message([0xB0 + chan, cc_number, value])
\ No newline at end of file
+            self.midiout.send_message([0xB0 + chan, cc_number, value])
+
+class VelocityTable:
+    """
+    Lookup table for converting volumes (from 0 to 1) to MIDI velocities, following one of the volume-to-velocity
+    curves in the playback settings. This saves evaluating the curve afresh for every note. The table is rebuilt
+    whenever the setting is assigned a different curve. (If the curve is altered in place, call :func:`rebuild`.)
+
+    :param curve_setting_name: name of the attribute of playback_settings that holds the curve
+    :param resolution: number of entries in the table
+    """
+
+    def __init__(self, curve_setting_name, resolution=1024):
+        self.curve_setting_name = curve_setting_name
+        self.resolution = resolution
+        self._curve = self._table = None
+
+    def rebuild(self) -> None:
+        """
+        Re-evaluates the curve to build the table.
+        """
+        self._curve = getattr(playback_settings, self.curve_setting_name)
+        self._table = [max(0, min(127, int(self._curve.value_at(i / (self.resolution - 1)))))
+                       for i in range(self.resolution)]
+
+    def velocity(self, volume_from_0_to_1) -> int:
+        """
+        Returns the MIDI velocity for the given volume.
+
+        :param volume_from_0_to_1: the volume (values outside of the range 0 to 1 are clipped)
+        """
+        if getattr(playback_settings, self.curve_setting_name) is not self._curve:
+            self.rebuild()
+        index = int(volume_from_0_to_1 * (self.resolution - 1) + 0.5)
+        return self._table[0 if index < 0 else self.resolution - 1 if index >= self.resolution else index]
+
+
+#: Volume-to-velocity lookup for soundfont playback
+soundfont_velocity_table = VelocityTable("soundfont_volume_to_velocity_curve")
+#: Volume-to-velocity lookup for streaming MIDI playback
+streaming_midi_velocity_table = VelocityTable("streaming_midi_volume_to_velocity_curve")
+
+
+class PitchBendMapping:
+    """
+    Converts pitch bends in semitones to 14-bit MIDI pitch bend values (from 0 to 16383, with 8192 meaning no bend),
+    given the max pitch bend that the synth has been set to. Get these via :func:`get_pitch_bend_mapping`, so that
+    there is only one for each max pitch bend.
+
+    :param max_pitch_bend: the max pitch bend, in semitones
+    """
+
+    def __init__(self, max_pitch_bend):
+        self.max_pitch_bend = max_pitch_bend
+        self._units_per_semitone = 8192 / max_pitch_bend
+
+    def bend_value(self, bend_in_semitones) -> int:
+        """
+        Returns the 14-bit MIDI pitch bend value for the given bend, clipping (with a warning) if it goes beyond the
+        max pitch bend.
+
+        :param bend_in_semitones: the bend in semitones
+        """
+        directional_bend_value = int(bend_in_semitones * self._units_per_semitone)
+        if -8192 <= directional_bend_value < 8192:
+            return directional_bend_value + 8192
+        # we don't send a warning about going beyond max pitch bend for a value of exactly 8192, since that's obnoxious
+        # and confusing. Better to just quietly clip it to 8191 (8192 would go one above the max allowed)
+        if directional_bend_value != 8192:
+            logging.warning("Attempted pitch bend beyond maximum range (default is 2 semitones). Call set_max_"
+                            "pitch_bend to expand the range.")
+        return 0 if directional_bend_value < 0 else 16383
+
+
+@functools.lru_cache(maxsize=None)
+def get_pitch_bend_mapping(max_pitch_bend) -> PitchBendMapping:
+    """
+    Returns the (shared) :class:`PitchBendMapping` for the given max pitch bend.
+
+    :param max_pitch_bend: the max pitch bend, in semitones
+    """
+    return PitchBendMapping(max_pitch_bend)
@@ -14,7 +14,7 @@
 #  If not, see <http://www.gnu.org/licenses/>.                                                   #
 #  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
 
-from .playback_adjustments import NotePlaybackAdjustment, PlaybackAdjustmentsDictionary
+from .playback_adjustments import NotePlaybackAdjustment, PlaybackAdjustmentsDictionary, get_adjustments_version
 from .utilities import SavesToJSON
 from .settings import playback_settings, engraving_settings
 from .spelling import SpellingPolicy
@@ -23,6 +23,7 @@ from copy import deepcopy
 import logging
 import json
 from collections import UserDict
+from types import MappingProxyType
 
 
 def _split_string_at_outer_commas(s):
@@ -54,8 +55,55 @@ def _split_string_at_outer_commas(s):
     return out
 
 
+def _get_interning_key(raw_properties):
+    """
+    Returns a hashable key for the given raw properties (as passed to play_note, etc.), or None if they can't be
+    interned (e.g. because they contain envelopes or other unhashable values). Values are keyed along with their type,
+    since e.g. True, 1 and 1.0 are equal as dictionary keys, but don't make for the same properties. Properties with
+    extra playback parameters are never interned either, since their values become Envelopes that get normalized to
+    the length of each note in place, and so can't be shared between notes.
+    """
+    if raw_properties is None:
+        return raw_properties
+    if isinstance(raw_properties, str):
+        # parameter names are only picked out when the string is parsed, so err on the side of caution
+        return None if "param" in raw_properties.lower() else raw_properties
+    if isinstance(raw_properties, (list, tuple)):
+        if all(isinstance(x, str) and "param" not in x.lower() for x in raw_properties):
+            return tuple(raw_properties)
+        return None
+    if isinstance(raw_properties, dict):
+        key = []
+        for item_key, value in raw_properties.items():
+            if item_key.startswith("param_") or item_key.endswith("_param"):
+                return None
+            if isinstance(value, (list, tuple)):
+                if not all(isinstance(x, (str, int, float)) for x in value):
+                    return None
+                value = ("_sequence", ) + tuple((type(x), x) for x in value)
+            elif isinstance(value, (str, int, float, type(None))):
+                value = type(value), value
+            else:
+                return None
+            key.append((item_key, value))
+        return "_dict", tuple(sorted(key))
+    return None
+
+
 class NotePropertiesDictionary(UserDict, SavesToJSON):
 
+    # set on interned (shared) instances, which must not be modified; see NotePropertiesDictionary.interned
+    _frozen = False
+    # on frozen instances, maps the keys of any lists or dicts that were made immutable to their original types
+    _frozen_containers = None
+    # cache of frozen variants of a frozen instance (e.g. with a different spelling policy or a single notehead)
+    _variants = None
+    # maps interning keys (see _get_interning_key) to the corresponding interned instances
+    _interned = {}
+    _max_interned = 1024
+    # on frozen instances, caches the compiled playback adjustments (see _get_compiled_playback_adjustment)
+    _compiled_adjustments = None
+
     def __init__(self, **kwargs):
         NotePropertiesDictionary._standardize_plural_entry("articulations", kwargs)
         NotePropertiesDictionary._standardize_plural_entry("noteheads", kwargs)
@@ -78,6 +126,110 @@ class NotePropertiesDictionary(UserDict, SavesToJSON):
         super().__init__(**kwargs)
         self._convert_params_to_envelopes_if_needed()
 
+    def __setitem__(self, key, value):
+        if self._frozen:
+            raise TypeError("Cannot modify an interned NotePropertiesDictionary, since it is shared between notes. "
+                            "Use the \"thawed\" method to get a modifiable copy.")
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        if self._frozen:
+            raise TypeError("Cannot modify an interned NotePropertiesDictionary, since it is shared between notes. "
+                            "Use the \"thawed\" method to get a modifiable copy.")
+        super().__delitem__(key)
+
+    def __deepcopy__(self, memo):
+        # copies are never frozen, and don't carry over the cache of variants
+        copy = NotePropertiesDictionary.__new__(type(self))
+        memo[id(self)] = copy
+        copy.data = deepcopy(self.thawed().data if self._frozen else self.data, memo)
+        return copy
+
+    @classmethod
+    def interned(cls, raw_properties) -> 'NotePropertiesDictionary':
+        """
+        Like :func:`from_unknown_format`, except that the same raw properties (e.g. the same properties string) always
+        return the same, shared NotePropertiesDictionary, so that they only need to be parsed once. Since it is shared,
+        the returned dictionary is frozen, and cannot be modified; :func:`thawed` returns a modifiable copy. Properties
+        that can't be used as a cache key (e.g. containing Envelopes) just produce a new, unfrozen dictionary.
+
+        :param raw_properties: properties in any of the formats accepted by :func:`from_unknown_format`
+        :return: a frozen NotePropertiesDictionary (or a new NotePropertiesDictionary, if not internable)
+        """
+        if isinstance(raw_properties, NotePropertiesDictionary):
+            return raw_properties
+        key = _get_interning_key(raw_properties)
+        if key is None:
+            return cls.from_unknown_format(raw_properties)
+        properties = NotePropertiesDictionary._interned.get(key)
+        if properties is None:
+            if len(NotePropertiesDictionary._interned) >= NotePropertiesDictionary._max_interned:
+                # generative code can produce endless distinct properties (e.g. random parameter values), so don't
+                # let the cache grow without bound
+                NotePropertiesDictionary._interned.clear()
+            # from_unknown_format may modify the lists in a dict it's given, so give it copies
+            properties = NotePropertiesDictionary.from_unknown_format(
+                {key: list(value) if isinstance(value, list) else value for key, value in raw_properties.items()}
+                if isinstance(raw_properties, dict) else raw_properties
+            )
+            properties._freeze()
+            NotePropertiesDictionary._interned[key] = properties
+        return properties
+
+    def is_frozen(self) -> bool:
+        """
+        Whether or not this is an interned, and therefore unmodifiable, NotePropertiesDictionary.
+        """
+        return self._frozen
+
+    def _freeze(self) -> None:
+        """
+        Makes this NotePropertiesDictionary unmodifiable, including the lists (of articulations, noteheads, etc.) and
+        the temp dictionary inside it, which are swapped for tuples and read-only views so that they can't be altered
+        in place either.
+        """
+        self._frozen_containers = {}
+        for key, value in self.data.items():
+            if isinstance(value, list):
+                self.data[key] = tuple(value)
+            elif isinstance(value, dict):
+                self.data[key] = MappingProxyType(dict(value))
+            else:
+                continue
+            self._frozen_containers[key] = type(value)
+        self._frozen = True
+
+    def thawed(self) -> 'NotePropertiesDictionary':
+        """
+        Returns a modifiable version of this NotePropertiesDictionary: itself, if it isn't frozen, or otherwise a copy.
+        The lists of articulations, noteheads, etc. are copied, but the (immutable) playback adjustments inside them
+        are shared with the original.
+        """
+        if not self._frozen:
+            return self
+        copy = NotePropertiesDictionary.__new__(type(self))
+        copy.data = {key: self._frozen_containers[key](value) if key in self._frozen_containers else value
+                     for key, value in self.data.items()}
+        return copy
+
+    def _frozen_variant(self, key, value) -> 'NotePropertiesDictionary':
+        """
+        Returns a frozen copy of this frozen NotePropertiesDictionary with the given property changed. Variants are
+        cached, so that asking for the same variant again does not make a new copy.
+        """
+        assert self._frozen
+        # lists (e.g. of noteheads) are compared by value; anything else (e.g. spelling policies) by identity
+        cache_key = (key, tuple(value) if isinstance(value, list) else id(value))
+        if self._variants is None:
+            self._variants = {}
+        if cache_key not in self._variants:
+            variant = self.thawed()
+            setattr(variant, key, value)
+            variant._freeze()
+            # keep hold of the value, so that its id is not reused
+            self._variants[cache_key] = (value, variant)
+        return self._variants[cache_key][1]
+
     @staticmethod
     def _standardize_plural_entry(key_name, dictionary):
         if key_name not in dictionary:
@@ -306,21 +458,10 @@ class NotePropertiesDictionary(UserDict, SavesToJSON):
         else:
             length_segments = None
 
-        did_an_adjustment = False
-        # first apply all of the explicit playback adjustments
-        for adjustment in self.playback_adjustments:
-            assert isinstance(adjustment, NotePlaybackAdjustment)
-            pitch, volume, length = adjustment.adjust_parameters(pitch, volume, length)
-            did_an_adjustment = True
-
-        if include_notation_derived:
-            for notation_category in ["articulations", "noteheads", "notations"]:
-                for applied_notation in self[notation_category]:
-                    notation_derived_adjustment = playback_settings.adjustments.get(applied_notation)
-                    if notation_derived_adjustment is not None:
-                        assert isinstance(notation_derived_adjustment, NotePlaybackAdjustment)
-                        pitch, volume, length = notation_derived_adjustment.adjust_parameters(pitch, volume, length)
-                        did_an_adjustment = True
+        compiled_adjustment = self._get_compiled_playback_adjustment(include_notation_derived)
+        did_an_adjustment = compiled_adjustment is not None
+        if did_an_adjustment:
+            pitch, volume, length = compiled_adjustment.adjust_parameters(pitch, volume, length)
 
         # Having made the adjustment, if the length was a tuple of adjoined segments, we now go back
         # and scale those according to the adjustment made to length
@@ -331,6 +472,35 @@ class NotePropertiesDictionary(UserDict, SavesToJSON):
 
         return pitch, volume, length, did_an_adjustment
 
+    def _get_compiled_playback_adjustment(self, include_notation_derived=True):
+        """
+        Fuses the explicit playback adjustments and (if flag is set) those derived from notations like staccato into a
+        single NotePlaybackAdjustment, or None if there are no adjustments to make. On frozen (interned) properties,
+        the result is cached until playback_settings.adjustments (or any of the adjustments) changes.
+        """
+        validity_key = (playback_settings.adjustments, get_adjustments_version())
+        if self._frozen and self._compiled_adjustments is not None:
+            cached_validity_key, cached_adjustment = self._compiled_adjustments[include_notation_derived]
+            if cached_validity_key[0] is validity_key[0] and cached_validity_key[1] == validity_key[1]:
+                return cached_adjustment
+
+        # first the explicit playback adjustments, then those derived from the notations
+        adjustments = list(self.playback_adjustments)
+        if include_notation_derived:
+            for notation_category in ["articulations", "noteheads", "notations"]:
+                for applied_notation in self[notation_category]:
+                    notation_derived_adjustment = playback_settings.adjustments.get(applied_notation)
+                    if notation_derived_adjustment is not None:
+                        adjustments.append(notation_derived_adjustment)
+        assert all(isinstance(adjustment, NotePlaybackAdjustment) for adjustment in adjustments)
+        compiled_adjustment = NotePlaybackAdjustment.compose(adjustments) if len(adjustments) > 0 else None
+
+        if self._frozen:
+            if self._compiled_adjustments is None:
+                self._compiled_adjustments = {True: ((None, None), None), False: ((None, None), None)}
+            self._compiled_adjustments[include_notation_derived] = (validity_key, compiled_adjustment)
+        return compiled_adjustment
+
     def mergeable_with(self, other_properties_dict):
         assert isinstance(other_properties_dict, NotePropertiesDictionary)
         return self.articulations == other_properties_dict.articulations and \
@@ -0,0 +1,120 @@
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+#  SCAMP (Suite for Computer-Assisted Music in Python)                                           #
+#  Copyright © 2020 Marc Evanstein <marc@marcevanstein.com>.                                     #
+#                                                                                                #
+#  This program is free software: you can redistribute it and/or modify it under the terms of    #
+#  the GNU General Public License as published by the Free Software Foundation, either version   #
+#  3 of the License, or (at your option) any later version.                                      #
+#                                                                                                #
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;     #
+#  without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#  See the GNU General Public License for more details.                                          #
+#                                                                                                #
+#  You should have received a copy of the GNU General Public License along with this program.    #
+#  If not, see <http://www.gnu.org/licenses/>.                                                   #
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+
+from clockblocks import current_clock
+from clockblocks.utilities import sleep_precisely_until
+from collections import deque
+import threading
+import logging
+import time
+
+
+def get_scheduled_time(clock=None) -> float:
+    """
+    Returns the wall time (as returned by :func:`time.time`) at which the clock operating on the current thread was
+    scheduled to be at its current moment. This can be a little earlier than the actual time, since clock threads
+    never wake up exactly on time. When not called from a running clock, this is just the current time.
+
+    :param clock: the clock to ask about, if not the one operating on the current thread
+    """
+    clock = current_clock() if clock is None else clock
+    if clock is None or clock.master._start_time is None or clock.master.is_fast_forwarding():
+        return time.time()
+    # the master clock started at wall time _start_time, so this is when the calling clock was supposed to be now
+    return clock.master._start_time + clock.time_in_master()
+
+
+class OutputDispatcher:
+
+    """
+    Carries out the calls that actually produce output (note on messages to fluidsynth, outgoing MIDI and OSC
+    messages, etc.) on a dedicated thread, each one a fixed latency after the time at which the clock making it was
+    scheduled to be at that moment. Since clock threads never wake up exactly on time, calling the output directly
+    passes this scheduling jitter on into the sound; by letting the musical logic run `latency` seconds ahead of the
+    output, the jitter is absorbed, as long as it is less than the latency.
+
+    Calls are always carried out in the order that they were made, so a call is never sent earlier than the one
+    before it, even if it was scheduled to be.
+
+    :param latency: the latency in seconds
+    :ivar latency: the latency in seconds
+    :ivar num_late_calls: the number of calls that were dispatched after their target time, because the clock was
+        running behind by more than the latency
+    """
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.num_late_calls = 0
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._last_target_time = 0
+        self._thread = None
+        self._closed = False
+
+    def dispatch(self, function, args=()) -> None:
+        """
+        Queues up a call to be carried out at the current clock's scheduled time plus the latency. (Calls not made from
+        a running clock, e.g. from an unsynchronized animation thread, are carried out `latency` seconds from now.)
+
+        :param function: the function to call
+        :param args: the arguments to call it with
+        """
+        target_time = get_scheduled_time() + self.latency
+        with self._condition:
+            if self._closed:
+                # the dispatcher has been shut down, so just do it now
+                function(*args)
+                return
+            # never reorder calls (e.g. a pitch bend from an animation thread and the note off that follows it)
+            target_time = max(target_time, self._last_target_time)
+            self._last_target_time = target_time
+            self._queue.append((target_time, function, args))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="SCAMP_OUTPUT_DISPATCHER")
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while len(self._queue) == 0:
+                    if self._closed:
+                        return
+                    self._condition.wait()
+                target_time, function, args = self._queue.popleft()
+                late = target_time < time.time()
+                if late:
+                    self.num_late_calls += 1
+            if not late:
+                sleep_precisely_until(target_time)
+            try:
+                function(*args)
+            except Exception as e:
+                logging.exception(e)
+
+    def close(self) -> None:
+        """
+        Stops the dispatcher thread, once it has carried out all of the calls already queued. Any further calls to
+        :func:`dispatch` are carried out immediately.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def __repr__(self):
+        return "OutputDispatcher({})".format(self.latency)
@@ -16,42 +16,209 @@
 
 from .utilities import resolve_relative_path, SavesToJSON, get_average_square_correlation
 from .settings import playback_settings
-from ._dependencies import fluidsynth, Sf2File
+from ._midi import soundfont_velocity_table, get_pitch_bend_mapping
+from . import _dependencies  # accessed as _dependencies.<name>, so that fluidsynth is only loaded when needed
 import logging
 from collections import OrderedDict
+from threading import Lock, RLock, Timer, current_thread
 import re
 import os.path
+import time
 
 
 class SoundfontHost(SavesToJSON):
 
+    #: number of MIDI channels that each fluidsynth synth is created with
+    max_channels = 256
+    #: how long (in seconds) a shared host is kept running once no instrument is using it, so that a Session started
+    #: soon afterwards can reuse its synth and loaded soundfonts, rather than starting over
+    idle_shutdown_delay = 10.0
+
+    # Process-wide registry of the hosts started through add_shared_instrument, by the audio driver they are actually
+    # running on. Ensembles, Sessions and instruments outside of any ensemble all get their hosts from here, so that
+    # they share synths and loaded soundfonts, rather than each starting their own synth and loading the same soundfont
+    # again. Hosts are shut down once they have gone unused for idle_shutdown_delay seconds.
+    _shared_hosts = {}
+    _shared_hosts_lock = RLock()
+    # sequencer event types that we have already warned about not being able to schedule
+    _unsupported_sequencer_events_warned = set()
+
     def __init__(self, soundfonts=(), audio_driver="default"):
         """
         A SoundfontHost hosts an instance of fluidsynth with one or several soundfonts loaded.
         It can be called upon to add or remove instruments from that synth
 
         :param soundfonts: one or several soundfonts to be loaded
-        :param audio_driver: the audio driver to use
+        :param audio_driver: the audio driver to use (None for no audio output)
         """
         if isinstance(soundfonts, str):
             soundfonts = (soundfonts, )
 
-        if fluidsynth is None:
+        if _dependencies.fluidsynth is None:
             raise ModuleNotFoundError("FluidSynth not available.")
 
-        self.audio_driver = playback_settings.default_audio_driver if audio_driver == "default" else audio_driver
+        self.audio_driver = _dependencies.get_default_audio_driver() if audio_driver == "default" else audio_driver
 
-        self.synth = fluidsynth.Synth()
+        self.synth = _dependencies.fluidsynth.Synth(channels=SoundfontHost.max_channels)
         self.synth.start(driver=self.audio_driver)
 
-        self.used_channels = 0  # how many channels have we already assigned to various instruments
+        if self.synth.audio_driver is None and self.audio_driver is not None \
+                and playback_settings.default_audio_driver == "auto" \
+                and self.audio_driver == _dependencies.get_default_audio_driver():
+            # the automatically chosen driver (probably cached from a previous run) didn't work, so test again. (If
+            # no driver works, we end up with a driver of None, which leaves the synth running without audio output.)
+            self.synth.delete()
+            self.audio_driver = _dependencies.get_default_audio_driver(reprobe=True)
+            self.synth = _dependencies.fluidsynth.Synth(channels=SoundfontHost.max_channels)
+            self.synth.start(driver=self.audio_driver)
+
+        self._channels_in_use = set()  # which channels have we already assigned to various instruments
+        self.num_instruments = 0  # how many instruments are currently using this host
+        # for a shared host, the timer that shuts it down once it has been unused for idle_shutdown_delay seconds
+        self._idle_shutdown_timer = None
 
         self.soundfont_ids = OrderedDict()  # mapping from soundfont names to the fluidsynth ids of loaded soundfonts
         self.soundfont_instrument_lists = {}
+        # the same soundfont can go by several names (e.g. "general_midi" and the path it refers to), but it only needs
+        # to be loaded once, so we also keep track of the name under which each resolved path was first loaded
+        self._soundfont_names_by_path = {}
+
+        # fluidsynth sequencer used for timestamped events; only created if an instrument asks for it
+        self._sequencer = self._sequencer_synth_id = None
+        self._sequencer_start_time = self._sequencer_start_tick = None
+        self._last_sequencer_tick = 0
+        self._sequencer_lock = Lock()
+        # maps released channels to the time at which their reset takes effect, if it was scheduled on the sequencer;
+        # until then, events for their previous instrument may still be queued, so they can't be claimed again
+        self._channel_reset_times = {}
 
         for soundfont in soundfonts:
             self.load_soundfont(soundfont)
 
+    @classmethod
+    def add_shared_instrument(cls, num_channels, bank_and_preset, soundfont, audio_driver) -> 'SoundfontInstrument':
+        """
+        Adds an instrument to one of the process-wide shared hosts for the given audio driver, starting a new host only
+        if necessary. Instruments are spread across up to playback_settings.soundfont_synth_shards hosts: until that
+        many hosts exist, every new instrument gets a host of its own; after that, it joins the host with the fewest
+        channels in use, preferring hosts that already have its soundfont loaded. (If none of them has enough channels
+        left, another host is started regardless.)
+
+        :param num_channels: how many channels the instrument gets
+        :param bank_and_preset: tuple consisting of the bank and preset to use
+        :param soundfont: the soundfont the instrument uses
+        :param audio_driver: the audio driver to use (not "default")
+        :return: the SoundfontInstrument, whose :func:`SoundfontInstrument.release` should be called once it is no
+            longer in use
+        """
+        with cls._shared_hosts_lock:
+            hosts = cls._shared_hosts.get(audio_driver, [])
+            candidates = [host for host in hosts if host.available_channels >= num_channels]
+            if len(candidates) == 0 or len(hosts) < playback_settings.soundfont_synth_shards:
+                host = SoundfontHost(soundfont, audio_driver)
+                # if the requested driver didn't work, the host will have started up on a different one (or none)
+                cls._shared_hosts.setdefault(host.audio_driver, []).append(host)
+            else:
+                host = min(candidates, key=lambda x: (soundfont not in x.soundfont_ids, x.used_channels))
+                if soundfont not in host.soundfont_ids:
+                    host.load_soundfont(soundfont)
+            return host.add_instrument(num_channels, bank_and_preset, soundfont)
+
+    @classmethod
+    def release_idle_hosts(cls) -> None:
+        """
+        Shuts down any shared hosts that no instrument is currently using right away, rather than waiting for
+        idle_shutdown_delay to pass.
+        """
+        with cls._shared_hosts_lock:
+            for hosts in cls._shared_hosts.values():
+                for host in [host for host in hosts if host.num_instruments == 0]:
+                    hosts.remove(host)
+                    host.delete()
+
+    def _add_user(self) -> None:
+        # called (holding _shared_hosts_lock) when an instrument starts using this host
+        self.num_instruments += 1
+        if self._idle_shutdown_timer is not None:
+            self._idle_shutdown_timer.cancel()
+            self._idle_shutdown_timer = None
+
+    def _remove_user(self) -> None:
+        # called (holding _shared_hosts_lock) when an instrument stops using this host
+        self.num_instruments -= 1
+        if self.num_instruments == 0 and self in SoundfontHost._shared_hosts.get(self.audio_driver, ()):
+            self._idle_shutdown_timer = Timer(SoundfontHost.idle_shutdown_delay, self._shut_down_if_idle)
+            self._idle_shutdown_timer.daemon = True
+            self._idle_shutdown_timer.start()
+
+    def _shut_down_if_idle(self) -> None:
+        with SoundfontHost._shared_hosts_lock:
+            if self.num_instruments > 0 or self._idle_shutdown_timer is not current_thread():
+                # an instrument started using this host again in the meantime
+                return
+            self._idle_shutdown_timer = None
+            hosts = SoundfontHost._shared_hosts.get(self.audio_driver, [])
+            if self in hosts:
+                hosts.remove(self)
+                self.delete()
+
+    @property
+    def used_channels(self) -> int:
+        """How many of this host's MIDI channels are currently assigned to instruments."""
+        return len(self._channels_in_use)
+
+    @property
+    def available_channels(self) -> int:
+        """How many of this host's MIDI channels have not yet been assigned to an instrument."""
+        return SoundfontHost.max_channels - self.used_channels
+
+    def claim_channels(self, num_channels):
+        """
+        Assigns the lowest-numbered free channels to an instrument.
+
+        :param num_channels: how many channels to assign
+        :return: list of the channels assigned
+        """
+        now = time.time()
+        for channel, reset_time in list(self._channel_reset_times.items()):
+            if reset_time <= now:
+                del self._channel_reset_times[channel]
+                self._channels_in_use.discard(channel)
+        channels = [channel for channel in range(SoundfontHost.max_channels)
+                    if channel not in self._channels_in_use][:num_channels]
+        if len(channels) < num_channels:
+            logging.warning("SoundfontHost ran out of channels; the instrument will not have all of the channels it "
+                            "asked for.")
+        self._channels_in_use.update(channels)
+        return channels
+
+    def release_channels(self, channels):
+        """
+        Frees up channels that an instrument no longer needs, silencing them and resetting their controllers so that
+        the next instrument to claim them starts from a clean slate. If the sequencer is in use, events for these
+        channels may still be waiting in it, so the reset is scheduled after them, and the channels are only handed
+        out again once it has taken effect.
+
+        :param channels: list of the channels to free
+        """
+        if self._sequencer is None:
+            for channel in channels:
+                self.synth.cc(channel, 123, 0)  # all notes off
+                self.synth.cc(channel, 121, 0)  # reset all controllers
+            self._channels_in_use.difference_update(channels)
+        else:
+            for channel in channels:
+                # scheduling for now puts these after anything already queued, since events are never reordered
+                self.schedule_event("control_change", time.time(), channel, 123, 0)
+                self.schedule_event("control_change", time.time(), channel, 121, 0)
+            # (even if the sequencer can't schedule control changes, and the reset happened right away, the channels
+            # aren't handed out again until everything queued so far has played)
+            with self._sequencer_lock:
+                reset_time = max(time.time(), self._sequencer_start_time +
+                                 (self._last_sequencer_tick - self._sequencer_start_tick) / 1000)
+            for channel in channels:
+                self._channel_reset_times[channel] = reset_time
+
     def add_instrument(self, num_channels, bank_and_preset, soundfont=None):
         if soundfont is None:
             # if no soundfont is specified, use the first soundfont added
@@ -61,15 +228,82 @@ class SoundfontHost(SavesToJSON):
         return SoundfontInstrument(self, num_channels, bank_and_preset, soundfont_id)
 
     def load_soundfont(self, soundfont):
-        soundfont_path = resolve_soundfont_path(soundfont)
+        soundfont_path = os.path.realpath(resolve_soundfont_path(soundfont))
+
+        if soundfont_path in self._soundfont_names_by_path:
+            # already loaded under a different name
+            loaded_name = self._soundfont_names_by_path[soundfont_path]
+            self.soundfont_ids[soundfont] = self.soundfont_ids[loaded_name]
+            if loaded_name in self.soundfont_instrument_lists:
+                self.soundfont_instrument_lists[soundfont] = self.soundfont_instrument_lists[loaded_name]
+            return
 
-        if Sf2File is not None:
+        if _dependencies.Sf2File is not None:
             # if we have sf2utils, load up the preset info from the soundfonts
             with open(soundfont_path, "rb") as sf2_file:
-                sf2 = Sf2File(sf2_file)
+                sf2 = _dependencies.Sf2File(sf2_file)
                 self.soundfont_instrument_lists[soundfont] = sf2.presets
 
         self.soundfont_ids[soundfont] = self.synth.sfload(soundfont_path)
+        self._soundfont_names_by_path[soundfont_path] = soundfont
+
+    def schedule_event(self, event_type, target_time, *args):
+        """
+        Schedules an event using fluidsynth's sequencer, which then applies it to the synth from the audio thread at
+        the right moment, rather than whenever the calling Python thread happened to get around to it. The sequencer
+        is created the first time this is called. Events are never applied out of the order in which they were
+        scheduled.
+
+        If the Sequencer has no method for this kind of event (as with versions of pyfluidsynth other than the one
+        bundled with SCAMP, which may lack "pitch_bend" and "control_change"), the event is sent to the synth right
+        away instead.
+
+        :param event_type: the name of the Sequencer method that schedules this kind of event (e.g. "note_on")
+        :param target_time: the wall time (as returned by time.time) at which the event should take effect
+        :param args: the arguments to that method, after the time (channel, key, etc.)
+        """
+        with self._sequencer_lock:
+            if self._sequencer is None:
+                self._sequencer = _dependencies.fluidsynth.Sequencer(time_scale=1000, use_system_timer=True)
+                self._sequencer_synth_id = self._sequencer.register_fluidsynth(self.synth)
+                self._sequencer_start_time = time.time()
+                self._sequencer_start_tick = self._sequencer.get_tick()
+            if not hasattr(self._sequencer, event_type):
+                if event_type not in SoundfontHost._unsupported_sequencer_events_warned:
+                    SoundfontHost._unsupported_sequencer_events_warned.add(event_type)
+                    logging.warning("This version of pyfluidsynth can't schedule \"{}\" events with the sequencer, "
+                                    "so they will be sent right away instead.".format(event_type))
+                self._send_event_now(event_type, *args)
+                return
+            tick = max(self._last_sequencer_tick, self._sequencer_start_tick +
+                       int(round((target_time - self._sequencer_start_time) * 1000)))
+            self._last_sequencer_tick = tick
+            getattr(self._sequencer, event_type)(tick, *args, dest=self._sequencer_synth_id)
+
+    def _send_event_now(self, event_type, *args):
+        # sends one of the sequencer's kinds of event (with the same arguments) straight to the synth
+        if event_type == "note_on":
+            self.synth.noteon(*args)
+        elif event_type == "note_off":
+            self.synth.noteoff(*args)
+        elif event_type == "pitch_bend":
+            channel, value = args
+            # the synth wants the bend from -8192 to 8191, rather than the raw MIDI value
+            self.synth.pitch_bend(channel, value - 8192)
+        elif event_type == "control_change":
+            self.synth.cc(*args)
+        else:
+            raise ValueError("Unknown sequencer event type \"{}\".".format(event_type))
+
+    def delete(self) -> None:
+        """
+        Shuts down the sequencer (if any) and the synth, freeing the memory used by the loaded soundfonts.
+        """
+        with self._sequencer_lock:
+            if self._sequencer is not None:
+                self._sequencer.delete()
+                self._sequencer = None
+        self.synth.delete()
 
     def _to_dict(self) -> dict:
         return {"soundfonts": list(self.soundfont_ids.keys()), "audio_driver": self.audio_driver}
@@ -94,44 +328,65 @@ class SoundfontInstrument:
 
         assert isinstance(soundfont_host, SoundfontHost)
         self.soundfont_host = soundfont_host
-        self.channels = list(range(self.soundfont_host.used_channels, self.soundfont_host.used_channels + num_channels))
-        self.num_channels = num_channels
-        self.soundfont_host.used_channels += num_channels
+        self.channels = self.soundfont_host.claim_channels(num_channels)
+        self.num_channels = len(self.channels)
+        with SoundfontHost._shared_hosts_lock:
+            self.soundfont_host._add_user()
+        self._released = False
         self.bank_and_preset = bank_and_preset
         self.soundfont_id = soundfont_id
         self.max_pitch_bend = 2
+        self._pitch_bend_mapping = get_pitch_bend_mapping(self.max_pitch_bend)
         self.set_to_preset(*bank_and_preset)
 
     def set_to_preset(self, bank, preset):
         for i in self.channels:
             self.soundfont_host.synth.program_select(i, self.soundfont_id, bank, preset)
 
-    def note_on(self, chan, pitch, volume_from_0_to_1):
-        velocity = int(playback_settings.soundfont_volume_to_velocity_curve.value_at(volume_from_0_to_1))
+    def release(self):
+        """
+        Gives this instrument's channels back to the host, and stops counting it as one of the host's users. A shared
+        host shuts down once it has had no users for SoundfontHost.idle_shutdown_delay seconds. (Calling this more than
+        once has no further effect.)
+        """
+        with SoundfontHost._shared_hosts_lock:
+            if self._released:
+                return
+            self._released = True
+            self.soundfont_host.release_channels(self.channels)
+            self.soundfont_host._remove_user()
+
+    # Each of the following methods takes an optional target_time (as returned by time.time). If it is given, the
+    # message is scheduled to take effect at that time using the host's fluidsynth sequencer; otherwise it is sent
+    # to the synth immediately.
+
+    def note_on(self, chan, pitch, volume_from_0_to_1, target_time=None):
+        velocity = soundfont_velocity_table.velocity(volume_from_0_to_1)
         absolute_channel = self.channels[chan]
-        self.soundfont_host.synth.noteon(absolute_channel, pitch, velocity)
+        if target_time is None:
+            self.soundfont_host.synth.noteon(absolute_channel, pitch, velocity)
+        else:
+            self.soundfont_host.schedule_event("note_on", target_time, absolute_channel, pitch, velocity)
 
-    def note_off(self, chan, pitch):
+    def note_off(self, chan, pitch, target_time=None):
         absolute_channel = self.channels[chan]
-        self.soundfont_host.synth.noteon(absolute_channel, pitch, 0)  # note on call of 0 velocity implementation
-        self.soundfont_host.synth.noteoff(absolute_channel, pitch)  # note off call implementation
-
-    def pitch_bend(self, chan, bend_in_semitones):
-        directional_bend_value = int(bend_in_semitones / self.max_pitch_bend * 8192)
-
-        if directional_bend_value > 8192 or directional_bend_value < -8192:
-            logging.warning("Attempted pitch bend beyond maximum range (default is 2 semitones). Call set_max_"
-                            "pitch_bend to expand the range.")
-        # we can't have a directional pitch bend popping up to 8192, because we'll go one above the max allowed
-        # on the other hand, -8192 is fine, since that will add up to zero
-        # However, notice above that we don't send a warning about going beyond max pitch bend for a value of exactly
-        # 8192, since that's obnoxious and confusing. Better to just quietly clip it to 8191
-        directional_bend_value = max(-8192, min(directional_bend_value, 8191))
+        if target_time is None:
+            self.soundfont_host.synth.noteon(absolute_channel, pitch, 0)  # note on call of 0 velocity implementation
+            self.soundfont_host.synth.noteoff(absolute_channel, pitch)  # note off call implementation
+        else:
+            self.soundfont_host.schedule_event("note_off", target_time, absolute_channel, pitch)
+
+    def pitch_bend(self, chan, bend_in_semitones, target_time=None):
+        bend_value = self._pitch_bend_mapping.bend_value(bend_in_semitones)
         absolute_channel = self.channels[chan]
-        # for some reason, pyFluidSynth takes a value from -8192 to 8191 and then adds 8192 to it
-        self.soundfont_host.synth.pitch_bend(absolute_channel, directional_bend_value)
+        if target_time is None:
+            # for some reason, pyFluidSynth takes a value from -8192 to 8191 and then adds 8192 to it
+            self.soundfont_host.synth.pitch_bend(absolute_channel, bend_value - 8192)
+        else:
+            # ...whereas the sequencer takes the raw MIDI value, from 0 to 16383
+            self.soundfont_host.schedule_event("pitch_bend", target_time, absolute_channel, bend_value)
 
-    def set_max_pitch_bend(self, max_bend_in_semitones):
+    def set_max_pitch_bend(self, max_bend_in_semitones, target_time=None):
         """
         Sets the maximum pitch bend to the given number of semitones up and down for all tracks associated
         with this instrument. Note that, while this will definitely work with fluidsynth, the output of rt_midi
@@ -148,20 +403,26 @@ class SoundfontInstrument:
 
         for chan in range(self.num_channels):
             absolute_channel = self.channels[chan]
-            self.soundfont_host.synth.cc(absolute_channel, 101, 0)
-            self.soundfont_host.synth.cc(absolute_channel, 100, 0)
-            self.soundfont_host.synth.cc(absolute_channel, 6, max_bend_in_semitones)
-            self.soundfont_host.synth.cc(absolute_channel, 100, 127)
+            self._send_cc(absolute_channel, 101, 0, target_time)
+            self._send_cc(absolute_channel, 100, 0, target_time)
+            self._send_cc(absolute_channel, 6, max_bend_in_semitones, target_time)
+            self._send_cc(absolute_channel, 100, 127, target_time)
 
         self.max_pitch_bend = max_bend_in_semitones
+        self._pitch_bend_mapping = get_pitch_bend_mapping(max_bend_in_semitones)
 
-    def cc(self, chan, cc_number, expression_from_0_to_1):
+    def cc(self, chan, cc_number, expression_from_0_to_1, target_time=None):
         expression_val = max(0, min(127, int(expression_from_0_to_1 * 127)))
-        absolute_channel = self.channels[chan]
-        self.soundfont_host.synth.cc(absolute_channel, cc_number, expression_val)
+        self._send_cc(self.channels[chan], cc_number, expression_val, target_time)
 
-    def expression(self, chan, expression_from_0_to_1):
-        self.cc(chan, 11, expression_from_0_to_1)
+    def expression(self, chan, expression_from_0_to_1, target_time=None):
+        self.cc(chan, 11, expression_from_0_to_1, target_time)
+
+    def _send_cc(self, absolute_channel, cc_number, value, target_time):
+        if target_time is None:
+            self.soundfont_host.synth.cc(absolute_channel, cc_number, value)
+        else:
+            self.soundfont_host.schedule_event("control_change", target_time, absolute_channel, cc_number, value)
 
 
 # ------------------------------------------- Utilities ------------------------------------------------
@@ -215,12 +476,12 @@ def get_soundfont_presets(which_soundfont="default"):
 
     soundfont_path = resolve_soundfont_path(which_soundfont)
 
-    if Sf2File is None:
+    if _dependencies.Sf2File is None:
         raise ModuleNotFoundError("Cannot inspect soundfont presets; please install sf2utils.")
 
     # if we have sf2utils, load up the preset info from the soundfonts
     with open(soundfont_path, "rb") as sf2_file:
-        sf2 = Sf2File(sf2_file)
+        sf2 = _dependencies.Sf2File(sf2_file)
         return sf2.presets
 
 
@@ -251,7 +512,7 @@ def get_best_preset_match_for_name(name: str, which_soundfont="default"):
     :param which_soundfont: which soundfont look in
     :return: a tuple of (Sf2Preset, match score)
     """
-    if Sf2File is None:
+    if _dependencies.Sf2File is None:
         raise ModuleNotFoundError("Cannot iterate through soundfont presets; please install sf2utils.")
     best_preset_match = None
     best_preset_score = 0
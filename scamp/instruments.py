@@ -28,15 +28,17 @@ from ._midi import get_available_midi_output_devices, print_available_midi_outpu
 from .utilities import SavesToJSON
 from .spelling import SpellingPolicy
 from ._note_properties import NotePropertiesDictionary
+from ._output_dispatcher import OutputDispatcher, get_scheduled_time
 from .playback_implementations import SoundfontPlaybackImplementation, MIDIStreamPlaybackImplementation, \
     OSCPlaybackImplementation
-from .settings import engraving_settings
+from .settings import engraving_settings, playback_settings
 from clockblocks.utilities import wait
 from clockblocks.clock import current_clock, Clock, ClockKilledError, TimeStamp
 from expenvelope import EnvelopeSegment
 import logging
 import time
 from threading import Lock
+from types import MappingProxyType
 from typing import Union, Sequence, Tuple
 from numbers import Real
 from expenvelope import Envelope
@@ -58,6 +60,8 @@ class Ensemble(SavesToJSON):
         to initialize an Ensemble with this argument, but better to use the new_part methods after the fact. This is
         because instrument playback implementations look to share ensemble resources when they are created, and this
         is not possible if they are not already part of an ensemble.
+    :param playback_latency: value to initialize the playback_latency property to. If "default", then this defers to
+        the scamp global playback_settings default.
 
     :ivar default_audio_driver: the audio driver instruments in this ensemble will default to. If "default", then
         this defers to the scamp global playback_settings default.
@@ -72,7 +76,7 @@ class Ensemble(SavesToJSON):
     def __init__(self, default_soundfont: str = "default", default_audio_driver: str = "default",
                  default_midi_output_device: str = "default",
                  default_spelling_policy: Union[SpellingPolicy, str, tuple] = None,
-                 instruments: Sequence['ScampInstrument'] = None):
+                 instruments: Sequence['ScampInstrument'] = None, playback_latency: float = "default"):
 
         self.default_soundfont = default_soundfont
         self.default_audio_driver = default_audio_driver
@@ -83,6 +87,16 @@ class Ensemble(SavesToJSON):
 
         self.instruments = list(instruments) if instruments is not None else []
         self.shared_resources = {}
+        # index from name to (position, instrument) pairs for the instruments of that name (in order of addition), kept
+        # up to date by add_instrument, and rebuilt if the instruments list is replaced or changes length, or if an
+        # entry found in it turns out to be out of date (the instrument at that position has been replaced or renamed)
+        self._instruments_by_name = {}
+        self._indexed_instruments = None
+        self._indexed_instrument_count = 0
+
+        self._output_dispatcher = None
+        self.playback_latency = playback_settings.default_playback_latency \
+            if playback_latency == "default" else playback_latency
 
     def add_instrument(self, instrument: 'ScampInstrument') -> 'ScampInstrument':
         """
@@ -94,7 +108,11 @@ class Ensemble(SavesToJSON):
         """
         if not hasattr(instrument, "name") or instrument.name is None:
             instrument.name = "Track " + str(len(self.instruments) + 1)
+        index_was_current = self._instrument_index_is_current()
         self.instruments.append(instrument)
+        if index_was_current:
+            self._instruments_by_name.setdefault(instrument.name, []).append((len(self.instruments) - 1, instrument))
+            self._indexed_instrument_count += 1
         for playback_implementation in instrument.playback_implementations:
             # clear out any individual playback resources the instrument has been using
             playback_implementation._resources = None
@@ -243,8 +261,30 @@ class Ensemble(SavesToJSON):
 
         return instrument
 
+    def _instrument_index_is_current(self) -> bool:
+        return self._indexed_instruments is self.instruments and \
+            self._indexed_instrument_count == len(self.instruments)
+
+    def _rebuild_instrument_index(self) -> None:
+        self._instruments_by_name = {}
+        for position, instrument in enumerate(self.instruments):
+            self._instruments_by_name.setdefault(instrument.name, []).append((position, instrument))
+        self._indexed_instruments = self.instruments
+        self._indexed_instrument_count = len(self.instruments)
+
+    def _get_instruments_named(self, name: str) -> Sequence['ScampInstrument']:
+        if not self._instrument_index_is_current():
+            self._rebuild_instrument_index()
+        entries = self._instruments_by_name.get(name, ())
+        if len(entries) == 0 or any(self.instruments[position] is not instrument or instrument.name != name
+                                    for position, instrument in entries):
+            # either the index is out of date, or there really is no instrument of this name; rebuilding tells us which
+            self._rebuild_instrument_index()
+            entries = self._instruments_by_name.get(name, ())
+        return [instrument for position, instrument in entries]
+
     def _get_part_name_count(self, name):
-        return sum(i.name == name for i in self.instruments)
+        return len(self._get_instruments_named(name))
 
     def get_instrument_by_name(self, name: str, which: int = 0):
         """
@@ -255,14 +295,11 @@ class Ensemble(SavesToJSON):
             match the number given by which, the first name match is returned)
         """
         # if there are multiple instruments of the same name, which determines which one is chosen
-        imperfect_match = None
-        for instrument in self.instruments:
-            if name == instrument.name:
-                if which == instrument.name_count:
-                    return instrument
-                else:
-                    imperfect_match = instrument if imperfect_match is None else imperfect_match
-        return imperfect_match
+        instruments_named = self._get_instruments_named(name)
+        for instrument in instruments_named:
+            if which == instrument.name_count:
+                return instrument
+        return instruments_named[0] if len(instruments_named) > 0 else None
 
     def print_default_soundfont_presets(self) -> None:
         """
@@ -284,6 +321,29 @@ class Ensemble(SavesToJSON):
         """
         print_available_midi_output_devices()
 
+    @property
+    def playback_latency(self) -> float:
+        """
+        The latency, in seconds, with which the instruments in this ensemble produce their output. When this is greater
+        than zero, the musical logic runs ahead of the sound: rather than sending out each note on, pitch bend, OSC
+        message, etc. at whatever moment the clock thread happens to wake up, the playback implementations hand them to
+        an :class:`~scamp._output_dispatcher.OutputDispatcher`, which sends them out precisely at the time they were
+        scheduled for plus the latency. This removes any scheduling jitter smaller than the latency. A value of 0 means
+        that output happens immediately.
+        """
+        return 0 if self._output_dispatcher is None else self._output_dispatcher.latency
+
+    @playback_latency.setter
+    def playback_latency(self, value: float):
+        if value is None or value <= 0:
+            if self._output_dispatcher is not None:
+                self._output_dispatcher.close()
+                self._output_dispatcher = None
+        elif self._output_dispatcher is None:
+            self._output_dispatcher = OutputDispatcher(value)
+        else:
+            self._output_dispatcher.latency = value
+
     @property
     def default_spelling_policy(self) -> 'SpellingPolicy':
         """
@@ -348,8 +408,11 @@ class ScampInstrument(SavesToJSON):
 
         self._transcribers_to_notify = []
 
+        # maps the ids of the notes currently playing to their NoteStates
         self._note_info_by_id = {}
         self.playback_implementations = []
+        # each playback implementation is assigned a slot in the NoteState of every note, where it keeps its own info
+        self._num_note_state_slots = 0
 
         # A policy for spelling notes used as the default for this instrument. Overrides any broader defaults.
         # (Has a getter and setter method allowing constructor strings to be passed.)
@@ -366,6 +429,11 @@ class ScampInstrument(SavesToJSON):
         if ensemble is not None:
             self.set_ensemble(ensemble)
 
+    def _allocate_note_state_slot(self) -> int:
+        # slots are never reused, so removing a playback implementation never confuses the info of the others
+        self._num_note_state_slots += 1
+        return self._num_note_state_slots - 1
+
     def set_ensemble(self, ensemble: 'Ensemble') -> None:
         """
         Sets the ensemble that this instrument belongs to. Generally this happens automatically.
@@ -429,6 +497,33 @@ class ScampInstrument(SavesToJSON):
         :param blocking: if True, don't return until the note is done playing; if False, return immediately
         :param clock: which clock to use. If None, capture the clock from context.
         """
+        clock, blocking = self._resolve_clock(clock, blocking)
+        self._play_note_on_clock(clock, pitch, volume, length, self._standardize_properties(properties), blocking)
+
+    async def play_note_async(self, pitch, volume, length, properties: Union[str, dict] = None) -> None:
+        """
+        Awaitable version of :func:`play_note`, for use in coroutines. This instrument must belong to a
+        :class:`~scamp.session.Session` that is being served on the event loop (see
+        :func:`~scamp.session.Session.serve_async`); the note is played on a process forked on that Session, and this
+        returns once it is over.
+
+        :param pitch: see :func:`play_note`
+        :param volume: see :func:`play_note`
+        :param length: see :func:`play_note`
+        :param properties: see :func:`play_note`
+        """
+        if not hasattr(self.ensemble, "run_async"):
+            raise ValueError("play_note_async can only be used on instruments belonging to a Session.")
+        await self.ensemble.run_async(self.play_note, pitch, volume, length, properties)
+
+    def _resolve_clock(self, clock: Clock, blocking: bool) -> Tuple[Clock, bool]:
+        """
+        Works out which clock to play on when none was given explicitly, and whether blocking is possible on it.
+
+        :param clock: the clock given by the user (or None)
+        :param blocking: whether the user asked for blocking playback
+        :return: tuple of (clock, blocking)
+        """
         if clock is None:
             # first try to just get the clock operating on the current thread
             clock = current_clock()
@@ -445,8 +540,13 @@ class ScampInstrument(SavesToJSON):
                 else:
                     # otherwise, just create a clock to run this all on
                     clock = Clock()
+        return clock, blocking
 
-        properties = self._standardize_properties(properties)
+    def _play_note_on_clock(self, clock: Clock, pitch, volume, length, properties: NotePropertiesDictionary,
+                            blocking: bool) -> None:
+        """
+        Does the work of play_note once the clock has been resolved and the properties standardized.
+        """
         pitch = Envelope.from_list(pitch) if hasattr(pitch, "__len__") else pitch
         volume = Envelope.from_list(volume) if hasattr(volume, "__len__") else volume
 
@@ -536,11 +636,103 @@ class ScampInstrument(SavesToJSON):
             note_handle.end()
             raise e
 
+    def play_sequence(self, pitches, volumes, durations, properties=None, onsets: Sequence[float] = None,
+                      blocking: bool = True, clock: Clock = None) -> None:
+        """
+        Play a whole phrase of notes on this instrument. This produces the same result as calling :func:`play_note`
+        for each note in a loop, but the arguments are validated and standardized once, up front, and the phrase is
+        played by a single clock process, which makes it considerably cheaper for long, generated phrases.
+
+        Each of pitches, volumes, durations and properties can either be a single value, used for every note, or a
+        sequence (e.g. a list or a NumPy array) containing one value per note. All of the sequences given must have
+        the same length. Note that, since a list is always treated as one entry per note, a single value that is itself
+        a list (e.g. a pitch Envelope given as a list, or a list of properties) must be wrapped in another list.
+
+        :param pitches: the pitch of each note; see description for "play_note"
+        :param volumes: the volume of each note; see description for "play_note"
+        :param durations: the length of each note; see description of "length" under "play_note"
+        :param properties: the properties of each note; see description for "play_note"
+        :param onsets: the start beat of each note, measured from the beginning of the phrase. These must not
+            decrease, but notes are allowed to overlap. If None, each note starts when the previous one ends, as it
+            would with a loop of blocking play_note calls.
+        :param blocking: if True, don't return until all of the notes are done playing; if False, return immediately
+        :param clock: which clock to use. If None, capture the clock from context.
+        """
+        arguments = [pitches, volumes, durations, properties]
+        num_notes = None
+        for i, argument in enumerate(arguments):
+            if hasattr(argument, "__len__") and not isinstance(argument, (str, dict, NotePropertiesDictionary)):
+                # convert to a list once, so that we aren't indexing a NumPy array (or similar) note by note
+                arguments[i] = argument = list(argument)
+                if num_notes is None:
+                    num_notes = len(argument)
+                elif len(argument) != num_notes:
+                    raise ValueError("The sequences given to play_sequence are not all the same length.")
+            else:
+                arguments[i] = None
+        num_notes = 1 if num_notes is None else num_notes
+        # single values get repeated for every note
+        pitches, volumes, durations, properties = (
+            sequence if sequence is not None else [value] * num_notes
+            for sequence, value in zip(arguments, (pitches, volumes, durations, properties))
+        )
+
+        if onsets is not None:
+            onsets = list(onsets)
+            if len(onsets) != num_notes:
+                raise ValueError("Wrong number of onsets given to play_sequence.")
+            if (len(onsets) > 0 and onsets[0] < 0) or \
+                    any(next_onset < onset for onset, next_onset in zip(onsets, onsets[1:])):
+                raise ValueError("The onsets given to play_sequence must be non-negative and must not decrease.")
+
+        # the same properties are generally used throughout, in which case they only need to be standardized once
+        standardized_properties = {}
+        for i, note_properties in enumerate(properties):
+            if id(note_properties) not in standardized_properties:
+                standardized_properties[id(note_properties)] = self._standardize_properties(note_properties)
+            properties[i] = standardized_properties[id(note_properties)]
+
+        clock, blocking = self._resolve_clock(clock, blocking)
+        if num_notes == 0:
+            return
+        if blocking:
+            self._do_play_sequence(clock, pitches, volumes, durations, properties, onsets)
+        else:
+            clock.fork(self._do_play_sequence, name="DO_PLAY_SEQUENCE",
+                       args=(pitches, volumes, durations, properties, onsets))
+
+    def _do_play_sequence(self, clock, pitches, volumes, durations, properties, onsets):
+        """
+        The single process that plays the notes of a play_sequence call. Notes are played inline on this process,
+        unless the next note starts before they are over, in which case they have to be forked.
+
+        :param clock: which clock this plays back on
+        :param pitches: list of pitches
+        :param volumes: list of volumes
+        :param durations: list of durations
+        :param properties: list of NotePropertiesDictionaries
+        :param onsets: list of onsets, or None if the notes are consecutive
+        """
+        beat = end_beat = 0
+        for i, (pitch, volume, length, note_properties) in enumerate(zip(pitches, volumes, durations, properties)):
+            if onsets is not None and onsets[i] > beat:
+                clock.wait(onsets[i] - beat)
+                beat = onsets[i]
+            note_end_beat = beat + (sum(length) if hasattr(length, "__len__") else length)
+            end_beat = max(end_beat, note_end_beat)
+            inline = onsets is None or i == len(onsets) - 1 or onsets[i + 1] >= note_end_beat
+            self._play_note_on_clock(clock, pitch, volume, length, note_properties, inline)
+            if inline:
+                beat = note_end_beat
+        if end_beat > beat:
+            # wait for any overlapping notes to finish, so that blocking calls don't return early
+            clock.wait(end_beat - beat)
+
     def play_chord(self, pitches: Sequence, volume, length, properties: Union[str, dict] = None, blocking: bool = True,
                    clock: Clock = None) -> None:
         """
-        Play a chord with the given pitches, volume, and length. Essentially, this is a convenience method that
-        bundles together several calls to "play_note" and takes a list of pitches rather than a single pitch
+        Play a chord with the given pitches, volume, and length. The result is the same as that of several
+        simultaneous calls to "play_note", but all of the notes of the chord are played by a single clock process.
 
         :param pitches: a list of pitches for the notes of this chord
         :param volume: see description for "play_note"
@@ -554,25 +746,119 @@ class ScampInstrument(SavesToJSON):
         if not hasattr(pitches, "__len__"):
             raise ValueError("'pitches' must be a list of pitches.")
 
+        clock, blocking = self._resolve_clock(clock, blocking)
         properties = self._standardize_properties(properties)
 
         # we should either be given a number of noteheads equal to the number of pitches or just one notehead for all
         if not (len(properties.noteheads) == len(pitches) or len(properties.noteheads) == 1):
             raise ValueError("Wrong number of noteheads for chord.")
 
-        for i, pitch in enumerate(pitches[:-1]):
-            # for all but the last pitch, play it without blocking, so we can start all the others
-            # also copy the properties dictionary, and pick out the correct notehead if we've been given several
-            properties_copy = deepcopy(properties)
-            if len(properties.noteheads) > 1:
-                properties_copy.noteheads = [properties_copy.noteheads[i]]
-            self.play_note(pitch, volume, length, properties=properties_copy, blocking=False, clock=clock)
+        pitches = [Envelope.from_list(pitch) if hasattr(pitch, "__len__") else pitch for pitch in pitches]
+        volume = Envelope.from_list(volume) if hasattr(volume, "__len__") else volume
+        # pick out the correct notehead for each note if we've been given several
+        properties_list = [ScampInstrument._get_chord_member_properties(properties, i) for i in range(len(pitches))]
+
+        adjustment_results = [member_properties.apply_playback_adjustments(pitch, volume, length)
+                              for pitch, member_properties in zip(pitches, properties_list)]
+
+        if any(did_an_adjustment for _, _, _, did_an_adjustment in adjustment_results):
+            adjusted_lengths = [adjusted_length for _, _, adjusted_length, _ in adjustment_results]
+            if any(adjusted_length != adjusted_lengths[0] for adjusted_length in adjusted_lengths):
+                # the adjustments give the notes different lengths, so they can't be played by a single process
+                for i, (pitch, member_properties) in enumerate(zip(pitches, properties_list)):
+                    self._play_note_on_clock(clock, pitch, volume, length, member_properties,
+                                             blocking and i == len(pitches) - 1)
+                return
+            adjusted_pitches = [Envelope.from_list(adjusted_pitch) if hasattr(adjusted_pitch, "__len__")
+                                else adjusted_pitch for adjusted_pitch, _, _, _ in adjustment_results]
+            adjusted_volumes = [Envelope.from_list(adjusted_volume) if hasattr(adjusted_volume, "__len__")
+                                else adjusted_volume for _, adjusted_volume, _, _ in adjustment_results]
+            # play, but don't transcribe the modified version (though only if the clock is not fast-forwarding)
+            if not clock.is_fast_forwarding():
+                clock.fork(self._do_play_chord,
+                           args=(adjusted_pitches, adjusted_volumes, adjusted_lengths[0], properties_list),
+                           kwargs={"transcribe": False})
+            # transcribe, but don't play the unmodified version
+            silent = True
+        else:
+            # No adjustments, so no need to separate transcription from playback
+            # (However, if the clock is fast-forwarding, make it silent)
+            silent = clock.is_fast_forwarding()
+
+        if blocking:
+            self._do_play_chord(clock, pitches, [volume] * len(pitches), length, properties_list, silent=silent)
+        else:
+            clock.fork(self._do_play_chord, name="DO_PLAY_CHORD",
+                       args=(pitches, [volume] * len(pitches), length, properties_list), kwargs={"silent": silent})
 
-        # for the last pitch, block or not based on the blocking parameter
-        # also, if we've been given a list of noteheads, pick out the last one
+    def _do_play_chord(self, clock, pitches, volumes, length, properties_list, silent=False, transcribe=True):
+        """
+        The chord equivalent of _do_play_note. Rather than each note of the chord running on its own clock process,
+        all of them are started, split and ended by this one, sharing their time stamps, and their envelopes are
+        animated together (see _animate_chord).
+
+        :param clock: which clock this plays back on
+        :param pitches: list of pitches (numbers or Envelopes)
+        :param volumes: list of volumes (numbers or Envelopes)
+        :param length: either a number (of beats), or a tuple representing a set of tied segments
+        :param properties_list: list of NotePropertiesDictionaries
+        :param silent: see _do_play_note
+        :param transcribe: see _do_play_note
+        """
+        sum_length = sum(length) if hasattr(length, "__len__") else length
+
+        start_time_stamp = TimeStamp(clock)
+        note_handles = []
+        for pitch, volume, properties in zip(pitches, volumes, properties_list):
+            # normalize all envelopes to to the duration of the chord
+            if isinstance(pitch, Envelope):
+                pitch.normalize_to_duration(sum_length)
+            if isinstance(volume, Envelope):
+                volume.normalize_to_duration(sum_length)
+            for param, value in properties.iterate_extra_parameters_and_values():
+                if isinstance(value, Envelope):
+                    value.normalize_to_duration(sum_length)
+
+            note_flags = []
+            if not isinstance(pitch, Envelope) and not isinstance(volume, Envelope):
+                note_flags.append("fixed")
+            if silent:
+                note_flags.append("silent")
+            if not transcribe:
+                note_flags.append("no_transcribe")
+            note_handles.append(self._start_note_on_clock(
+                clock, pitch, volume, properties, volume.max_level() if isinstance(volume, Envelope) else volume,
+                note_flags, start_time_stamp
+            ))
+
+        self._animate_chord(note_handles, pitches, volumes, properties_list, clock)
+        note_ids = [note_handle.note_id for note_handle in note_handles]
+
+        try:
+            if hasattr(length, "__len__"):
+                for length_segment in length:
+                    clock.wait(length_segment)
+                    self._split_notes(note_ids)
+            else:
+                clock.wait(length)
+            self._end_notes(note_ids)
+        except ClockKilledError as e:
+            self._end_notes(note_ids)
+            raise e
+
+    @staticmethod
+    def _get_chord_member_properties(properties: NotePropertiesDictionary, i: int) -> NotePropertiesDictionary:
+        """
+        Returns the properties to use for the ith note of a chord, picking out the ith notehead if several were given.
+        Interned (frozen) properties are shared rather than copied, since they can't be modified anyway.
+        """
+        if properties.is_frozen():
+            return properties if len(properties.noteheads) <= 1 \
+                else properties._frozen_variant("noteheads", [properties.noteheads[i]])
+        properties_copy = deepcopy(properties)
         if len(properties.noteheads) > 1:
-            properties.noteheads = [properties.noteheads[-1]]
-        self.play_note(pitches[-1], volume, length, properties=properties, blocking=blocking, clock=clock)
+            properties_copy.noteheads = [properties_copy.noteheads[i]]
+        return properties_copy
 
     def start_note(self, pitch: float, volume: float, properties: dict = None, clock: Clock = None,
                    max_volume: float = 1, flags: Sequence[str] = None) -> 'NoteHandle':
@@ -596,24 +882,38 @@ class ScampInstrument(SavesToJSON):
             ignored by a normal user.
         :return: a NoteHandle with which to later manipulate the note
         """
-        if clock is None:
-            # first try to just get the clock operating on the current thread
-            clock = current_clock()
-            if clock is None:
-                # if there's no clock operating on the current thread,,,
-                if isinstance(self.ensemble, Clock):
-                    # ...but this instrument belongs to a Session (i.e. an ensemble that's also a clock),
-                    # then we use that session as our clock
-                    clock = self.ensemble
-                else:
-                    # otherwise, just create a clock to run this all on
-                    clock = Clock()
+        clock, _ = self._resolve_clock(clock, False)
 
         # standardize properties if necessary, turn pitch and volume into lists if necessary
         properties = self._standardize_properties(properties)
         pitch = Envelope.from_list(pitch) if hasattr(pitch, "__len__") else pitch
         volume = Envelope.from_list(volume) if hasattr(volume, "__len__") else volume
 
+        handle = self._start_note_on_clock(clock, pitch, volume, properties, max_volume, flags)
+
+        # start all the note animation for pitch, volume, and any extra parameters
+        # note that, if the note is silent, then start_note has added the silent flag to the NoteState
+        # this will cause unsynchronized animation threads not to fire
+        if isinstance(pitch, Envelope):
+            handle.change_pitch(pitch.levels[1:], pitch.durations, pitch.curve_shapes, clock)
+        if isinstance(volume, Envelope):
+            handle.change_volume(volume.levels[1:], volume.durations, volume.curve_shapes, clock)
+        for param, value in properties.iterate_extra_parameters_and_values():
+            if isinstance(value, Envelope):
+                handle.change_parameter(param, value.levels[1:], value.durations, value.curve_shapes, clock)
+
+        return handle
+
+    def _start_note_on_clock(self, clock: Clock, pitch, volume, properties: NotePropertiesDictionary,
+                             max_volume: float, flags: Sequence[str],
+                             start_time_stamp: TimeStamp = None) -> 'NoteHandle':
+        """
+        Does the work of start_note, except for starting the animation of any Envelopes (of which only the start
+        levels are used here).
+
+        :param start_time_stamp: TimeStamp at which the note starts (if None, the current time on the clock)
+        :return: a NoteHandle for the note
+        """
         # get the starting values for all the parameters to pass to the playback implementations
         start_pitch = pitch.start_level() if isinstance(pitch, Envelope) else pitch
         start_volume = volume.start_level() if isinstance(volume, Envelope) else volume
@@ -623,45 +923,59 @@ class ScampInstrument(SavesToJSON):
         with self._note_info_lock:
             # generate a new id for this note, and set up all of its info
             note_id = next(ScampInstrument._note_id_generator)
-            self._note_info_by_id[note_id] = {
-                "clock": clock,
-                "start_time_stamp": TimeStamp(clock),
-                "end_time_stamp": None,
-                "split_points": [],
-                "parameter_start_values": dict(other_param_start_values, pitch=start_pitch, volume=start_volume),
-                "parameter_values": dict(other_param_start_values, pitch=start_pitch, volume=start_volume),
-                "parameter_change_segments": {},
-                "segments_list_lock": Lock(),
-                "properties": properties,
-                "max_volume": max_volume,
-                "flags": [] if flags is None else flags
-            }
-
-            if clock.is_fast_forwarding() and "silent" not in self._note_info_by_id[note_id]["flags"]:
-                self._note_info_by_id[note_id]["flags"].append("silent")
-
-            if "silent" not in self._note_info_by_id[note_id]["flags"]:
+            note_info = self._note_info_by_id[note_id] = NoteState.acquire(
+                clock, dict(other_param_start_values, pitch=start_pitch, volume=start_volume), properties,
+                max_volume, [] if flags is None else flags, self._num_note_state_slots, start_time_stamp
+            )
+
+            # if the session that the clock belongs to is being traced, start this note's span on the timeline
+            trace = getattr(clock.master, "_playback_trace", None)
+            if trace is not None:
+                trace.begin_async(self.name, "note", note_id, pitch=start_pitch, volume=start_volume)
+
+            if clock.is_fast_forwarding() and "silent" not in note_info.flags:
+                note_info.flags.append("silent")
+
+            if "silent" not in note_info.flags:
+                self._record_note_timing("start_note", clock)
                 # otherwise, call all the playback implementation!
                 for playback_implementation in self.playback_implementations:
                     playback_implementation.start_note(note_id, start_pitch, start_volume,
                                                        properties, other_param_start_values)
 
-        # we now exit the lock, since otherwise the following calls will not be able to happen
+        # we now exit the lock, since otherwise any further calls will not be able to happen
         # create a handle for this note
-        handle = NoteHandle(note_id, self)
-
-        # start all the note animation for pitch, volume, and any extra parameters
-        # note that, if the note is silent, then start_note has added the silent flag to the note_info dict
-        # this will cause unsynchronized animation threads not to fire
-        if isinstance(pitch, Envelope):
-            handle.change_pitch(pitch.levels[1:], pitch.durations, pitch.curve_shapes, clock)
-        if isinstance(volume, Envelope):
-            handle.change_volume(volume.levels[1:], volume.durations, volume.curve_shapes, clock)
-        for param, value in properties.iterate_extra_parameters_and_values():
-            if isinstance(value, Envelope):
-                handle.change_parameter(param, value.levels[1:], value.durations, value.curve_shapes, clock)
-
-        return handle
+        return NoteHandle(note_id, self)
+
+    def _animate_chord(self, note_handles: Sequence['NoteHandle'], pitches: Sequence, volumes: Sequence,
+                       properties_list: Sequence[NotePropertiesDictionary], clock: Clock) -> None:
+        """
+        Starts the animation of the Envelopes (pitch, volume, and extra parameters) of the notes of a chord that has
+        been started with _start_note_on_clock. Rather than animating each note separately, the notes whose Envelopes
+        for a given parameter have the same timing (e.g. a volume envelope shared by the whole chord) are animated
+        together by a single process.
+
+        :param note_handles: handles of the notes of the chord
+        :param pitches: the pitch of each note (number or Envelope)
+        :param volumes: the volume of each note (number or Envelope)
+        :param properties_list: the properties of each note
+        :param clock: the clock on which to animate
+        """
+        # maps (parameter, durations, curve shapes) to a list of (note id, target levels) for each note so animated
+        animations = {}
+        for note_handle, pitch, volume, properties in zip(note_handles, pitches, volumes, properties_list):
+            for param, value in itertools.chain((("pitch", pitch), ("volume", volume)),
+                                                properties.iterate_extra_parameters_and_values()):
+                if isinstance(value, Envelope):
+                    animation_key = (param, tuple(value.durations), tuple(value.curve_shapes))
+                    if animation_key not in animations:
+                        animations[animation_key] = []
+                    animations[animation_key].append((note_handle.note_id, value.levels[1:]))
+
+        for (param, durations, curve_shapes), notes_and_targets in animations.items():
+            self._change_notes_parameter([note_id for note_id, _ in notes_and_targets], param,
+                                         [targets for _, targets in notes_and_targets],
+                                         list(durations), list(curve_shapes), clock)
 
     def start_chord(self, pitches: Sequence[float], volume: float, properties: dict = None,
                     clock: Clock = None, max_volume: float = 1, flags: Sequence[str] = None) -> 'ChordHandle':
@@ -686,22 +1000,25 @@ class ScampInstrument(SavesToJSON):
         assert len(properties.noteheads) == len(pitches) or len(properties.noteheads) == 1, \
             "Wrong number of noteheads for chord."
 
-        note_handles = []
+        clock, _ = self._resolve_clock(clock, False)
 
         pitches = [Envelope.from_list(pitch) if hasattr(pitch, "__len__") else pitch for pitch in pitches]
+        volume = Envelope.from_list(volume) if hasattr(volume, "__len__") else volume
+        # pick out the correct notehead for each note if we've been given several
+        properties_list = [ScampInstrument._get_chord_member_properties(properties, i) for i in range(len(pitches))]
 
         first_pitch_start_level = pitches[0].start_level() if isinstance(pitches[0], Envelope) else pitches[0]
         intervals = [(pitch.start_level() if isinstance(pitch, Envelope) else pitch) - first_pitch_start_level
                      for pitch in pitches]
 
-        for i, pitch in enumerate(pitches):
-            # for all but the last pitch, play it without blocking, so we can start all the others
-            # also copy the properties dictionary, and pick out the correct notehead if we've been given several
-            properties_copy = deepcopy(properties)
-            if len(properties.noteheads) > 1:
-                properties_copy.noteheads = [properties_copy.noteheads[i]]
-            note_handles.append(self.start_note(pitch, volume, properties=properties_copy, clock=clock,
-                                                max_volume=max_volume, flags=flags))
+        # all of the notes start at the same moment, and any envelopes are animated together
+        start_time_stamp = TimeStamp(clock)
+        note_handles = [
+            self._start_note_on_clock(clock, pitch, volume, member_properties, max_volume,
+                                      None if flags is None else list(flags), start_time_stamp)
+            for pitch, member_properties in zip(pitches, properties_list)
+        ]
+        self._animate_chord(note_handles, pitches, [volume] * len(pitches), properties_list, clock)
 
         return ChordHandle(note_handles, intervals)
 
@@ -715,18 +1032,24 @@ class ScampInstrument(SavesToJSON):
         if isinstance(raw_properties, NotePropertiesDictionary):
             return raw_properties
 
-        properties = NotePropertiesDictionary.from_unknown_format(raw_properties) \
-            if not isinstance(raw_properties, NotePropertiesDictionary) else raw_properties
+        # the same properties strings tend to be used over and over, so they are parsed once and then shared
+        properties = NotePropertiesDictionary.interned(raw_properties)
 
         # resolve the spelling policy based on defaults (local first, then more global)
         if properties["spelling_policy"] is None:
             # if the note doesn't say how to be spelled, check the instrument
             if self.default_spelling_policy is not None:
-                properties.spelling_policy = self.default_spelling_policy
+                default_spelling_policy = self.default_spelling_policy
             # if the instrument doesn't have a default spelling policy check the host (probably a Session)
             elif self.ensemble is not None and self.ensemble.default_spelling_policy is not None:
-                properties.spelling_policy = self.ensemble.default_spelling_policy
-            # if the host doesn't have a default, then don't do anything and it will fall back to playback_settings
+                default_spelling_policy = self.ensemble.default_spelling_policy
+            else:
+                # if the host doesn't have a default, then don't do anything and it will fall back to playback_settings
+                return properties
+            if properties.is_frozen():
+                properties = properties._frozen_variant("spelling_policy", default_spelling_policy)
+            else:
+                properties.spelling_policy = default_spelling_policy
         return properties
 
     def change_note_parameter(self, note_id: Union[int, 'NoteHandle'], param_name: str,
@@ -744,109 +1067,159 @@ class ScampInstrument(SavesToJSON):
         :param transition_curve_shape_or_shapes: curve shape(s) for the transition(s)
         :param clock: which clock all of this happens on; by default, reuses the clock that the note started on.
         """
+        note_id = note_id.note_id if isinstance(note_id, NoteHandle) else note_id
+        self._change_notes_parameter((note_id, ), param_name, (target_value_or_values, ),
+                                     transition_length_or_lengths, transition_curve_shape_or_shapes, clock)
+
+    def _change_notes_parameter(self, note_ids: Sequence[int], param_name: str, targets: Sequence,
+                                transition_length_or_lengths: Union[float, Sequence] = 0,
+                                transition_curve_shape_or_shapes: Union[float, Sequence] = 0,
+                                clock: Clock = None) -> None:
+        """
+        Changes the value of a parameter for several notes at once, with the same transition timing for all of them.
+        This is how chords are animated: the changes to all of the notes are carried out by a single clock process (see
+        :func:`_ParameterChangeSegment.run_group`), and share their time stamps.
+
+        :param note_ids: the ids of the notes to affect (all on the same clock)
+        :param param_name: see change_note_parameter
+        :param targets: for each note, the target value (or list of values) for the parameter
+        :param transition_length_or_lengths: see change_note_parameter
+        :param transition_curve_shape_or_shapes: see change_note_parameter
+        :param clock: see change_note_parameter
+        """
         with self._note_info_lock:
-            note_id = note_id.note_id if isinstance(note_id, NoteHandle) else note_id
-            note_info = self._note_info_by_id[note_id]
+            note_infos = [self._note_info_by_id[note_id] for note_id in note_ids]
 
             if clock is None:
-                clock = note_info["clock"]
+                clock = note_infos[0].clock
             assert isinstance(clock, Clock), "Invalid clock argument."
 
-            if "fixed" in note_info["flags"] and param_name in ("pitch", "volume"):
-                raise Exception("Cannot change pitch or volume of a note with 'fixed' set to True.")
-
-            # which function do we use to actually carry out the change of parameter? Pitch and volume are special.
-            if "silent" in note_info["flags"]:
-                # if it's silent, then we don't actually call any of the implementation, so pass a dummy function
-                def parameter_change_function(value): note_info["parameter_values"][param_name] = value
-                temporal_resolution = None
-            elif param_name == "pitch":
-                def parameter_change_function(value):
-                    for playback_implementation in self.playback_implementations:
-                        playback_implementation.change_note_pitch(note_id, value)
-                    note_info["parameter_values"][param_name] = value
-                temporal_resolution = "pitch-based"
-            elif param_name == "volume":
-                def parameter_change_function(value):
-                    for playback_implementation in self.playback_implementations:
-                        playback_implementation.change_note_volume(note_id, value)
-                    note_info["parameter_values"][param_name] = value
-                temporal_resolution = "volume-based"
-            else:
-                def parameter_change_function(value):
-                    for playback_implementation in self.playback_implementations:
-                        playback_implementation.change_note_parameter(note_id, param_name, value)
-                    note_info["parameter_values"][param_name] = value
-                temporal_resolution = 0.01
+            parameter_change_functions = []
+            segments_lists = []
+            for note_id, note_info in zip(note_ids, note_infos):
+                if "fixed" in note_info.flags and param_name in ("pitch", "volume"):
+                    raise Exception("Cannot change pitch or volume of a note with 'fixed' set to True.")
 
-            assert param_name in note_info["parameter_values"], \
-                "Cannot change parameter {}, as it was undefined at note start.".format(param_name)
+                assert param_name in note_info.parameter_values, \
+                    "Cannot change parameter {}, as it was undefined at note start.".format(param_name)
 
-            if param_name in note_info["parameter_change_segments"]:
-                segments_list = note_info["parameter_change_segments"][param_name]
-            else:
-                segments_list = note_info["parameter_change_segments"][param_name] = []
+                parameter_change_functions.append(self._get_parameter_change_function(note_id, note_info, param_name))
 
-            # if there was a previous segment changing this same parameter, and it's not done yet, we should abort it
-            if len(segments_list) > 0:
-                segments_list[-1].abort_if_running()
+                segments_list = note_info.get_parameter_change_segments_list(param_name)
+                # if there was a previous segment changing this same parameter, and it's not done yet, abort it
+                if len(segments_list) > 0:
+                    segments_list[-1].abort_if_running()
+                segments_lists.append(segments_list)
+
+            silent_flags = ["silent" in note_info.flags for note_info in note_infos]
 
             # this helps to keep track of which call to change_note_parameter happened first, since when
             # do_animation_sequence gets forked, order can become indeterminate (see comment there)
             call_priority = next(ScampInstrument._change_param_call_counter)
 
-            if hasattr(target_value_or_values, "__len__"):
+            if hasattr(targets[0], "__len__"):
+                num_segments = len(targets[0])
                 # assume linear segments unless otherwise specified
-                transition_curve_shape_or_shapes = [0] * len(target_value_or_values) if \
+                transition_curve_shape_or_shapes = [0] * num_segments if \
                     transition_curve_shape_or_shapes == 0 else transition_curve_shape_or_shapes
                 assert hasattr(transition_length_or_lengths, "__len__") and \
                        hasattr(transition_curve_shape_or_shapes, "__len__")
-                assert len(target_value_or_values) == len(transition_length_or_lengths) == \
-                       len(transition_curve_shape_or_shapes), \
+                assert all(len(note_targets) == len(transition_length_or_lengths) ==
+                           len(transition_curve_shape_or_shapes) for note_targets in targets), \
                     "List of target values must be accompanied by a equal length list of transition lengths and shapes."
 
                 def do_animation_sequence():
-                    for target, length, shape in zip(target_value_or_values, transition_length_or_lengths,
-                                                     transition_curve_shape_or_shapes):
-                        with note_info["segments_list_lock"]:
-                            if len(segments_list) > 0 and segments_list[-1].running:
-                                # if two segments are started at the exact same (clock) time, then we want to abort the
-                                # one that was called first. Often that will happen in the call to segments_list[-1].
-                                # abort_if_running() above. However, it may be that they both make it through that check
-                                # before either is added to the segments list. This checks in on that case, and aborts
-                                # whichever segment came from the earlier call to change_note_parameter
-                                if call_priority > segments_list[-1].call_priority:
-                                    # this call to change_note_parameter happened after, abort the other one
-                                    segments_list[-1].abort_if_running()
-                                else:
-                                    # this call to change_note_parameter happened before, abort
-                                    return
-
-                            this_segment = _ParameterChangeSegment(
-                                parameter_change_function, note_info["parameter_values"][param_name], target,
-                                length, shape, clock, call_priority, temporal_resolution=temporal_resolution)
-
-                            segments_list.append(this_segment)
+                    # indices of the notes whose animation is still going (i.e. hasn't been cut off by a later change)
+                    remaining = list(range(len(note_ids)))
+                    for i, (length, shape) in enumerate(zip(transition_length_or_lengths,
+                                                            transition_curve_shape_or_shapes)):
+                        these_segments = []
+                        for which_note in tuple(remaining):
+                            note_info, segments_list = note_infos[which_note], segments_lists[which_note]
+                            with note_info.segments_list_lock:
+                                if len(segments_list) > 0 and segments_list[-1].running:
+                                    # if two segments are started at the exact same (clock) time, then we want to abort
+                                    # the one that was called first. Often that will happen in the call to
+                                    # segments_list[-1].abort_if_running() above. However, it may be that they both make
+                                    # it through that check before either is added to the segments list. This checks in
+                                    # on that case, and aborts whichever segment came from the earlier call to
+                                    # change_note_parameter
+                                    if call_priority > segments_list[-1].call_priority:
+                                        # this call to change_note_parameter happened after, abort the other one
+                                        segments_list[-1].abort_if_running()
+                                    else:
+                                        # this call to change_note_parameter happened before, abort
+                                        remaining.remove(which_note)
+                                        continue
+
+                                this_segment = _ParameterChangeSegment(
+                                    parameter_change_functions[which_note][0], note_info.parameter_values[param_name],
+                                    targets[which_note][i], length, shape, clock, call_priority,
+                                    temporal_resolution=parameter_change_functions[which_note][1])
+
+                                segments_list.append(this_segment)
+                            these_segments.append(this_segment)
+
+                        if len(these_segments) == 0:
+                            return
                         # note that these segments are not forked individually: they are chained together and called
                         # directly on a function (do_animation_sequence) that is forked. This means that when we abort
                         # one of them, we kill the clock that do_animation_sequence is running on, thereby aborting all
                         # remaining segments as well. This is exactly what we want: if we call change_note_parameter
                         # while a previous change_note_parameter is running, we want to abort all segments of the
-                        # one that's running
-                        try:
-                            this_segment.run(silent="silent" in note_info["flags"])
-                        except Exception as e:
-                            raise e
+                        # one that's running. (When several notes are animated together, the clock is only killed once
+                        # all of their segments have been aborted, so we drop the aborted notes from here on instead.)
+                        _ParameterChangeSegment.run_group(these_segments,
+                                                          [silent_flags[which_note] for which_note in remaining])
+                        remaining = [which_note for which_note, segment in zip(remaining, these_segments)
+                                     if not segment.aborted]
 
                 clock.fork(do_animation_sequence, name="PARAM_ANIMATION({})".format(param_name))
             else:
-                parameter_change_segment = _ParameterChangeSegment(
-                    parameter_change_function, note_info["parameter_values"][param_name], target_value_or_values,
-                    transition_length_or_lengths, transition_curve_shape_or_shapes, clock, call_priority,
-                    temporal_resolution=temporal_resolution)
-                with note_info["segments_list_lock"]:
-                    segments_list.append(parameter_change_segment)
-                clock.fork(parameter_change_segment.run, kwargs={"silent": "silent" in note_info["flags"]})
+                these_segments = []
+                for note_info, segments_list, (parameter_change_function, temporal_resolution), target in \
+                        zip(note_infos, segments_lists, parameter_change_functions, targets):
+                    parameter_change_segment = _ParameterChangeSegment(
+                        parameter_change_function, note_info.parameter_values[param_name], target,
+                        transition_length_or_lengths, transition_curve_shape_or_shapes, clock, call_priority,
+                        temporal_resolution=temporal_resolution)
+                    with note_info.segments_list_lock:
+                        segments_list.append(parameter_change_segment)
+                    these_segments.append(parameter_change_segment)
+                if len(these_segments) == 1:
+                    clock.fork(these_segments[0].run, kwargs={"silent": silent_flags[0]})
+                else:
+                    clock.fork(_ParameterChangeSegment.run_group, args=(these_segments, silent_flags))
+
+    def _get_parameter_change_function(self, note_id: int, note_info: 'NoteState', param_name: str) -> tuple:
+        """
+        Returns the function used to actually carry out changes to the given parameter of the given note, along with
+        the temporal resolution with which to animate it.
+        """
+        # pitch and volume are special.
+        if "silent" in note_info.flags:
+            # if it's silent, then we don't actually call any of the implementation, so pass a dummy function
+            def parameter_change_function(value): note_info.set_parameter_value(param_name, value)
+            temporal_resolution = None
+        elif param_name == "pitch":
+            def parameter_change_function(value):
+                for playback_implementation in self.playback_implementations:
+                    playback_implementation.change_note_pitch(note_id, value)
+                note_info.set_parameter_value(param_name, value)
+            temporal_resolution = "pitch-based"
+        elif param_name == "volume":
+            def parameter_change_function(value):
+                for playback_implementation in self.playback_implementations:
+                    playback_implementation.change_note_volume(note_id, value)
+                note_info.set_parameter_value(param_name, value)
+            temporal_resolution = "volume-based"
+        else:
+            def parameter_change_function(value):
+                for playback_implementation in self.playback_implementations:
+                    playback_implementation.change_note_parameter(note_id, param_name, value)
+                note_info.set_parameter_value(param_name, value)
+            temporal_resolution = 0.01
+        return parameter_change_function, temporal_resolution
 
     def change_note_pitch(self, note_id: Union[int, 'NoteHandle'], target_value_or_values: Union[float, Sequence],
                           transition_length_or_lengths: Union[float, Sequence] = 0,
@@ -886,10 +1259,22 @@ class ScampInstrument(SavesToJSON):
 
         :param note_id: Which note or NoteHandle to split
         """
+        note_id = note_id.note_id if isinstance(note_id, NoteHandle) else note_id
+        self._split_notes((note_id, ))
+
+    def _split_notes(self, note_ids: Sequence[int]) -> None:
+        """
+        Adds a split point to several notes at once (e.g. the notes of a chord), sharing a single TimeStamp.
+
+        :param note_ids: ids of the notes to split
+        """
         with self._note_info_lock:
-            note_id = note_id.note_id if isinstance(note_id, NoteHandle) else note_id
-            note_info = self._note_info_by_id[note_id]
-            note_info["split_points"].append(TimeStamp(note_info["clock"]))
+            time_stamp = time_stamp_clock = None
+            for note_id in note_ids:
+                note_info = self._note_info_by_id[note_id]
+                if note_info.clock is not time_stamp_clock:
+                    time_stamp, time_stamp_clock = TimeStamp(note_info.clock), note_info.clock
+                note_info.add_split_point(time_stamp)
 
     def end_note(self, note_id: Union[int, 'NoteHandle'] = None) -> None:
         """
@@ -916,29 +1301,73 @@ class ScampInstrument(SavesToJSON):
                 logging.warning("Tried to end a note that was never started!")
                 return
 
-            note_info = self._note_info_by_id[note_id]
+            self._end_note_locked(note_id)
 
-            # resolve the clock to use
-            clock = note_info["clock"]
+    def _end_notes(self, note_ids: Sequence[int]) -> None:
+        """
+        Ends several notes at once (e.g. the notes of a chord), sharing a single end TimeStamp.
 
-            # end any segments that are still changing
-            for param_name in note_info["parameter_change_segments"]:
-                if len(note_info["parameter_change_segments"][param_name]) > 0:
-                    note_info["parameter_change_segments"][param_name][-1].abort_if_running()
+        :param note_ids: ids of the notes to end
+        """
+        with self._note_info_lock:
+            end_time_stamp = time_stamp_clock = None
+            for note_id in note_ids:
+                if note_id not in self._note_info_by_id:
+                    logging.warning("Tried to end a note that was never started!")
+                    continue
+                note_clock = self._note_info_by_id[note_id].clock
+                if note_clock is not time_stamp_clock:
+                    end_time_stamp, time_stamp_clock = TimeStamp(note_clock), note_clock
+                self._end_note_locked(note_id, end_time_stamp)
 
-            # transcribe the note, if applicable
-            note_info["end_time_stamp"] = TimeStamp(clock)
-            if "no_transcribe" not in note_info["flags"]:
-                for transcriber in self._transcribers_to_notify:
-                    transcriber.register_note(self, note_info)
+    def _record_note_timing(self, event_name, clock):
+        # if the session that the clock belongs to is recording metrics, note down how much later than scheduled the
+        # note is starting or ending
+        metrics = getattr(clock.master, "_playback_metrics", None) if clock is not None else None
+        if metrics is not None:
+            metrics.record("{}/{}".format(event_name, self.name), time.time() - get_scheduled_time(clock))
 
-            # do the sonic implementation of ending the note, as long as it's not silent
-            if "silent" not in note_info["flags"]:
-                for playback_implementation in self. playback_implementations:
-                    playback_implementation.end_note(note_id)
+    def _end_note_locked(self, note_id: int, end_time_stamp: TimeStamp = None) -> None:
+        """
+        Does the work of ending a note; must be called while holding the _note_info_lock.
 
-            # remove from active notes and delete the note info
-            del self._note_info_by_id[note_id]
+        :param note_id: id of the note to end
+        :param end_time_stamp: TimeStamp at which the note ends (if None, the current time on the note's clock)
+        """
+        note_info = self._note_info_by_id[note_id]
+
+        # end any segments that are still changing
+        for segments_list in note_info.parameter_change_segments.values():
+            if len(segments_list) > 0:
+                segments_list[-1].abort_if_running()
+
+        # transcribe the note, if applicable
+        note_info.end_time_stamp = TimeStamp(note_info.clock) if end_time_stamp is None else end_time_stamp
+        note_info_retained = False
+        trace = getattr(note_info.clock.master, "_playback_trace", None)
+        if "no_transcribe" not in note_info.flags and len(self._transcribers_to_notify) > 0:
+            registration_start = trace.timestamp() if trace is not None else None
+            for transcriber in self._transcribers_to_notify:
+                if transcriber.register_note(self, note_info):
+                    note_info_retained = True
+            if trace is not None:
+                trace.add_span("register_note", "transcription", registration_start, instrument=self.name)
+        if trace is not None:
+            trace.end_async(self.name, "note", note_id)
+
+        # do the sonic implementation of ending the note, as long as it's not silent
+        if "silent" not in note_info.flags:
+            self._record_note_timing("end_note", current_clock())
+            for playback_implementation in self. playback_implementations:
+                playback_implementation.end_note(note_id)
+
+        # remove from active notes and delete the note info
+        del self._note_info_by_id[note_id]
+
+        # the NoteState can be recycled, unless a transcriber is holding on to it, or an animation thread that was
+        # just aborted could conceivably still be about to write to it
+        if not note_info_retained and note_info._parameter_change_segments is None:
+            note_info.release()
 
     def end_all_notes(self) -> None:
         """
@@ -959,7 +1388,7 @@ class ScampInstrument(SavesToJSON):
 
     def add_soundfont_playback(self, preset: Union[str, int, Sequence] = "auto", soundfont: str = "default",
                                num_channels: int = 8, audio_driver: str = "default",  max_pitch_bend: int = "default",
-                               note_on_and_off_only: bool = False) -> 'ScampInstrument':
+                               note_on_and_off_only: bool = False, use_sequencer: bool = "default") -> 'ScampInstrument':
         """
         Add a soundfont playback implementation for this instrument.
 
@@ -977,6 +1406,9 @@ class ScampInstrument(SavesToJSON):
             doesn't do any dynamic pitch/volume/parameter changes. Without this flag, notes will all be placed on
             separate MIDI channels, since they could potentially change pitch or volume; with this flags, we know they
             won't, so they can share the same MIDI channels, only using an extra one due to microtonality.
+        :param use_sequencer: whether to schedule events with fluidsynth's own sequencer, timestamped a little in the
+            future, rather than sending them to the synth right away (see
+            :class:`~scamp.playback_implementations.SoundfontPlaybackImplementation`)
         :return: self
         """
         soundfont = self.ensemble.default_soundfont \
@@ -988,7 +1420,7 @@ class ScampInstrument(SavesToJSON):
             preset = (0, preset)
         SoundfontPlaybackImplementation(self, bank_and_preset=preset, soundfont=soundfont, num_channels=num_channels,
                                         audio_driver=audio_driver, max_pitch_bend=max_pitch_bend,
-                                        note_on_and_off_only=note_on_and_off_only)
+                                        note_on_and_off_only=note_on_and_off_only, use_sequencer=use_sequencer)
         return self
 
     def remove_soundfont_playback(self) -> 'ScampInstrument':
@@ -1222,6 +1654,218 @@ class ScampInstrument(SavesToJSON):
         return "ScampInstrument._from_dict({})".format(self._to_dict())
 
 
+class NoteState:
+    """
+    Record of everything to do with a single note that is currently being played by a :class:`ScampInstrument`: the
+    clock it is on, its time stamps, the current and starting values of its parameters, any parameter change segments
+    animating them, and so on. It is passed to the Transcriber when the note ends, and each of the instrument's
+    :class:`~scamp.playback_implementations.PlaybackImplementation` objects can keep its own information about the
+    note in a preallocated slot (see :func:`get_implementation_info`). You would never create one of these directly.
+
+    For backwards compatibility, a NoteState can also be accessed like the dictionary that used to hold this
+    information (e.g. `note_state["flags"]`, or `note_state[playback_implementation]`).
+
+    :ivar clock: the clock on which the note is being played
+    :ivar start_time_stamp: TimeStamp of the start of the note
+    :ivar end_time_stamp: TimeStamp of the end of the note (None while it is still playing)
+    :ivar parameter_start_values: dictionary of the starting values of pitch, volume and any extra parameters
+    :ivar properties: the note's properties
+    :ivar max_volume: the maximum volume the note reaches (needed for MIDI-based playback)
+    :ivar flags: list of strings that act as flags for how the note should be processed
+    :ivar implementation_info: list of the data stored by each playback implementation about this note, indexed by
+        their slot numbers
+    """
+
+    __slots__ = ("clock", "start_time_stamp", "end_time_stamp", "_split_points", "parameter_start_values",
+                 "_parameter_values", "_parameter_change_segments", "_segments_list_lock", "properties",
+                 "max_volume", "flags", "implementation_info")
+
+    _pool = []
+    # stops two threads from both lazily creating a lock for the same note
+    _lock_creation_lock = Lock()
+    # read-only stand-ins for the split points and parameter change segments of notes that have none
+    _no_split_points = ()
+    _no_parameter_change_segments = MappingProxyType({})
+
+    def __init__(self, clock: Clock, parameter_start_values: dict, properties: NotePropertiesDictionary,
+                 max_volume: float, flags: list, num_implementation_slots: int, start_time_stamp: TimeStamp = None):
+        self._reset(clock, parameter_start_values, properties, max_volume, flags, num_implementation_slots,
+                    start_time_stamp)
+
+    def _reset(self, clock, parameter_start_values, properties, max_volume, flags, num_implementation_slots,
+               start_time_stamp=None):
+        self.clock = clock
+        self.start_time_stamp = TimeStamp(clock) if start_time_stamp is None else start_time_stamp
+        self.end_time_stamp = None
+        self._split_points = None
+        self.parameter_start_values = parameter_start_values
+        # starts out as the very same dictionary as parameter_start_values, and is only copied on the first change
+        self._parameter_values = parameter_start_values
+        self._parameter_change_segments = None
+        self._segments_list_lock = None
+        self.properties = properties
+        self.max_volume = max_volume
+        self.flags = flags
+        self.implementation_info = [None] * num_implementation_slots
+
+    @classmethod
+    def acquire(cls, clock: Clock, parameter_start_values: dict, properties: NotePropertiesDictionary,
+                max_volume: float, flags: list, num_implementation_slots: int,
+                start_time_stamp: TimeStamp = None) -> 'NoteState':
+        """
+        Returns a NoteState with the given values, recycling one from the pool if there's one available.
+        (See :func:`release`.) If no start_time_stamp is given, the note starts at the current time on the clock.
+        """
+        try:
+            note_state = cls._pool.pop()
+        except IndexError:
+            return cls(clock, parameter_start_values, properties, max_volume, flags, num_implementation_slots,
+                       start_time_stamp)
+        note_state._reset(clock, parameter_start_values, properties, max_volume, flags, num_implementation_slots,
+                          start_time_stamp)
+        return note_state
+
+    def release(self) -> None:
+        """
+        Returns this NoteState to the pool for reuse, as long as the pool has fewer than
+        `playback_settings.note_state_pool_size` NoteStates in it. This must only be called once nothing holds on to
+        the NoteState any more.
+        """
+        if len(NoteState._pool) < playback_settings.note_state_pool_size:
+            # drop references, so that the pool doesn't keep clocks, properties, etc. alive
+            self.clock = self.start_time_stamp = self.end_time_stamp = self._split_points = \
+                self.parameter_start_values = self._parameter_values = self._parameter_change_segments = \
+                self.properties = self.flags = self.implementation_info = None
+            self._segments_list_lock = None
+            NoteState._pool.append(self)
+
+    @property
+    def split_points(self) -> Sequence[TimeStamp]:
+        """TimeStamps of any points at which the note has been split."""
+        return self._split_points if self._split_points is not None else NoteState._no_split_points
+
+    def add_split_point(self, time_stamp: TimeStamp) -> None:
+        """
+        Records a point at which the note is split.
+
+        :param time_stamp: TimeStamp of the split point
+        """
+        if self._split_points is None:
+            self._split_points = []
+        self._split_points.append(time_stamp)
+
+    @property
+    def parameter_values(self) -> dict:
+        """Dictionary of the current values of pitch, volume and any extra parameters. (Read-only; see
+        :func:`set_parameter_value`.)"""
+        return self._parameter_values
+
+    def set_parameter_value(self, param_name: str, value: float) -> None:
+        """
+        Records the current value of a parameter.
+
+        :param param_name: name of the parameter
+        :param value: its new value
+        """
+        if self._parameter_values is self.parameter_start_values:
+            self._parameter_values = dict(self.parameter_start_values)
+        self._parameter_values[param_name] = value
+
+    @property
+    def parameter_change_segments(self) -> dict:
+        """Dictionary mapping parameter names to the list of segments that have animated them. (Read-only; see
+        :func:`get_parameter_change_segments_list`.)"""
+        return self._parameter_change_segments if self._parameter_change_segments is not None \
+            else NoteState._no_parameter_change_segments
+
+    def get_parameter_change_segments_list(self, param_name: str) -> list:
+        """
+        Gets the list of segments animating the given parameter, creating it if necessary.
+
+        :param param_name: name of the parameter
+        """
+        if self._parameter_change_segments is None:
+            self._parameter_change_segments = {}
+        if param_name not in self._parameter_change_segments:
+            self._parameter_change_segments[param_name] = []
+        return self._parameter_change_segments[param_name]
+
+    @property
+    def segments_list_lock(self) -> Lock:
+        """Lock guarding the lists of parameter change segments; only created when first needed."""
+        if self._segments_list_lock is None:
+            with NoteState._lock_creation_lock:
+                if self._segments_list_lock is None:
+                    self._segments_list_lock = Lock()
+        return self._segments_list_lock
+
+    def get_implementation_info(self, playback_implementation: 'PlaybackImplementation'):
+        """
+        Gets the information stored about this note by the given playback implementation.
+
+        :param playback_implementation: the playback implementation
+        :return: whatever that playback implementation stored, or None if it never stored anything (e.g. because
+            the note is silent, or started before the playback implementation was added)
+        """
+        slot = playback_implementation._note_state_slot
+        return self.implementation_info[slot] if slot is not None and slot < len(self.implementation_info) else None
+
+    def set_implementation_info(self, playback_implementation: 'PlaybackImplementation', info) -> None:
+        """
+        Stores information about this note on behalf of the given playback implementation, in its own slot.
+
+        :param playback_implementation: the playback implementation
+        :param info: the information to store
+        """
+        slot = playback_implementation._note_state_slot
+        if slot >= len(self.implementation_info):
+            self.implementation_info.extend([None] * (slot + 1 - len(self.implementation_info)))
+        self.implementation_info[slot] = info
+
+    # ------------------------------ Dictionary-style access, for backwards compatibility ------------------------------
+
+    _dictionary_keys = ("clock", "start_time_stamp", "end_time_stamp", "split_points", "parameter_start_values",
+                        "parameter_values", "parameter_change_segments", "segments_list_lock", "properties",
+                        "max_volume", "flags")
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key not in NoteState._dictionary_keys:
+                raise KeyError(key)
+            if key == "split_points" and self._split_points is None:
+                # the caller may want to append to it
+                self._split_points = []
+            elif key == "parameter_values" and self._parameter_values is self.parameter_start_values:
+                # the caller may want to change values, so it needs its own copy
+                self._parameter_values = dict(self.parameter_start_values)
+            elif key == "parameter_change_segments" and self._parameter_change_segments is None:
+                self._parameter_change_segments = {}
+            return getattr(self, key)
+        info = self.get_implementation_info(key)
+        if info is None:
+            raise KeyError(key)
+        return info
+
+    def __setitem__(self, key, value):
+        if isinstance(key, str):
+            if key not in NoteState._dictionary_keys:
+                raise KeyError(key)
+            setattr(self, "_" + key if key in ("split_points", "parameter_values", "parameter_change_segments",
+                                               "segments_list_lock") else key, value)
+        else:
+            self.set_implementation_info(key, value)
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return key in NoteState._dictionary_keys
+        return self.get_implementation_info(key) is not None
+
+    def __repr__(self):
+        return "NoteState(start_time_stamp={}, parameter_values={}, flags={})".format(
+            self.start_time_stamp, self._parameter_values, self.flags
+        )
+
+
 class NoteHandle:
     """
     This handle, which is returned by instrument.start_note, allows us to manipulate the note that we have started,
@@ -1323,7 +1967,8 @@ class ChordHandle:
     """
     This handle, returned by instrument.start_chord, allows us to manipulate a chord that we have started,
     (i.e. by changing pitch, volume, or another other parameter, or by ending the note). You would never create
-    one of these directly.
+    one of these directly. Changes made through the handle are applied to all the notes of the chord together, by a
+    single clock process.
 
     :param note_handles: the handles of the notes that make up this chord
     :param intervals: the original pitch intervals between the chord tones
@@ -1332,6 +1977,7 @@ class ChordHandle:
     def __init__(self, note_handles: Sequence[NoteHandle], intervals: Sequence[float]):
         self.note_handles = tuple(note_handles) if not isinstance(note_handles, tuple) else note_handles
         self._intervals = tuple(intervals) if not isinstance(intervals, tuple) else intervals
+        self._note_ids = tuple(note_handle.note_id for note_handle in self.note_handles)
 
     def change_parameter(self, param_name: str, target_value_or_values: Union[float, Sequence],
                          transition_length_or_lengths: Union[float, Sequence] = 0,
@@ -1353,9 +1999,11 @@ class ChordHandle:
         :param clock: The clock with which to interpret the transition timings. The default value of "from_note", which
             you likely don't want to change, carries out the timings on the clock on which the note was started.
         """
-        for note_handle in self.note_handles:
-            note_handle.change_parameter(param_name, target_value_or_values, transition_length_or_lengths,
-                                         transition_curve_shape_or_shapes, clock)
+        if len(self.note_handles) > 0:
+            self.note_handles[0].instrument._change_notes_parameter(
+                self._note_ids, param_name, [target_value_or_values] * len(self.note_handles),
+                transition_length_or_lengths, transition_curve_shape_or_shapes, clock
+            )
 
     def change_pitch(self, target_value_or_values: Union[float, Sequence],
                      transition_length_or_lengths: Union[float, Sequence] = 0,
@@ -1377,11 +2025,14 @@ class ChordHandle:
         :param clock: The clock with which to interpret the transition timings. The default value of "from_note", which
             you likely don't want to change, carries out the timings on the clock on which the note was started.
         """
-        for note_handle, interval in zip(self.note_handles, self._intervals):
-            this_note_pitch_targets = [target_value + interval for target_value in target_value_or_values] \
-                if hasattr(target_value_or_values, "__len__") else target_value_or_values + interval
-            note_handle.change_pitch(this_note_pitch_targets, transition_length_or_lengths,
-                                     transition_curve_shape_or_shapes, clock)
+        if len(self.note_handles) > 0:
+            self.note_handles[0].instrument._change_notes_parameter(
+                self._note_ids, "pitch",
+                [[target_value + interval for target_value in target_value_or_values]
+                 if hasattr(target_value_or_values, "__len__") else target_value_or_values + interval
+                 for interval in self._intervals],
+                transition_length_or_lengths, transition_curve_shape_or_shapes, clock
+            )
 
     def change_volume(self,  target_value_or_values: Union[float, Sequence],
                       transition_length_or_lengths: Union[float, Sequence] = 0,
@@ -1401,23 +2052,22 @@ class ChordHandle:
         :param clock: The clock with which to interpret the transition timings. The default value of "from_note", which
             you likely don't want to change, carries out the timings on the clock on which the note was started.
         """
-        for note_handle in self.note_handles:
-            note_handle.change_volume(target_value_or_values, transition_length_or_lengths,
-                                      transition_curve_shape_or_shapes, clock)
+        self.change_parameter("volume", target_value_or_values, transition_length_or_lengths,
+                              transition_curve_shape_or_shapes, clock)
 
     def split(self) -> None:
         """
         Adds a split point to this chord, causing it later to be rendered as tied pieces.
         """
-        for note_handle in self.note_handles:
-            note_handle.split()
+        if len(self.note_handles) > 0:
+            self.note_handles[0].instrument._split_notes(self._note_ids)
 
     def end(self) -> None:
         """
         Ends all notes in this chord.
         """
-        for note_handle in self.note_handles:
-            note_handle.end()
+        if len(self.note_handles) > 0:
+            self.note_handles[0].instrument._end_notes(self._note_ids)
 
     def __repr__(self):
         return "ChordHandle({}, {})".format(self.note_handles, self._intervals)
@@ -1462,6 +2112,10 @@ class _ParameterChangeSegment(EnvelopeSegment):
         self.call_priority = call_priority
 
         self.temporal_resolution = temporal_resolution
+        # set if this segment gets cut off before reaching its target
+        self.aborted = False
+        # when run together with the segments of other notes (see run_group), the list of all of the segments
+        self._group = None
 
     def run(self, silent=False):
         """
@@ -1472,6 +2126,15 @@ class _ParameterChangeSegment(EnvelopeSegment):
         notate a note but not play it back, as in the case of a note that has been adjusted (where we playback -- but
         don't notate -- the adjusted version, while we run -- but don't play back -- the unadjusted version.)
         """
+        # if the session is being traced, the whole run shows up as a span on the timeline
+        trace = getattr(self.clock.master, "_playback_trace", None)
+        if trace is None:
+            self._run(silent)
+        else:
+            with trace.span("parameter_change", "animation", duration=self.duration, silent=silent):
+                self._run(silent)
+
+    def _run(self, silent):
         self.start_time_stamp = TimeStamp(self.clock)
 
         # if this segment has no duration, no need to do any animation
@@ -1496,14 +2159,10 @@ class _ParameterChangeSegment(EnvelopeSegment):
             return
 
         # determine the time increment, perhaps by calculating a good one for the given parameter
-        if self.temporal_resolution == "pitch-based":
-            time_increment = self._get_good_pitch_bend_temporal_resolution()
-        elif self.temporal_resolution == "volume-based":
-            time_increment = self._get_good_volume_temporal_resolution()
-        else:
-            time_increment = self.temporal_resolution
-        # don't animate faster than 4ms though
-        time_increment = max(0.004, time_increment)
+        # (don't animate faster than 4ms though)
+        time_increment = max(0.004, self._get_time_increment())
+        # if the session is recording metrics, we note down how late each update of the parameter is
+        metrics = getattr(self.clock.master, "_playback_metrics", None)
 
         def _animation_function():
             # does the intermediate changing of values; since it's sleeping in small time increments, we fork it
@@ -1516,9 +2175,12 @@ class _ParameterChangeSegment(EnvelopeSegment):
                 if beats_passed > 0:  # no need to change the parameter the first time, before we had a chance to wait
                     self.do_change_parameter(self.value_at(beats_passed))
                 time.sleep(time_increment)
+                tick_length = time.time() - start
+                if metrics is not None:
+                    metrics.record("animation_tick", tick_length - time_increment)
                 # TODO: Absolute_rate would be great, except that it doesn't update between synchronized clock events
                 # Is there a way of improving this??
-                beats_passed += (time.time() - start) * self.clock.absolute_rate()
+                beats_passed += tick_length * self.clock.absolute_rate()
 
         # start the unsynchronized animation function
         self.clock.fork_unsynchronized(_animation_function)
@@ -1530,11 +2192,91 @@ class _ParameterChangeSegment(EnvelopeSegment):
         self.end_time_stamp = TimeStamp(self.clock)
         self.do_change_parameter(self.end_level)
 
+    @staticmethod
+    def run_group(segments, silent_flags):
+        """
+        Runs several segments of the same duration on the same clock (e.g. changing the same parameter for all the
+        notes of a chord) together. A single synchronized process (this one) and a single unsynchronized animation
+        process drive all of them, and they share their start and end time stamps. Aborting one of the segments leaves
+        the others running; the process is only killed once all of them have been aborted.
+
+        :param segments: list of _ParameterChangeSegments
+        :param silent_flags: for each segment, whether to skip the animation (see run)
+        """
+        if len(segments) == 1:
+            segments[0].run(silent=silent_flags[0])
+            return
+
+        trace = getattr(segments[0].clock.master, "_playback_trace", None)
+        if trace is None:
+            _ParameterChangeSegment._run_group(segments, silent_flags)
+        else:
+            with trace.span("parameter_change_group", "animation", duration=segments[0].duration,
+                            num_segments=len(segments)):
+                _ParameterChangeSegment._run_group(segments, silent_flags)
+
+    @staticmethod
+    def _run_group(segments, silent_flags):
+        clock = segments[0].clock
+        duration = segments[0].duration
+        start_time_stamp = TimeStamp(clock)
+
+        if duration == 0:
+            for segment in segments:
+                segment.start_time_stamp = segment.end_time_stamp = start_time_stamp
+                segment.do_change_parameter(segment.end_level)
+            return
+
+        run_clock = current_clock()
+        for segment in segments:
+            segment.start_time_stamp = start_time_stamp
+            segment._run_clock = run_clock
+            segment._group = segments
+            segment.running = True
+
+        animated_segments = [segment for segment, silent in zip(segments, silent_flags)
+                             if not silent and segment.end_level != segment.start_level]
+
+        if len(animated_segments) > 0:
+            # animate at the rate needed by the segment that needs the finest resolution
+            time_increment = max(0.004, min(segment._get_time_increment() for segment in animated_segments))
+            metrics = getattr(clock.master, "_playback_metrics", None)
+
+            def _animation_function():
+                # like the animation function in run, except that it updates all of the segments each time it wakes up
+                beats_passed = 0
+                while beats_passed < duration and any(segment.running for segment in animated_segments):
+                    start = time.time()
+                    if beats_passed > 0:
+                        for segment in animated_segments:
+                            if segment.running:
+                                segment.do_change_parameter(segment.value_at(beats_passed))
+                    time.sleep(time_increment)
+                    tick_length = time.time() - start
+                    if metrics is not None:
+                        metrics.record("animation_tick", tick_length - time_increment)
+                    beats_passed += tick_length * clock.absolute_rate()
+
+            clock.fork_unsynchronized(_animation_function)
+
+        wait(duration)
+
+        end_time_stamp = TimeStamp(clock)
+        for segment in segments:
+            # any segments that were aborted along the way have already been finished off
+            if segment.running:
+                segment.running = False
+                segment.end_time_stamp = end_time_stamp
+                segment.do_change_parameter(segment.end_level)
+
     def abort_if_running(self):
         if self.running:
             # if we were running, we save the time stamp at which we aborted as the end time stamp
             self.end_time_stamp = TimeStamp(self.clock)
-            self._run_clock.kill()  # kill the clock doing the "run" function
+            self.aborted = True
+            # kill the clock doing the "run" function (unless it is still driving other segments in a group)
+            if self._group is None or not any(segment.running for segment in self._group if segment is not self):
+                self._run_clock.kill()
             # since the units of this envelope are beats in self.clock, see how far we got in the envelope by
             # subtracting converting the start and end time stamps to those beats and subtracting
             how_far_we_got = self.end_time_stamp.beat_in_clock(self.clock) - \
@@ -1557,6 +2299,17 @@ class _ParameterChangeSegment(EnvelopeSegment):
         # it's not running, but because it finished, not because it never started
         return not self.running and self.end_time_stamp is not None
 
+    def _get_time_increment(self):
+        """
+        Returns the time increment with which to animate this segment, based on its temporal_resolution
+        """
+        if self.temporal_resolution == "pitch-based":
+            return self._get_good_pitch_bend_temporal_resolution()
+        elif self.temporal_resolution == "volume-based":
+            return self._get_good_volume_temporal_resolution()
+        else:
+            return self.temporal_resolution
+
     def _get_good_pitch_bend_temporal_resolution(self):
         """
         Returns a reasonable temporal resolution, based on this clock's envelope and rate, assuming it's a pitch curve
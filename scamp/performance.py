@@ -27,11 +27,11 @@ from numbers import Real
 from expenvelope import Envelope
 from ._note_properties import NotePropertiesDictionary
 from .settings import engraving_settings
-from .quantization import quantize_performance_part, QuantizationRecord, QuantizationScheme
+from .quantization import quantize_performance_part, requantize_performance_part, QuantizationRecord, \
+    QuantizationScheme
 from .settings import quantization_settings
 from clockblocks import Clock, TempoEnvelope, current_clock
-from .instruments import Ensemble, ScampInstrument
-from .score import Score, StaffGroup
+from . import score as score_module  # (imported this way to avoid a circular import)
 from .utilities import SavesToJSON
 import logging
 from copy import deepcopy
@@ -56,7 +56,6 @@ class PerformanceNote(SavesToJSON):
         a chord, but that this usually happens in the process of quantization when notes that can be merged into
         chords are merged.
     :ivar volume: the volume of the note (float or Envelope)
-    :ivar properties: dictionary of note properties, or string representing those properties
     """
 
     def __init__(self, start_beat: float, length: Union[float, Tuple[float]], pitch: Union[float, Envelope, Sequence],
@@ -70,6 +69,21 @@ class PerformanceNote(SavesToJSON):
         self.properties = properties if isinstance(properties, NotePropertiesDictionary) \
             else NotePropertiesDictionary.from_unknown_format(properties)
 
+    @property
+    def properties(self) -> NotePropertiesDictionary:
+        """
+        Dictionary of note properties. (When a note is transcribed, this may start out as an interned properties
+        dictionary shared with other notes, in which case it is swapped for a copy of its own the first time it is
+        accessed, since the notation process modifies it.)
+        """
+        if self._properties._frozen:
+            self._properties = self._properties.thawed()
+        return self._properties
+
+    @properties.setter
+    def properties(self, value: NotePropertiesDictionary):
+        self._properties = value
+
     def length_sum(self) -> float:
         """
         Total length of this note, adding together any tied segments.
@@ -107,7 +121,7 @@ class PerformanceNote(SavesToJSON):
         else:
             return self.pitch.average_level() if isinstance(self.pitch, Envelope) else self.pitch
 
-    def play(self, instrument: ScampInstrument, clock: Clock = None, blocking: bool = True) -> None:
+    def play(self, instrument: 'ScampInstrument', clock: Clock = None, blocking: bool = True) -> None:
         """
         Play this note with the given instrument on the given clock
 
@@ -363,7 +377,7 @@ class PerformancePart(SavesToJSON):
     :ivar voice_quantization_records: dictionary mapping voice names to QuantizationRecords, if this is quantized
     """
 
-    def __init__(self, instrument: ScampInstrument = None, name: str = None, voices: Union[dict, Sequence] = None,
+    def __init__(self, instrument: 'ScampInstrument' = None, name: str = None, voices: Union[dict, Sequence] = None,
                  instrument_id: Tuple[str, int] = None, voice_quantization_records: dict = None,
                  clef_preference: Sequence[Union[str, Tuple[str, Real]]] = None):
         self.instrument = instrument  # A ScampInstrument instance
@@ -410,6 +424,9 @@ class PerformancePart(SavesToJSON):
 
         # a record of the quantization that was applied to this part, if any
         self.voice_quantization_records = voice_quantization_records
+        # a running log of the (start beat, end beat) ranges in which notes have been added or changed. A Score built
+        # from this part remembers how far along this log it got, so that it can update only the measures affected.
+        self._dirty_beat_ranges = []
 
     def add_note(self, note: PerformanceNote, voice: str = None) -> PerformanceNote:
         """
@@ -448,8 +465,34 @@ class PerformancePart(SavesToJSON):
             # always keep self.notes sorted; if we're appending something that shouldn't be at the
             # very end, we'll need to sort the list after appending. This probably doesn't come up much.
             voice.sort()  # they are defined to sort by start_beat
+        self._dirty_beat_ranges.append((note.start_beat, note.end_beat))
         return note
 
+    def remove_note(self, note: PerformanceNote) -> None:
+        """
+        Remove the given PerformanceNote from this PerformancePart.
+
+        :param note: the note to remove
+        """
+        for voice in self.voices.values():
+            for i, voice_note in enumerate(voice):
+                if voice_note is note:
+                    voice.pop(i)
+                    self._dirty_beat_ranges.append((note.start_beat, note.end_beat))
+                    return
+        raise ValueError("Note not found in PerformancePart.")
+
+    def mark_dirty(self, start_beat: float = 0, end_beat: float = None) -> None:
+        """
+        Flag a range of beats as having been edited, so that :func:`~scamp.score.Score.update_from_performance`
+        knows to regenerate the measures it touches. Adding or removing notes flags them automatically, but if a note
+        is altered in place, this should be called for the range it occupied both before and after the change.
+
+        :param start_beat: beat at which the edited range starts
+        :param end_beat: beat at which the edited range ends (None flags everything from start_beat onwards)
+        """
+        self._dirty_beat_ranges.append((start_beat, float("inf") if end_beat is None else end_beat))
+
     def new_note(self, start_beat: float, length, pitch, volume, properties: dict) -> PerformanceNote:
         """
         Construct and add a new PerformanceNote to this Performance
@@ -463,7 +506,7 @@ class PerformancePart(SavesToJSON):
         """
         return self.add_note(PerformanceNote(start_beat, length, pitch, volume, properties))
 
-    def set_instrument(self, instrument: ScampInstrument) -> None:
+    def set_instrument(self, instrument: 'ScampInstrument') -> None:
         """
         Set the instrument with which this PerformancePart will play back by default
 
@@ -505,7 +548,7 @@ class PerformancePart(SavesToJSON):
 
         return iterator()
 
-    def play(self, start_beat: float = 0, stop_beat: float = None, instrument: ScampInstrument = None,
+    def play(self, start_beat: float = 0, stop_beat: float = None, instrument: 'ScampInstrument' = None,
              clock: Clock = None, blocking: bool = True, tempo_envelope: TempoEnvelope = None,
              selected_voices: Sequence[str] = None,
              note_filter: Callable[[PerformanceNote], PerformanceNote] = None) -> Clock:
@@ -525,7 +568,7 @@ class PerformancePart(SavesToJSON):
         :return: the Clock on which playback takes place
         """
         instrument = self.instrument if instrument is None else instrument
-        from scamp.instruments import ScampInstrument
+        from .instruments import ScampInstrument
         if not isinstance(instrument, ScampInstrument):
             raise ValueError("PerformancePart does not have a valid instrument and cannot play.")
         clock = Clock(instrument.name + " clock", pool_size=20) if clock is None else clock
@@ -574,7 +617,7 @@ class PerformancePart(SavesToJSON):
                 sub_clock.tempo_envelope.append_envelope(tempo_envelope)
             return sub_clock
 
-    def set_instrument_from_ensemble(self, ensemble: Ensemble) -> 'PerformancePart':
+    def set_instrument_from_ensemble(self, ensemble: 'Ensemble') -> 'PerformancePart':
         """
         Set the default instrument to play back with based on the best fit in the given ensembel
 
@@ -630,6 +673,17 @@ class PerformancePart(SavesToJSON):
                                   termination_weighting=termination_weighting)
         return copy
 
+    def _quantized_incrementally(self, quantization_scheme: QuantizationScheme, voice_cache: dict,
+                                 dirty_beat_ranges: Sequence[Tuple[float, float]] = ()) -> 'PerformancePart':
+        """
+        Like quantized, except that only the dirty_beat_ranges get re-quantized, with the rest of the result spliced
+        in from voice_cache (see :func:`~scamp.quantization.requantize_performance_part`).
+        """
+        copy = PerformancePart(instrument=self.instrument, name=self.name,
+                               voices={voice_name: [] for voice_name in self.voices}, instrument_id=self._instrument_id)
+        requantize_performance_part(self, copy, quantization_scheme, voice_cache, dirty_beat_ranges)
+        return copy
+
     def is_quantized(self) -> bool:
         """
         Checks if this part has been quantized
@@ -668,7 +722,7 @@ class PerformancePart(SavesToJSON):
         return 0 if longest_quantization_record is None else \
             len(self._get_longest_quantization_record().quantized_measures)
 
-    def to_staff_group(self) -> StaffGroup:
+    def to_staff_group(self) -> 'score_module.StaffGroup':
         """
         Converts this PerformancePart to a StaffGroup object.
         (Quantizes in a default way, if necessary, but it should be quantized already.)
@@ -680,7 +734,7 @@ class PerformancePart(SavesToJSON):
                             "quantizing according to default quantization time_signature")
             quantization_scheme = QuantizationScheme.from_time_signature(quantization_settings.default_time_signature)
             return self.quantized(quantization_scheme).to_staff_group()
-        return StaffGroup.from_quantized_performance_part(self)
+        return score_module.StaffGroup.from_quantized_performance_part(self)
 
     def name_count(self) -> int:
         """
@@ -734,8 +788,15 @@ class Performance(SavesToJSON):
         self.parts = [] if parts is None else parts
         self.tempo_envelope = TempoEnvelope() if tempo_envelope is None else tempo_envelope
         assert isinstance(self.parts, list) and all(isinstance(x, PerformancePart) for x in self.parts)
+        # index from id(instrument) to (position, part) pairs for the parts with that instrument, so that transcribing
+        # a note doesn't involve searching through every part. It's kept up to date by new_part/add_part, and rebuilt
+        # if the parts list is replaced or changes length, or if an entry found in it turns out to be out of date (the
+        # part at that position has been replaced, or its instrument changed), or if nothing is found in it.
+        self._parts_by_instrument = {}
+        self._indexed_parts = None
+        self._indexed_part_count = 0
 
-    def new_part(self, instrument: ScampInstrument = None) -> PerformancePart:
+    def new_part(self, instrument: 'ScampInstrument' = None) -> PerformancePart:
         """
         Construct and add a new PerformancePart to this Performance
 
@@ -743,7 +804,7 @@ class Performance(SavesToJSON):
         :return: the newly constructed part
         """
         new_part = PerformancePart(instrument)
-        self.parts.append(new_part)
+        self.add_part(new_part)
         return new_part
 
     def add_part(self, part: PerformancePart) -> None:
@@ -752,7 +813,25 @@ class Performance(SavesToJSON):
 
         :param part: a PerformancePart to add
         """
+        index_was_current = self._part_index_is_current()
         self.parts.append(part)
+        if index_was_current:
+            self._parts_by_instrument.setdefault(id(part.instrument), []).append((len(self.parts) - 1, part))
+            self._indexed_part_count += 1
+
+    def _part_index_is_current(self) -> bool:
+        return self._indexed_parts is self.parts and self._indexed_part_count == len(self.parts)
+
+    def _rebuild_part_index(self) -> None:
+        self._parts_by_instrument = {}
+        for position, part in enumerate(self.parts):
+            self._parts_by_instrument.setdefault(id(part.instrument), []).append((position, part))
+        self._indexed_parts = self.parts
+        self._indexed_part_count = len(self.parts)
+
+    def _part_index_entries_are_valid(self, entries, instrument) -> bool:
+        return len(entries) > 0 and all(self.parts[position] is part and part.instrument is instrument
+                                        for position, part in entries)
 
     def get_part_by_index(self, index: int) -> PerformancePart:
         """
@@ -773,14 +852,21 @@ class Performance(SavesToJSON):
         """
         return [x for x in self.parts if x.name == name]
 
-    def get_parts_by_instrument(self, instrument: ScampInstrument) -> Sequence[PerformancePart]:
+    def get_parts_by_instrument(self, instrument: 'ScampInstrument') -> Sequence[PerformancePart]:
         """
         Get all parts with the given instrument
 
         :param instrument: the instrument to search for
         :return: a list of parts with this instrument
         """
-        return [x for x in self.parts if x.instrument == instrument]
+        if not self._part_index_is_current():
+            self._rebuild_part_index()
+        entries = self._parts_by_instrument.get(id(instrument), ())
+        if not self._part_index_entries_are_valid(entries, instrument):
+            # either the index is out of date, or there really is no such part; rebuilding it tells us which
+            self._rebuild_part_index()
+            entries = self._parts_by_instrument.get(id(instrument), ())
+        return [part for position, part in entries]
 
     @property
     def end_beat(self) -> float:
@@ -895,7 +981,7 @@ class Performance(SavesToJSON):
         self.apply_note_filter(_note_filter, start_beat, stop_beat, selected_voices)
         return self
 
-    def play(self, start_beat: float = 0, stop_beat: float = None, ensemble: Ensemble = "auto",
+    def play(self, start_beat: float = 0, stop_beat: float = None, ensemble: 'Ensemble' = "auto",
              clock: Clock = "auto", blocking: bool = True, tempo_envelope: TempoEnvelope = "auto",
              note_filter: Callable[[PerformanceNote], PerformanceNote] = None) -> Clock:
         """
@@ -915,6 +1001,7 @@ class Performance(SavesToJSON):
 
         :return: the clock on which this performance is playing back
         """
+        from .instruments import Ensemble
         if clock == "auto":
             clock = current_clock()
         if ensemble == "auto":
@@ -953,7 +1040,7 @@ class Performance(SavesToJSON):
         else:
             return clock.fork(_performance_playback)
 
-    def set_instruments_from_ensemble(self, ensemble: Ensemble, override: bool = True) -> 'Performance':
+    def set_instruments_from_ensemble(self, ensemble: 'Ensemble', override: bool = True) -> 'Performance':
         """
         Set the playback instruments for each part in this Performance by their best match in the ensemble given.
         If override is False, only set the instrument for parts that don't already have one set.
@@ -1034,7 +1121,7 @@ class Performance(SavesToJSON):
     def to_score(self, quantization_scheme: QuantizationScheme = None, time_signature: Union[str, Sequence] = None,
                  bar_line_locations: Sequence[float] = None, max_divisor: int = None,
                  max_divisor_indigestibility: int = None, simplicity_preference: float = None, title: str = "default",
-                 composer: str = "default") -> Score:
+                 composer: str = "default") -> 'score_module.Score':
         """
         Convert this Performance (list of note events in continuous time and pitch) to a Score object, which represents
         the music in traditional western notation. In the process, the music must be quantized, for which two different
@@ -1067,7 +1154,7 @@ class Performance(SavesToJSON):
         :param composer: Composer of the piece to be printed on the score.
         :return: the resulting Score object, which can then be rendered either as XML or LilyPond
         """
-        return Score.from_performance(
+        return score_module.Score.from_performance(
             self, quantization_scheme, time_signature=time_signature, bar_line_locations=bar_line_locations,
             max_divisor=max_divisor, max_divisor_indigestibility=max_divisor_indigestibility,
             simplicity_preference=simplicity_preference, title=title, composer=composer
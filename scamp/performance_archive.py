@@ -0,0 +1,243 @@
+"""
+Module containing the :class:`PerformanceArchive` class, which stores the notes of a
+:class:`~scamp.performance.Performance` on disk, split into time segments. This allows a transcription to run for hours
+or days (see the `spill_directory` argument of :func:`~scamp.transcriber.Transcriber.start_transcribing`) without the
+Performance growing in memory, and allows any window of time to be read back without loading the rest.
+"""
+
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+#  SCAMP (Suite for Computer-Assisted Music in Python)                                           #
+#  Copyright © 2020 Marc Evanstein <marc@marcevanstein.com>.                                     #
+#                                                                                                #
+#  This program is free software: you can redistribute it and/or modify it under the terms of    #
+#  the GNU General Public License as published by the Free Software Foundation, either version   #
+#  3 of the License, or (at your option) any later version.                                      #
+#                                                                                                #
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;     #
+#  without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#  See the GNU General Public License for more details.                                          #
+#                                                                                                #
+#  You should have received a copy of the GNU General Public License along with this program.    #
+#  If not, see <http://www.gnu.org/licenses/>.                                                   #
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+
+from .performance import Performance, PerformancePart
+from .utilities import SavesToJSON
+from clockblocks import TempoEnvelope
+from queue import Queue
+import threading
+import logging
+import json
+import math
+import os
+
+
+class PerformanceArchive:
+    """
+    An append-only, on-disk store for the notes of a :class:`~scamp.performance.Performance`. Notes are grouped into
+    segments by their start beat, each segment being a file with one JSON-encoded note per line, and an index file
+    keeps track of the parts, the segments and the range of beats that each segment covers.
+
+    Appends can be carried out in the background (see :func:`append`), so that a thread doing playback is not held
+    up by the disk; reading from the archive (or calling :func:`flush`) waits for any pending writes first.
+
+    :param directory: the directory in which to keep the archive. It is created if it doesn't exist; if it already
+        contains an archive, that archive is opened and appended to.
+    :param segment_length: the length, in beats, of the time span covered by each segment file. (Ignored when opening
+        an existing archive.)
+    :ivar directory: the directory in which the archive is kept
+    :ivar segment_length: the length, in beats, of the time span covered by each segment file
+    """
+
+    _index_file_name = "index.json"
+    _segment_file_name = "segment_{}.jsonl"
+
+    def __init__(self, directory: str, segment_length: float = 60.0):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        index_path = os.path.join(directory, PerformanceArchive._index_file_name)
+        if os.path.exists(index_path):
+            with open(index_path, "r") as index_file:
+                index = json.load(index_file, object_hook=SavesToJSON._decoder_object_hook)
+            self.segment_length = index["segment_length"]
+            self._parts = index["parts"]
+            self._segments = {int(key): value for key, value in index["segments"].items()}
+            self._tempo_envelope = None if index["tempo_envelope"] is None \
+                else TempoEnvelope.from_levels_and_durations(units="beatlength", **index["tempo_envelope"])
+        else:
+            self.segment_length = segment_length
+            # json-friendly records of the name, instrument_id and clef_preference of each part
+            self._parts = []
+            # maps segment number to a dictionary of the min start beat, max end beat and number of notes it contains
+            self._segments = {}
+            self._tempo_envelope = None
+            self._save_index()
+        # guards the index, which may be updated by the background writer thread
+        self._index_lock = threading.RLock()
+        # queue of pending background writes, and the thread that carries them out (both created when first needed)
+        self._write_queue = None
+        self._writer_thread = None
+
+    @property
+    def num_notes(self) -> int:
+        """Total number of notes stored in this archive (including those waiting to be written in the background)."""
+        self.flush()
+        return sum(segment["num_notes"] for segment in self._segments.values())
+
+    @property
+    def end_beat(self) -> float:
+        """The beat at which the last note stored in this archive ends."""
+        self.flush()
+        return max((segment["end_beat"] for segment in self._segments.values()), default=0)
+
+    def is_empty(self) -> bool:
+        """Whether this archive has no parts or notes stored in it."""
+        self.flush()
+        return len(self._parts) == 0 and len(self._segments) == 0
+
+    def append(self, performance: Performance, remove_from_performance: bool = True,
+               in_background: bool = False) -> int:
+        """
+        Writes all the notes in the given performance to the archive. The parts of the performance are matched up by
+        index with the parts already in the archive, so this should be called repeatedly with the same Performance (or
+        at least with Performances that have the same list of parts).
+
+        :param performance: the Performance whose notes to write
+        :param remove_from_performance: if True, the notes are removed from the performance once they are written, so
+            that it only ever holds the notes that have not yet been archived
+        :param in_background: if True, the notes are only gathered up here (and, if remove_from_performance is True,
+            removed from the performance right away), while encoding them and writing them to disk happens on a
+            separate thread. Use :func:`flush` to wait for the write to finish.
+        :return: the number of notes written (or queued up to be written)
+        """
+        part_records = []
+        notes = []
+        for part_index, part in enumerate(performance.parts):
+            part_records.append({"name": part.name, "instrument_id": part._instrument_id,
+                                 "clef_preference": part.clef_preference})
+            for voice_name, voice in part.voices.items():
+                notes.extend((part_index, voice_name, note) for note in voice)
+            if remove_from_performance:
+                part.voices = {voice_name: [] for voice_name in part.voices}
+                part._dirty_beat_ranges = []
+
+        if in_background:
+            if self._write_queue is None:
+                self._write_queue = Queue()
+                self._writer_thread = threading.Thread(target=self._run_writer, daemon=True,
+                                                       name="SCAMP_ARCHIVE_WRITER")
+                self._writer_thread.start()
+            self._write_queue.put((part_records, notes))
+        else:
+            # don't jump ahead of any writes that are still pending
+            self.flush()
+            self._write_notes(part_records, notes)
+        return len(notes)
+
+    def flush(self) -> None:
+        """
+        Waits until all of the appends carried out in the background have been written to disk.
+        """
+        if self._write_queue is not None and self._writer_thread is not threading.current_thread():
+            self._write_queue.join()
+
+    def _run_writer(self):
+        while True:
+            part_records, notes = self._write_queue.get()
+            try:
+                self._write_notes(part_records, notes)
+            except Exception as e:
+                logging.exception(e)
+            finally:
+                self._write_queue.task_done()
+
+    def _write_notes(self, part_records, notes):
+        lines_by_segment = {}
+        with self._index_lock:
+            self._parts.extend(part_records[len(self._parts):])
+            for part_index, voice_name, note in notes:
+                segment_number = int(math.floor(note.start_beat / self.segment_length))
+                if segment_number not in lines_by_segment:
+                    lines_by_segment[segment_number] = []
+                lines_by_segment[segment_number].append(
+                    json.dumps([part_index, voice_name, note], default=SavesToJSON._encoder_default)
+                )
+                self._expand_segment(segment_number, note.start_beat, note.end_beat)
+
+            for segment_number, lines in lines_by_segment.items():
+                with open(self._get_segment_path(segment_number), "a") as segment_file:
+                    segment_file.write("\n".join(lines) + "\n")
+            self._save_index()
+
+    def set_tempo_envelope(self, tempo_envelope: TempoEnvelope) -> None:
+        """
+        Stores the tempo envelope to use for Performances loaded from this archive.
+
+        :param tempo_envelope: the tempo envelope
+        """
+        self.flush()
+        with self._index_lock:
+            self._tempo_envelope = tempo_envelope
+            self._save_index()
+
+    def load(self, start_beat: float = 0, end_beat: float = None) -> Performance:
+        """
+        Reads back the notes that sound during the given window of beats as a Performance. Only the segment files that
+        could contain such notes are read. Notes keep their original start beats.
+
+        :param start_beat: the beginning of the window
+        :param end_beat: the end of the window (defaults to the end of the archive)
+        :return: a Performance containing every note that overlaps the window
+        """
+        self.flush()
+        end_beat = float("inf") if end_beat is None else end_beat
+        performance = Performance(
+            parts=[PerformancePart(**part_record) for part_record in self._parts],
+            tempo_envelope=self._tempo_envelope
+        )
+        for segment_number in sorted(self._segments):
+            segment = self._segments[segment_number]
+            if segment["start_beat"] >= end_beat or segment["end_beat"] <= start_beat:
+                continue
+            with open(self._get_segment_path(segment_number), "r") as segment_file:
+                for line in segment_file:
+                    if len(line.strip()) == 0:
+                        continue
+                    part_index, voice_name, note = json.loads(line, object_hook=SavesToJSON._decoder_object_hook)
+                    # a zero-length window still picks up the notes starting right at it
+                    if note.start_beat < end_beat and (note.end_beat > start_beat or note.start_beat == start_beat):
+                        performance.parts[part_index].add_note(note, voice_name)
+        return performance
+
+    def _expand_segment(self, segment_number, note_start_beat, note_end_beat):
+        if segment_number not in self._segments:
+            self._segments[segment_number] = {"start_beat": note_start_beat, "end_beat": note_end_beat,
+                                              "num_notes": 0}
+        segment = self._segments[segment_number]
+        segment["start_beat"] = min(segment["start_beat"], note_start_beat)
+        segment["end_beat"] = max(segment["end_beat"], note_end_beat)
+        segment["num_notes"] += 1
+
+    def _get_segment_path(self, segment_number):
+        return os.path.join(self.directory, PerformanceArchive._segment_file_name.format(segment_number))
+
+    def _save_index(self):
+        index_path = os.path.join(self.directory, PerformanceArchive._index_file_name)
+        # write to a temporary file and then swap it in, so that a crash never leaves a half-written index
+        with open(index_path + ".tmp", "w") as index_file:
+            json.dump({
+                "segment_length": self.segment_length,
+                "parts": self._parts,
+                "segments": self._segments,
+                # a TempoEnvelope does not survive being saved as JSON, so it is stored as its levels (which are beat
+                # lengths), durations and curve shapes, and rebuilt from those when the archive is reopened
+                "tempo_envelope": None if self._tempo_envelope is None else {
+                    "levels": list(self._tempo_envelope.levels),
+                    "durations": list(self._tempo_envelope.durations),
+                    "curve_shapes": list(self._tempo_envelope.curve_shapes)
+                },
+            }, index_file, default=SavesToJSON._encoder_default, sort_keys=True, indent=4)
+        os.replace(index_path + ".tmp", index_path)
+
+    def __repr__(self):
+        return "PerformanceArchive('{}', segment_length={})".format(self.directory, self.segment_length)
@@ -22,10 +22,28 @@ Module containing classes for defining adjustments to the playback of note param
 from .utilities import SavesToJSON
 from ._engraving_translations import articulation_to_xml_element_name, notehead_name_to_xml_type, \
     notations_to_xml_notations_element
-from typing import Union
+from typing import Union, Sequence
 from collections import UserDict
 
 
+# incremented whenever a playback adjustment, or the assignment of adjustments to notations, changes, so that any
+# compiled (fused) adjustments derived from them know to recompile (see NotePropertiesDictionary)
+_adjustments_version = 0
+
+
+def _adjustments_changed():
+    global _adjustments_version
+    _adjustments_version += 1
+
+
+def get_adjustments_version() -> int:
+    """
+    Returns a counter that increases every time any playback adjustment (or the adjustment assigned to any notation
+    in a :class:`PlaybackAdjustmentsDictionary`) is altered.
+    """
+    return _adjustments_version
+
+
 def _split_string_at_outer_spaces(s):
     """
     Splits a string only at those commas that are not inside some sort of parentheses
@@ -71,6 +89,11 @@ class ParamPlaybackAdjustment(SavesToJSON):
         self.multiply = multiply
         self.add = add
 
+    def __setattr__(self, name, value):
+        if name in self.__dict__:
+            _adjustments_changed()
+        super().__setattr__(name, value)
+
     @classmethod
     def from_string(cls, string: str) -> 'ParamPlaybackAdjustment':
         """
@@ -144,6 +167,22 @@ class ParamPlaybackAdjustment(SavesToJSON):
         # you would end up trying to add two Envelopes, which we don't allow
         return self.add if self.multiply == 0 else param_value * self.multiply + self.add
 
+    def then(self, other: 'ParamPlaybackAdjustment') -> 'ParamPlaybackAdjustment':
+        """
+        Composes this adjustment with another one, returning a single adjustment that has the same effect as applying
+        this adjustment and then the other.
+
+        :param other: the adjustment to apply second
+        :return: a new, combined ParamPlaybackAdjustment
+        """
+        if other.multiply == 0:
+            # the second adjustment sets the value outright, so the first makes no difference
+            return ParamPlaybackAdjustment(0, other.add)
+        elif self.multiply == 0:
+            return ParamPlaybackAdjustment(0, self.add * other.multiply + other.add)
+        else:
+            return ParamPlaybackAdjustment(self.multiply * other.multiply, self.add * other.multiply + other.add)
+
     def _to_dict(self):
         return self.__dict__
 
@@ -175,6 +214,28 @@ class NotePlaybackAdjustment(SavesToJSON):
         self.volume_adjustment: ParamPlaybackAdjustment = volume_adjustment
         self.length_adjustment: ParamPlaybackAdjustment = length_adjustment
 
+    def __setattr__(self, name, value):
+        if name in self.__dict__:
+            _adjustments_changed()
+        super().__setattr__(name, value)
+
+    @classmethod
+    def compose(cls, adjustments: Sequence['NotePlaybackAdjustment']) -> 'NotePlaybackAdjustment':
+        """
+        Fuses a sequence of adjustments into a single adjustment that has the same effect as applying each of them in
+        turn, so that each parameter only gets a single multiply and add.
+
+        :param adjustments: the adjustments to combine, in the order they would be applied
+        :return: a new, combined NotePlaybackAdjustment
+        """
+        fused = [None, None, None]
+        for adjustment in adjustments:
+            for i, param_adjustment in enumerate((adjustment.pitch_adjustment, adjustment.volume_adjustment,
+                                                  adjustment.length_adjustment)):
+                if param_adjustment is not None:
+                    fused[i] = param_adjustment if fused[i] is None else fused[i].then(param_adjustment)
+        return cls(*fused)
+
     @classmethod
     def from_string(cls, string: str) -> 'NotePlaybackAdjustment':
         """
@@ -296,6 +357,25 @@ class NotePlaybackAdjustment(SavesToJSON):
         )
 
 
+class _AdjustmentsCategoryDictionary(dict):
+    """
+    Dictionary mapping the notations in one category (e.g. articulations) to adjustments, which lets compiled
+    adjustments know when it has been changed.
+    """
+
+    def __setitem__(self, key, value):
+        _adjustments_changed()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        _adjustments_changed()
+        super().__delitem__(key)
+
+    def update(self, *args, **kwargs):
+        _adjustments_changed()
+        super().update(*args, **kwargs)
+
+
 class PlaybackAdjustmentsDictionary(UserDict, SavesToJSON):
 
     """
@@ -339,7 +419,13 @@ class PlaybackAdjustmentsDictionary(UserDict, SavesToJSON):
             notations = {x: notations[x] if x in notations else None
                          for x in PlaybackAdjustmentsDictionary.all_notations}
 
-        super().__init__(articulations=articulations, noteheads=noteheads, notations=notations)
+        super().__init__(articulations=_AdjustmentsCategoryDictionary(articulations),
+                         noteheads=_AdjustmentsCategoryDictionary(noteheads),
+                         notations=_AdjustmentsCategoryDictionary(notations))
+
+    def __setitem__(self, key, value):
+        _adjustments_changed()
+        super().__setitem__(key, _AdjustmentsCategoryDictionary(value) if isinstance(value, dict) else value)
 
     @property
     def articulations(self) -> dict:
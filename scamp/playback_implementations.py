@@ -22,19 +22,28 @@ A :class:`~scamp.instruments.ScampInstrument` can have one or more :class:`Playb
 #  If not, see <http://www.gnu.org/licenses/>.                                                   #
 #  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
 
-from ._midi import SimpleRtMidiOut
+from ._midi import SimpleRtMidiOut, streaming_midi_velocity_table, get_pitch_bend_mapping
 from ._soundfont_host import SoundfontHost
-from . import instruments as instruments_module
-from clockblocks import fork_unsynchronized
+from ._output_dispatcher import get_scheduled_time
+from clockblocks import fork_unsynchronized, current_clock
+from collections import namedtuple
+from array import array
+import itertools
+import weakref
+import math
 import time
 from abc import abstractmethod
 import atexit
-from ._dependencies import pythonosc
-from typing import Tuple, Optional
+from ._dependencies import pythonosc, get_default_audio_driver
+from typing import Tuple, Optional, Sequence, TYPE_CHECKING
 import logging
 from .settings import playback_settings
 from .utilities import SavesToJSON, SavesToJSONMeta
 
+if TYPE_CHECKING:
+    # only needed for type hints; importing it at runtime would be circular, since instruments imports this module
+    from . import instruments as instruments_module
+
 
 class _PlaybackImplementationMeta(SavesToJSONMeta):
 
@@ -62,6 +71,9 @@ class PlaybackImplementation(SavesToJSON, metaclass=_PlaybackImplementationMeta)
         self._host_instrument = host_instrument
         # This are set when the host instrument is set
         self._note_info_dict = None
+        # the slot in each of the host instrument's NoteStates where this implementation keeps its info on the note
+        self._note_state_slot = None
+        self._note_state_slot_host = None
 
     def _try_to_bind_host_instrument(self):
         if self._host_instrument is not None:
@@ -80,6 +92,9 @@ class PlaybackImplementation(SavesToJSON, metaclass=_PlaybackImplementationMeta)
         # these get populated when the PlaybackImplementation is registered
         self._host_instrument = host_instrument
         self._note_info_dict = host_instrument._note_info_by_id
+        if self._note_state_slot_host is not host_instrument:
+            self._note_state_slot = host_instrument._allocate_note_state_slot()
+            self._note_state_slot_host = host_instrument
         if self not in host_instrument.playback_implementations:
             host_instrument.playback_implementations.append(self)
         self._initialize_shared_resources()
@@ -93,6 +108,13 @@ class PlaybackImplementation(SavesToJSON, metaclass=_PlaybackImplementationMeta)
         """
         pass
 
+    def _release_shared_resources(self):
+        """
+        Called when the ensemble that this PlaybackImplementation's host instrument belongs to is shut down (e.g. when
+        a Session is killed). Any process-wide resources held by this PlaybackImplementation should be given back here.
+        """
+        pass
+
     """
     Methods for storing and accessing shared resources for the ensemble. 
     """
@@ -101,9 +123,8 @@ class PlaybackImplementation(SavesToJSON, metaclass=_PlaybackImplementationMeta)
     def resource_dictionary(self) -> dict:
         """
         Dictionary of shared resources for this type of playback implementation.
-        For instance, SoundfontPlaybackImplementation uses this to store an instance of SoundfontHost. Only one
-        instance of fluidsynth (and therefore SoundfontHost) needs to be running for all instruments in the ensemble,
-        so this is a way of pooling that resource.
+        For instance, a playback implementation that talks to some external program could store its connection here,
+        so that all the instruments in the ensemble share it, rather than each opening their own.
         """
         if self._host_instrument is None:
             raise RuntimeError("PlaybackImplementation was never attached to a host instrument. "
@@ -148,6 +169,22 @@ class PlaybackImplementation(SavesToJSON, metaclass=_PlaybackImplementationMeta)
         """
         self.resource_dictionary[key] = value
 
+    def _dispatch(self, function, *args) -> None:
+        """
+        Carries out a call that actually produces output (e.g. sending a MIDI message). Usually this just means calling
+        it, but if the host instrument's ensemble has a playback latency, the call is handed to the ensemble's
+        :class:`~scamp._output_dispatcher.OutputDispatcher` instead, to be carried out at its scheduled time plus the
+        latency.
+
+        :param function: the function to call
+        :param args: the arguments to call it with
+        """
+        ensemble = self._host_instrument.ensemble if self._host_instrument is not None else None
+        if ensemble is None or ensemble._output_dispatcher is None:
+            function(*args)
+        else:
+            ensemble._output_dispatcher.dispatch(function, args)
+
     """
     The actual abstract methods to override in creating a new PlaybackImplementation
     """
@@ -313,9 +350,9 @@ class _MIDIPlaybackImplementation(PlaybackImplementation):
         other_parameter_cc_codes = [int(key) for key in other_parameter_values.keys()
                                     if key.isdigit() and 0 <= int(key) < 128]
         this_note_info = self._note_info_dict[note_id]
-        this_note_fixed = "fixed" in this_note_info["flags"] or self.note_on_and_off_only
+        this_note_fixed = "fixed" in this_note_info.flags or self.note_on_and_off_only
         if this_note_fixed:
-            this_note_info["max_volume"] = volume
+            this_note_info.max_volume = volume
         int_pitch = int(round(pitch))
 
         # make a list of available channels to add this note to that won't cause pitch bend / expression conflicts
@@ -327,11 +364,13 @@ class _MIDIPlaybackImplementation(PlaybackImplementation):
             # check that this other note has been handled by this playback implementation (for instance, a silent
             # note will be skipped, since it was never passed to the playback implementations). Also check that it
             # hasn't been prematurely ended.
-            if self in other_note_info and not other_note_info[self]["prematurely_ended"]:
-                other_note_channel = other_note_info[self]["channel"]
-                other_note_fixed = "fixed" in other_note_info["flags"]
-                other_note_pitch = other_note_info["parameter_values"]["pitch"]
-                other_note_int_pitch = other_note_info[self]["midi_note"]
+            other_note_implementation_info = other_note_info.get_implementation_info(self)
+            if other_note_implementation_info is not None and \
+                    not other_note_implementation_info["prematurely_ended"]:
+                other_note_channel = other_note_implementation_info["channel"]
+                other_note_fixed = "fixed" in other_note_info.flags
+                other_note_pitch = other_note_info.parameter_values["pitch"]
+                other_note_int_pitch = other_note_implementation_info["midi_note"]
                 # this new note only share a midi channel with the old note if:
                 #   1) both notes are fixed (i.e. will not do a pitch or expression change, which is channel-wide)
                 #   2) the notes aren't on the same midi key (since a note off in one would affect the other)
@@ -344,7 +383,7 @@ class _MIDIPlaybackImplementation(PlaybackImplementation):
                 # now we check if there are any conflicting cc messages, since these are also channel-wide
                 conflicting_cc_codes = False
                 # first figure out which, if any, cc codes the other note is using, and then which both are using
-                other_note_used_cc_codes = [int(key) for key in other_note_info["parameter_values"].keys()
+                other_note_used_cc_codes = [int(key) for key in other_note_info.parameter_values.keys()
                                             if key.isdigit() and 0 <= int(key) < 128]
                 if len(other_parameter_cc_codes) + len(other_parameter_cc_codes) > 0:
                     # if either note is using a cc code, we need to check that they are compatible
@@ -353,7 +392,7 @@ class _MIDIPlaybackImplementation(PlaybackImplementation):
                         # same values for those cc numbers. Otherwise there may be unwanted side effects
                         for cc_code in other_parameter_cc_codes:
                             param = str(cc_code)
-                            if other_note_info["parameter_values"][param] != other_parameter_values[param]:
+                            if other_note_info.parameter_values[param] != other_parameter_values[param]:
                                 conflicting_cc_codes = True
                                 break
                     else:
@@ -392,7 +431,7 @@ class _MIDIPlaybackImplementation(PlaybackImplementation):
             # otherwise, we'll have to kill an old note to find a free channel
             # get the info we stored on this note, related to this specific playback implementation
             # (see end of start_note method for explanation)
-            oldest_note_info = self._note_info_dict[oldest_note_id][self]
+            oldest_note_info = self._note_info_dict[oldest_note_id].get_implementation_info(self)
             self.note_off(oldest_note_info["channel"], oldest_note_info["midi_note"])
             # flag it as prematurely ended so that we send no further midi commands
             oldest_note_info["prematurely_ended"] = True
@@ -400,21 +439,21 @@ class _MIDIPlaybackImplementation(PlaybackImplementation):
             channel = oldest_note_info["channel"]
 
         self._prep_channel(
-            channel, pitch, volume / this_note_info["max_volume"] if this_note_info["max_volume"] > 0 else 0,
+            channel, pitch, volume / this_note_info.max_volume if this_note_info.max_volume > 0 else 0,
             other_parameter_cc_codes, other_parameter_values
         )
-        self.note_on(channel, int_pitch, this_note_info["max_volume"])
+        self.note_on(channel, int_pitch, this_note_info.max_volume)
 
         # store the midi note that we pressed for this note, the channel we pressed it on, and make an entry
         # initially false) for whether or not we ended this note prematurely (to free up a channel for a newer
-        # note). Note that we're creating here a dictionary within the note_info dictionary, using this
-        # PlaybackImplementation instance as the key. This way, there can never be conflict between data
-        # stored by this PlaybackImplementation and data stored by other PlaybackImplementations
-        this_note_info[self] = {
+        # note). Note that we're storing this dictionary in this PlaybackImplementation's own slot in the NoteState,
+        # so there can never be conflict between data stored by this PlaybackImplementation and data stored by other
+        # PlaybackImplementations
+        this_note_info.set_implementation_info(self, {
             "midi_note": int_pitch,
             "channel": channel,
             "prematurely_ended": False
-        }
+        })
 
     def _prep_channel(self, channel, pitch, expression, other_parameter_cc_codes, other_parameter_values):
         """
@@ -435,13 +474,14 @@ class _MIDIPlaybackImplementation(PlaybackImplementation):
 
     def end_note(self, note_id):
         this_note_info = self._note_info_dict[note_id]
-        assert self in this_note_info, "Note was never started by the SoundfontPlaybackImplementer; this is bad."
-        this_note_implementation_info = this_note_info[self]
+        this_note_implementation_info = this_note_info.get_implementation_info(self)
+        assert this_note_implementation_info is not None, \
+            "Note was never started by the SoundfontPlaybackImplementer; this is bad."
         if not this_note_implementation_info["prematurely_ended"]:
             self.note_off(this_note_implementation_info["channel"], this_note_implementation_info["midi_note"])
             ringing_note_info = (this_note_implementation_info["channel"],
                                  this_note_implementation_info["midi_note"],
-                                 this_note_info["parameter_values"]["pitch"])
+                                 this_note_info.parameter_values["pitch"])
 
             # we need to consider this note as potentially still ringing for some period
             # after it finished. We don't want to  accidentally pitch-shift the release trail
@@ -456,8 +496,10 @@ class _MIDIPlaybackImplementation(PlaybackImplementation):
 
                     with self._host_instrument._note_info_lock:
                         # if there's another active note on this channel, don't reset the pitch and expression
-                        for other_note_id, other_note_info in self._note_info_dict.items():
-                            if self in other_note_info and other_note_info[self]["channel"] == ringing_note_info[0]:
+                        for other_note_info in self._note_info_dict.values():
+                            other_note_implementation_info = other_note_info.get_implementation_info(self)
+                            if other_note_implementation_info is not None and \
+                                    other_note_implementation_info["channel"] == ringing_note_info[0]:
                                 return
 
                     # likewise if there's another ringing note on this channel
@@ -478,9 +520,9 @@ class _MIDIPlaybackImplementation(PlaybackImplementation):
             # theoretically could happen if the end_note call happens right before this is called in the
             # asynchronous animation function. We don't want to cause a KeyError, so this avoids that possibility
             return
-        this_note_info = self._note_info_dict[note_id]
-        assert self in this_note_info, "Note was never started by the SoundfontPlaybackImplementer; this is bad."
-        this_note_implementation_info = this_note_info[self]
+        this_note_implementation_info = self._note_info_dict[note_id].get_implementation_info(self)
+        assert this_note_implementation_info is not None, \
+            "Note was never started by the SoundfontPlaybackImplementer; this is bad."
         if not this_note_implementation_info["prematurely_ended"]:
             self.pitch_bend(this_note_implementation_info["channel"],
                             new_pitch - this_note_implementation_info["midi_note"])
@@ -494,10 +536,11 @@ class _MIDIPlaybackImplementation(PlaybackImplementation):
             # asynchronous animation function. We don't want to cause a KeyError, so this avoids that possibility
             return
         this_note_info = self._note_info_dict[note_id]
-        assert self in this_note_info, "Note was never started by the SoundfontPlaybackImplementer; this is bad."
-        this_note_implementation_info = this_note_info[self]
+        this_note_implementation_info = this_note_info.get_implementation_info(self)
+        assert this_note_implementation_info is not None, \
+            "Note was never started by the SoundfontPlaybackImplementer; this is bad."
         if not this_note_implementation_info["prematurely_ended"]:
-            self.expression(this_note_implementation_info["channel"], new_volume / this_note_info["max_volume"])
+            self.expression(this_note_implementation_info["channel"], new_volume / this_note_info.max_volume)
 
     def change_note_parameter(self, note_id, parameter_name, new_value):
         if self.note_on_and_off_only:
@@ -514,9 +557,9 @@ class _MIDIPlaybackImplementation(PlaybackImplementation):
             cc_number = None
 
         if cc_number is not None:
-            this_note_info = self._note_info_dict[note_id]
-            assert self in this_note_info, "Note was never started by the SoundfontPlaybackImplementer; this is bad."
-            this_note_implementation_info = this_note_info[self]
+            this_note_implementation_info = self._note_info_dict[note_id].get_implementation_info(self)
+            assert this_note_implementation_info is not None, \
+                "Note was never started by the SoundfontPlaybackImplementer; this is bad."
             if not this_note_implementation_info["prematurely_ended"]:
                 self.cc(this_note_implementation_info["channel"], cc_number, new_value / 127)
 
@@ -543,11 +586,19 @@ class SoundfontPlaybackImplementation(_MIDIPlaybackImplementation):
         dynamic pitch/volume/parameter changes. Without this flag, notes will all be placed on separate MIDI channels,
         since they could potentially change pitch or volume; with this flags, we know they won't, so they can share
         the same MIDI channels, only using an extra one due to microtonality.
+    :param use_sequencer: if True, rather than being sent to the synth right away, events are timestamped a little in
+        the future and scheduled with fluidsynth's own sequencer, which applies them from the audio thread. This
+        removes the timing jitter of the clock threads from the sound. The events are scheduled the ensemble's
+        playback_latency into the future if it has one, and otherwise playback_settings.soundfont_sequencer_latency
+        into the future. Defaults to playback_settings.use_soundfont_sequencer.
     """
 
     def __init__(self, host_instrument: 'instruments_module.ScampInstrument', bank_and_preset: Tuple[int, int] = (0, 0),
                  soundfont: str = "default", num_channels: int = 8, audio_driver: str = "default",
-                 max_pitch_bend: int = "default", note_on_and_off_only: bool = False):
+                 max_pitch_bend: int = "default", note_on_and_off_only: bool = False,
+                 use_sequencer: bool = "default"):
+        self.use_sequencer = playback_settings.use_soundfont_sequencer if use_sequencer == "default" \
+            else use_sequencer
         super().__init__(host_instrument, num_channels, note_on_and_off_only)
 
         # we hold onto these arguments for the purposes of json serialization
@@ -559,41 +610,57 @@ class SoundfontPlaybackImplementation(_MIDIPlaybackImplementation):
         self.max_pitch_bend = max_pitch_bend
         self.soundfont = playback_settings.default_soundfont if soundfont == "default" else soundfont
         # these are setup by the `_initialize_shared_resources` function
-        self.soundfont_host = self.soundfont_instrument = None
+        self.soundfont_host = self.soundfont_instrument = self._release_soundfont_instrument = None
 
     def _initialize_shared_resources(self):
-        audio_driver = playback_settings.default_audio_driver if self.audio_driver == "default" else self.audio_driver
-        soundfont_host_resource_key = "{}_soundfont_host".format(audio_driver)
-        if not self.has_shared_resource(soundfont_host_resource_key):
-            self.set_shared_resource(soundfont_host_resource_key, SoundfontHost(self.soundfont, audio_driver))
-        self.soundfont_host = self.get_shared_resource(soundfont_host_resource_key)
-        if self.soundfont not in self.soundfont_host.soundfont_ids:
-            self.soundfont_host.load_soundfont(self.soundfont)
-        self.soundfont_instrument = self.soundfont_host.add_instrument(self.num_channels, self.bank_and_preset,
-                                                                       self.soundfont)
+        audio_driver = get_default_audio_driver() if self.audio_driver == "default" else self.audio_driver
+        if self._release_soundfont_instrument is not None:
+            # we're being moved to a different host instrument, so give back the channels we had before
+            self._release_soundfont_instrument()
+        # soundfont hosts are shared process-wide, rather than being an ensemble resource, so that every ensemble and
+        # session using the same soundfont can share the loaded copy of it
+        self.soundfont_instrument = SoundfontHost.add_shared_instrument(self.num_channels, self.bank_and_preset,
+                                                                        self.soundfont, audio_driver)
+        self.soundfont_host = self.soundfont_instrument.soundfont_host
+        # once this playback implementation is no longer in use, its channels go back to the host
+        self._release_soundfont_instrument = weakref.finalize(self, self.soundfont_instrument.release)
         self.set_max_pitch_bend(playback_settings.default_max_soundfont_pitch_bend
                                 if self.max_pitch_bend == "default" else self.max_pitch_bend)
 
+    def _release_shared_resources(self):
+        # give our channels back to the shared host, which can then shut down if nothing else is using it
+        if self._release_soundfont_instrument is not None:
+            self._release_soundfont_instrument()
+
+    def _dispatch(self, function, *args) -> None:
+        if not self.use_sequencer:
+            return super()._dispatch(function, *args)
+        # no need for the ensemble's output dispatcher; fluidsynth's sequencer does the waiting for us
+        ensemble = self._host_instrument.ensemble if self._host_instrument is not None else None
+        latency = ensemble.playback_latency if ensemble is not None and ensemble.playback_latency > 0 \
+            else playback_settings.soundfont_sequencer_latency
+        function(*args, target_time=get_scheduled_time() + latency)
+
     # -------------------------------- Main Playback Methods --------------------------------
 
     def note_on(self, chan: int, pitch: int, velocity_from_0_to_1: float):
-        self.soundfont_instrument.note_on(chan, pitch, velocity_from_0_to_1)
+        self._dispatch(self.soundfont_instrument.note_on, chan, pitch, velocity_from_0_to_1)
 
     def note_off(self, chan: int, pitch: int):
-        self.soundfont_instrument.note_off(chan, pitch)
+        self._dispatch(self.soundfont_instrument.note_off, chan, pitch)
 
     def pitch_bend(self, chan: int, bend_in_semitones: float):
-        self.soundfont_instrument.pitch_bend(chan, bend_in_semitones)
+        self._dispatch(self.soundfont_instrument.pitch_bend, chan, bend_in_semitones)
 
     def set_max_pitch_bend(self, semitones: int):
-        self.soundfont_instrument.set_max_pitch_bend(semitones)
+        self._dispatch(self.soundfont_instrument.set_max_pitch_bend, semitones)
         self.max_pitch_bend = semitones
 
     def expression(self, chan: int, expression_from_0_to_1: float):
-        self.soundfont_instrument.expression(chan, expression_from_0_to_1)
+        self._dispatch(self.soundfont_instrument.expression, chan, expression_from_0_to_1)
 
     def cc(self, chan: int, cc_number: int, value_from_0_to_1: float):
-        self.soundfont_instrument.cc(chan, cc_number, value_from_0_to_1)
+        self._dispatch(self.soundfont_instrument.cc, chan, cc_number, value_from_0_to_1)
 
     def _to_dict(self):
         return {
@@ -601,7 +668,8 @@ class SoundfontPlaybackImplementation(_MIDIPlaybackImplementation):
             "soundfont": self.soundfont,
             "num_channels": self.num_channels,
             "audio_driver": self.audio_driver,
-            "max_pitch_bend": self.max_pitch_bend
+            "max_pitch_bend": self.max_pitch_bend,
+            "use_sequencer": self.use_sequencer
         }
 
     @classmethod
@@ -675,26 +743,16 @@ class MIDIStreamPlaybackImplementation(_MIDIPlaybackImplementation):
         if self.max_pitch_bend != 2:
             self.set_max_pitch_bend(self.max_pitch_bend)
         rt_simple_out, chan = self._get_rt_simple_out_and_channel(chan)
-        velocity = int(playback_settings.streaming_midi_volume_to_velocity_curve.value_at(velocity_from_0_to_1))
-        rt_simple_out.note_on(chan, pitch, velocity)
+        velocity = streaming_midi_velocity_table.velocity(velocity_from_0_to_1)
+        self._dispatch(rt_simple_out.note_on, chan, pitch, velocity)
 
     def note_off(self, chan: int, pitch: int):
         rt_simple_out, chan = self._get_rt_simple_out_and_channel(chan)
-        rt_simple_out.note_off(chan, pitch)
+        self._dispatch(rt_simple_out.note_off, chan, pitch)
 
     def pitch_bend(self, chan: int, bend_in_semitones: float):
         rt_simple_out, chan = self._get_rt_simple_out_and_channel(chan)
-        directional_bend_value = int(bend_in_semitones / self.max_pitch_bend * 8192)
-
-        if directional_bend_value > 8192 or directional_bend_value < -8192:
-            logging.warning("Attempted pitch bend beyond maximum range (default is 2 semitones). Call set_max_"
-                            "pitch_bend on your MidiScampInstrument to expand the range.")
-        # we can't have a directional pitch bend popping up to 8192, because we'll go one above the max allowed
-        # on the other hand, -8192 is fine, since that will add up to zero
-        # However, notice above that we don't send a warning about going beyond max pitch bend for a value of exactly
-        # 8192, since that's obnoxious and confusing. Better to just quietly clip it to 8191
-        directional_bend_value = max(-8192, min(directional_bend_value, 8191))
-        rt_simple_out.pitch_bend(chan, directional_bend_value + 8192)
+        self._dispatch(rt_simple_out.pitch_bend, chan, self._pitch_bend_mapping.bend_value(bend_in_semitones))
 
     def set_max_pitch_bend(self, max_bend_in_semitones: int):
         if max_bend_in_semitones != int(max_bend_in_semitones):
@@ -704,22 +762,23 @@ class MIDIStreamPlaybackImplementation(_MIDIPlaybackImplementation):
 
         for chan in range(self.num_channels):
             rt_simple_out, chan = self._get_rt_simple_out_and_channel(chan)
-            rt_simple_out.cc(chan, 101, 0)
-            rt_simple_out.cc(chan, 100, 0)
-            rt_simple_out.cc(chan, 6, max_bend_in_semitones)
-            rt_simple_out.cc(chan, 100, 127)
+            self._dispatch(rt_simple_out.cc, chan, 101, 0)
+            self._dispatch(rt_simple_out.cc, chan, 100, 0)
+            self._dispatch(rt_simple_out.cc, chan, 6, max_bend_in_semitones)
+            self._dispatch(rt_simple_out.cc, chan, 100, 127)
 
         self.max_pitch_bend = max_bend_in_semitones
+        self._pitch_bend_mapping = get_pitch_bend_mapping(max_bend_in_semitones)
 
     def expression(self, chan: int, expression_from_0_to_1: float):
         rt_simple_out, chan = self._get_rt_simple_out_and_channel(chan)
         expression_val = max(0, min(127, int(expression_from_0_to_1 * 127)))
-        rt_simple_out.expression(chan, expression_val)
+        self._dispatch(rt_simple_out.expression, chan, expression_val)
 
     def cc(self, chan: int, cc_number: int, value_from_0_to_1: float):
         rt_simple_out, chan = self._get_rt_simple_out_and_channel(chan)
         cc_value = max(0, min(127, int(value_from_0_to_1 * 127)))
-        rt_simple_out.cc(chan, cc_number, cc_value)
+        self._dispatch(rt_simple_out.cc, chan, cc_number, cc_value)
 
     def _to_dict(self):
         return {
@@ -781,28 +840,31 @@ class OSCPlaybackImplementation(PlaybackImplementation):
 
     def start_note(self, note_id: int, pitch: float, volume: float, properties: dict,
                    other_parameter_values: dict = None) -> None:
-        self.client.send_message("/{}/{}".format(self.message_prefix, self.osc_message_addresses["start_note"]),
-                                 [note_id, pitch, volume])
+        self._dispatch(self.client.send_message,
+                       "/{}/{}".format(self.message_prefix, self.osc_message_addresses["start_note"]),
+                       [note_id, pitch, volume])
         self._currently_playing.append(note_id)
         for param, value in other_parameter_values.items():
             self.change_note_parameter(note_id, param, value)
 
     def end_note(self, note_id: int) -> None:
-        self.client.send_message("/{}/{}".format(self.message_prefix,
-                                                 self.osc_message_addresses["end_note"]), [note_id])
+        self._dispatch(self.client.send_message,
+                       "/{}/{}".format(self.message_prefix, self.osc_message_addresses["end_note"]), [note_id])
         if note_id in self._currently_playing:
             self._currently_playing.remove(note_id)
 
     def change_note_pitch(self, note_id: int, new_pitch: float) -> None:
-        self.client.send_message("/{}/{}".format(self.message_prefix, self.osc_message_addresses["change_pitch"]),
-                                 [note_id, new_pitch])
+        self._dispatch(self.client.send_message,
+                       "/{}/{}".format(self.message_prefix, self.osc_message_addresses["change_pitch"]),
+                       [note_id, new_pitch])
 
     def change_note_volume(self, note_id: int, new_volume: float) -> None:
-        self.client.send_message("/{}/{}".format(self.message_prefix, self.osc_message_addresses["change_volume"]),
-                                 [note_id, new_volume])
+        self._dispatch(self.client.send_message,
+                       "/{}/{}".format(self.message_prefix, self.osc_message_addresses["change_volume"]),
+                       [note_id, new_volume])
 
     def change_note_parameter(self, note_id: int, parameter_name: str, new_value: float) -> None:
-        self.client.send_message("/{}/{}/{}".format(
+        self._dispatch(self.client.send_message, "/{}/{}/{}".format(
             self.message_prefix, self.osc_message_addresses["change_parameter"], parameter_name), [note_id, new_value])
 
     def set_max_pitch_bend(self, semitones: int) -> None:
@@ -822,3 +884,176 @@ class OSCPlaybackImplementation(PlaybackImplementation):
     @classmethod
     def _from_dict(cls, json_dict):
         return cls(**json_dict)
+
+
+class NullPlaybackImplementation(PlaybackImplementation):
+    """
+    Playback implementation that makes no sound and sends no messages, but simply counts the playback calls it receives.
+    Useful for benchmarking the scheduling overhead of a Session without any audio or MIDI hardware.
+
+    :param host_instrument: The ScampInstrument that will use this playback implementation for playback. When this
+        PlaybackImplementation is constructed, it is automatically added to the list of PlaybackImplementations that
+        the host instrument uses.
+    """
+
+    _call_names = ("start_note", "end_note", "change_note_pitch", "change_note_volume", "change_note_parameter")
+
+    def __init__(self, host_instrument: 'instruments_module.ScampInstrument'):
+        super().__init__(host_instrument)
+        self._reset_call_counts()
+
+    @property
+    def call_counts(self) -> dict:
+        """
+        Dictionary mapping the name of each playback method (e.g. "start_note") to the number of times it has been
+        called.
+        """
+        return dict(self._call_totals)
+
+    def _reset_call_counts(self):
+        # calling next on an itertools.count is atomic, so calls from different clock threads get distinct numbers
+        self._call_counters = {call_name: itertools.count() for call_name in NullPlaybackImplementation._call_names}
+        self._call_totals = {call_name: 0 for call_name in NullPlaybackImplementation._call_names}
+
+    def _register_call(self, call_name: str, note_id: int, *args) -> None:
+        call_number = next(self._call_counters[call_name])
+        self._call_totals[call_name] = max(self._call_totals[call_name], call_number + 1)
+
+    def start_note(self, note_id: int, pitch: float, volume: float, properties: dict,
+                   other_parameter_values: dict = None) -> None:
+        self._register_call("start_note", note_id, pitch, volume)
+
+    def end_note(self, note_id: int) -> None:
+        self._register_call("end_note", note_id)
+
+    def change_note_pitch(self, note_id: int, new_pitch: float) -> None:
+        self._register_call("change_note_pitch", note_id, new_pitch)
+
+    def change_note_volume(self, note_id: int, new_volume: float) -> None:
+        self._register_call("change_note_volume", note_id, new_volume)
+
+    def change_note_parameter(self, note_id: int, parameter_name: str, new_value: float) -> None:
+        self._register_call("change_note_parameter", note_id, parameter_name, new_value)
+
+    def set_max_pitch_bend(self, semitones: int) -> None:
+        """
+        This method does nothing in the case of a null implementation
+        """
+        pass
+
+    def _to_dict(self):
+        return {}
+
+    @classmethod
+    def _from_dict(cls, json_dict):
+        return cls(**json_dict, host_instrument=None)
+
+
+PlaybackCallRecord = namedtuple("PlaybackCallRecord", "call_name note_id arguments timestamp latency")
+PlaybackCallRecord.__doc__ = """Record of a single call made to a :class:`RecordingPlaybackImplementation`
+
+:param call_name: name of the playback method called (e.g. "start_note")
+:param note_id: id of the note affected
+:param arguments: tuple of any further arguments to the call (pitch, volume, etc.)
+:param timestamp: monotonic timestamp (from :func:`time.perf_counter`) at which the call was received
+:param latency: how many seconds late the call was, relative to the time at which the clock that made it was scheduled
+    to be at that moment. NaN if the call was not made from a running clock.
+"""
+
+
+class RecordingPlaybackImplementation(NullPlaybackImplementation):
+    """
+    Playback implementation that makes no sound, but records every playback call it receives, along with a monotonic
+    timestamp and the call's latency relative to the scheduled clock time. Records are stored in a ring buffer that is
+    allocated up front, so that recording does not itself add memory allocation to the playback path; once the buffer
+    is full, the oldest records are overwritten.
+
+    :param host_instrument: The ScampInstrument that will use this playback implementation for playback. When this
+        PlaybackImplementation is constructed, it is automatically added to the list of PlaybackImplementations that
+        the host instrument uses.
+    :param capacity: the number of calls that the ring buffer can hold
+    """
+
+    def __init__(self, host_instrument: 'instruments_module.ScampInstrument', capacity: int = 100000):
+        super().__init__(host_instrument)
+        self.capacity = capacity
+        self._call_names_buffer = [None] * capacity
+        self._note_ids_buffer = [0] * capacity
+        self._arguments_buffer = [()] * capacity
+        self._timestamps_buffer = array("d", bytes(8 * capacity))
+        self._latencies_buffer = array("d", bytes(8 * capacity))
+        # calling next on an itertools.count is atomic, so calls from different clock threads get distinct slots
+        self._call_counter = itertools.count()
+        self._num_calls = 0
+
+    def _register_call(self, call_name: str, note_id: int, *args) -> None:
+        timestamp = time.perf_counter()
+        latency = RecordingPlaybackImplementation._get_latency()
+        super()._register_call(call_name, note_id)
+        call_number = next(self._call_counter)
+        index = call_number % self.capacity
+        self._call_names_buffer[index] = call_name
+        self._note_ids_buffer[index] = note_id
+        self._arguments_buffer[index] = args
+        self._timestamps_buffer[index] = timestamp
+        self._latencies_buffer[index] = latency
+        self._num_calls = max(self._num_calls, call_number + 1)
+
+    @staticmethod
+    def _get_latency() -> float:
+        clock = current_clock()
+        # when fast-forwarding (e.g. in render_only mode), the clock is not tied to the wall time at all
+        if clock is None or clock.master._start_time is None or clock.master.is_fast_forwarding():
+            return float("nan")
+        return time.time() - get_scheduled_time(clock)
+
+    @property
+    def num_calls(self) -> int:
+        """Total number of calls received (including any that have since been overwritten in the ring buffer)."""
+        return self._num_calls
+
+    def get_records(self) -> Sequence[PlaybackCallRecord]:
+        """
+        Returns the calls currently held in the ring buffer, from oldest to newest.
+
+        :return: list of :class:`PlaybackCallRecord` named tuples
+        """
+        num_stored = min(self._num_calls, self.capacity)
+        first_call = self._num_calls - num_stored
+        return [
+            PlaybackCallRecord(self._call_names_buffer[i], self._note_ids_buffer[i], self._arguments_buffer[i],
+                               self._timestamps_buffer[i], self._latencies_buffer[i])
+            for i in (call_number % self.capacity for call_number in range(first_call, self._num_calls))
+        ]
+
+    def get_latency_report(self, call_name: str = None) -> dict:
+        """
+        Summarizes the latency of the recorded calls relative to their scheduled clock times.
+
+        :param call_name: if given, only calls to this playback method (e.g. "start_note") are included
+        :return: dictionary with the number of calls with known latency ("num_calls"), as well as the "mean", "min"
+            and "max" latency and the "jitter" (standard deviation of the latency), all in seconds
+        """
+        latencies = [record.latency for record in self.get_records()
+                     if (call_name is None or record.call_name == call_name) and not math.isnan(record.latency)]
+        if len(latencies) == 0:
+            return {"num_calls": 0, "mean": None, "min": None, "max": None, "jitter": None}
+        mean = sum(latencies) / len(latencies)
+        return {
+            "num_calls": len(latencies),
+            "mean": mean,
+            "min": min(latencies),
+            "max": max(latencies),
+            "jitter": math.sqrt(sum((latency - mean) ** 2 for latency in latencies) / len(latencies)),
+        }
+
+    def clear(self) -> None:
+        """
+        Clears all recorded calls and call counts.
+        """
+        self._reset_call_counts()
+        self._call_counter = itertools.count()
+        self._num_calls = 0
+
+    def _to_dict(self):
+        return {"capacity": self.capacity}
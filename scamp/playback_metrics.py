@@ -0,0 +1,168 @@
+"""
+Module containing the :class:`PlaybackMetrics` class, which collects statistics on how punctually a
+:class:`~scamp.session.Session` carries out its playback: how late notes start and end compared to when the clock meant
+them to, how late animation updates are, and how busy the clock's thread pool is. (See
+:func:`~scamp.session.Session.start_recording_metrics`.)
+"""
+
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+#  SCAMP (Suite for Computer-Assisted Music in Python)                                           #
+#  Copyright © 2020 Marc Evanstein <marc@marcevanstein.com>.                                     #
+#                                                                                                #
+#  This program is free software: you can redistribute it and/or modify it under the terms of    #
+#  the GNU General Public License as published by the Free Software Foundation, either version   #
+#  3 of the License, or (at your option) any later version.                                      #
+#                                                                                                #
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;     #
+#  without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#  See the GNU General Public License for more details.                                          #
+#                                                                                                #
+#  You should have received a copy of the GNU General Public License along with this program.    #
+#  If not, see <http://www.gnu.org/licenses/>.                                                   #
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+
+from collections import deque
+import threading
+import math
+
+
+class PlaybackMetrics:
+    """
+    Collects timing measurements made during playback, grouped by metric name, and summarizes them. The metrics
+    recorded by a Session are:
+
+    - "start_note/<instrument name>" and "end_note/<instrument name>": how late (in seconds) each note started or
+      ended, compared to the time at which the clock calling start_note or end_note was scheduled to be at that moment
+    - "animation_tick": how late (in seconds) each update of an animated parameter (e.g. a glissando) happened
+    - "pool_threads_in_use": samples of how many of the threads in the Session's thread pool (see the max_threads
+      argument of the Session) were busy
+    - "active_processes": samples of how many forked clock processes were running
+
+    Only the most recent measurements of each metric are kept, so that recording can go on indefinitely.
+
+    :param max_samples: how many of the most recent measurements of each metric to keep
+    :ivar max_samples: how many of the most recent measurements of each metric to keep
+    """
+
+    def __init__(self, max_samples: int = 10000):
+        self.max_samples = max_samples
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, metric_name: str, value: float) -> None:
+        """
+        Adds a measurement.
+
+        :param metric_name: which metric this is a measurement of
+        :param value: the measured value
+        """
+        with self._lock:
+            if metric_name not in self._samples:
+                self._samples[metric_name] = deque(maxlen=self.max_samples)
+                self._counts[metric_name] = 0
+            self._samples[metric_name].append(value)
+            self._counts[metric_name] += 1
+
+    @property
+    def metric_names(self):
+        """Names of all of the metrics that have measurements."""
+        with self._lock:
+            return sorted(self._samples)
+
+    def get_samples(self, metric_name: str) -> list:
+        """
+        Returns the measurements being kept for the given metric (the most recent max_samples of them).
+
+        :param metric_name: name of the metric
+        """
+        with self._lock:
+            return list(self._samples.get(metric_name, ()))
+
+    def percentiles(self, metric_name: str, percentiles=(50, 90, 99, 100)) -> dict:
+        """
+        Returns the given percentiles of the measurements kept for the given metric.
+
+        :param metric_name: name of the metric
+        :param percentiles: which percentiles to compute (100 being the maximum)
+        :return: dictionary mapping each percentile to its value (None if there are no measurements)
+        """
+        return PlaybackMetrics._get_percentiles(sorted(self.get_samples(metric_name)), percentiles)
+
+    @staticmethod
+    def _get_percentiles(sorted_samples, percentiles):
+        if len(sorted_samples) == 0:
+            return {percentile: None for percentile in percentiles}
+        # nearest-rank percentiles
+        return {percentile: sorted_samples[max(0, math.ceil(percentile / 100 * len(sorted_samples)) - 1)]
+                for percentile in percentiles}
+
+    def histogram(self, metric_name: str, num_bins: int = 10) -> list:
+        """
+        Returns a histogram of the measurements kept for the given metric, with evenly spaced bins spanning from the
+        smallest to the largest measurement.
+
+        :param metric_name: name of the metric
+        :param num_bins: number of bins
+        :return: list of (bin start, bin end, count) tuples
+        """
+        samples = self.get_samples(metric_name)
+        if len(samples) == 0:
+            return []
+        low, high = min(samples), max(samples)
+        bin_width = (high - low) / num_bins if high > low else 1
+        counts = [0] * num_bins
+        for sample in samples:
+            counts[min(num_bins - 1, int((sample - low) / bin_width))] += 1
+        return [(low + i * bin_width, low + (i + 1) * bin_width, count) for i, count in enumerate(counts)]
+
+    def summary(self) -> dict:
+        """
+        Summarizes every metric.
+
+        :return: dictionary mapping each metric name to a dictionary with the total number of measurements made
+            ("count"), and the mean, median ("p50"), 90th and 99th percentile ("p90", "p99") and maximum ("max") of the
+            measurements kept
+        """
+        # take a consistent snapshot of everything at once, since clear() may be called from another thread
+        with self._lock:
+            snapshot = {metric_name: (list(samples), self._counts[metric_name])
+                        for metric_name, samples in self._samples.items()}
+        summary = {}
+        for metric_name in sorted(snapshot):
+            samples, count = snapshot[metric_name]
+            if len(samples) == 0:
+                continue
+            percentiles = PlaybackMetrics._get_percentiles(sorted(samples), (50, 90, 99, 100))
+            summary[metric_name] = {
+                "count": count,
+                "mean": sum(samples) / len(samples),
+                "p50": percentiles[50], "p90": percentiles[90], "p99": percentiles[99], "max": percentiles[100]
+            }
+        return summary
+
+    def report(self) -> str:
+        """
+        Returns a one-line summary of every metric, of the sort that is logged periodically during recording. Times are
+        given in milliseconds.
+        """
+        parts = []
+        for metric_name, stats in self.summary().items():
+            if metric_name in ("pool_threads_in_use", "active_processes"):
+                parts.append("{}: p50 {:g} max {:g}".format(metric_name, stats["p50"], stats["max"]))
+            else:
+                parts.append("{}: n={} p50 {:.2f}ms p99 {:.2f}ms max {:.2f}ms".format(
+                    metric_name, stats["count"], stats["p50"] * 1000, stats["p99"] * 1000, stats["max"] * 1000
+                ))
+        return "Playback metrics | " + (" | ".join(parts) if len(parts) > 0 else "no measurements")
+
+    def clear(self) -> None:
+        """
+        Discards all measurements.
+        """
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+    def __repr__(self):
+        return "PlaybackMetrics(max_samples={})".format(self.max_samples)
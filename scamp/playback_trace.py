@@ -0,0 +1,167 @@
+"""
+Module containing the :class:`PlaybackTrace` class, which records a timeline of what a :class:`~scamp.session.Session`
+does during playback (notes, animated parameter changes, forked processes, waits, listener callbacks), and saves it in
+the Trace Event format that can be loaded into Perfetto (https://ui.perfetto.dev) or Chrome's about:tracing. (See
+:func:`~scamp.session.Session.start_tracing`.)
+"""
+
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+#  SCAMP (Suite for Computer-Assisted Music in Python)                                           #
+#  Copyright © 2020 Marc Evanstein <marc@marcevanstein.com>.                                     #
+#                                                                                                #
+#  This program is free software: you can redistribute it and/or modify it under the terms of    #
+#  the GNU General Public License as published by the Free Software Foundation, either version   #
+#  3 of the License, or (at your option) any later version.                                      #
+#                                                                                                #
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;     #
+#  without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#  See the GNU General Public License for more details.                                          #
+#                                                                                                #
+#  You should have received a copy of the GNU General Public License along with this program.    #
+#  If not, see <http://www.gnu.org/licenses/>.                                                   #
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+
+from contextlib import contextmanager
+from collections import deque
+import threading
+import json
+import time
+import os
+
+
+class PlaybackTrace:
+    """
+    Records events on a timeline, each one tagged with the thread it happened on, in the Trace Event format. The events
+    recorded by a Session are:
+
+    - "note" events: one span per note, from start_note to end_note, named after the instrument. Since a note often
+      starts and ends on different threads, these are recorded as async spans, identified by note id.
+    - "transcription" events: spans for the work of registering a finished note with each Transcriber
+    - "animation" events: spans for each run of a parameter change (e.g. a glissando or a crescendo)
+    - "clock" events: spans for each process forked on the Session, and for each wait call on the Session itself
+    - "listener" events: spans for each call to a MIDI, OSC, keyboard or mouse callback function
+
+    Only the most recent events are kept, so that tracing can go on indefinitely.
+
+    :param max_events: how many of the most recent events to keep
+    :ivar max_events: how many of the most recent events to keep
+    """
+
+    def __init__(self, max_events: int = 1000000):
+        self.max_events = max_events
+        self._events = deque(maxlen=max_events)
+        self._thread_names = {}
+        self._start_time = time.perf_counter()
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    @property
+    def num_events(self) -> int:
+        """Number of events currently being kept."""
+        return len(self._events)
+
+    def timestamp(self) -> float:
+        """
+        Returns the current time on this trace's timeline, in microseconds (the unit of the Trace Event format).
+        """
+        return (time.perf_counter() - self._start_time) * 1e6
+
+    def add_span(self, name: str, category: str, start_timestamp: float, **args) -> None:
+        """
+        Records a span on the current thread, from the given start time until now.
+
+        :param name: name of the span
+        :param category: category of the span (e.g. "clock", "animation")
+        :param start_timestamp: when the span started (as returned by :func:`timestamp`)
+        :param args: extra information to show with the span
+        """
+        self._add_event({"name": name, "cat": category, "ph": "X", "ts": start_timestamp,
+                         "dur": self.timestamp() - start_timestamp, "args": args})
+
+    @contextmanager
+    def span(self, name: str, category: str, **args):
+        """
+        Context manager that records a span on the current thread for the duration of the with block.
+
+        :param name: name of the span
+        :param category: category of the span (e.g. "clock", "animation")
+        :param args: extra information to show with the span
+        """
+        start_timestamp = self.timestamp()
+        try:
+            yield
+        finally:
+            self.add_span(name, category, start_timestamp, **args)
+
+    def begin_async(self, name: str, category: str, span_id: int, **args) -> None:
+        """
+        Starts a span that may end on a different thread (see :func:`end_async`).
+
+        :param name: name of the span
+        :param category: category of the span
+        :param span_id: number identifying this span among those of the same category
+        :param args: extra information to show with the span
+        """
+        self._add_event({"name": name, "cat": category, "ph": "b", "id": span_id, "ts": self.timestamp(),
+                         "args": args})
+
+    def end_async(self, name: str, category: str, span_id: int, **args) -> None:
+        """
+        Ends a span started with :func:`begin_async`.
+
+        :param name: name of the span
+        :param category: category of the span
+        :param span_id: number identifying this span among those of the same category
+        :param args: extra information to show with the span
+        """
+        self._add_event({"name": name, "cat": category, "ph": "e", "id": span_id, "ts": self.timestamp(),
+                         "args": args})
+
+    def instant(self, name: str, category: str, **args) -> None:
+        """
+        Records a single moment on the current thread.
+
+        :param name: name of the event
+        :param category: category of the event
+        :param args: extra information to show with the event
+        """
+        self._add_event({"name": name, "cat": category, "ph": "i", "s": "t", "ts": self.timestamp(), "args": args})
+
+    def _add_event(self, event):
+        thread = threading.current_thread()
+        event["pid"] = self._pid
+        event["tid"] = thread.ident
+        with self._lock:
+            if thread.ident not in self._thread_names:
+                self._thread_names[thread.ident] = thread.name
+            self._events.append(event)
+
+    def to_json_dict(self) -> dict:
+        """
+        Returns the events in the (JSON object form of the) Trace Event format, along with the names of the threads.
+        """
+        with self._lock:
+            thread_name_events = [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": thread_id,
+                                   "args": {"name": thread_name}}
+                                  for thread_id, thread_name in self._thread_names.items()]
+            return {"traceEvents": thread_name_events + list(self._events), "displayTimeUnit": "ms"}
+
+    def save(self, file_path: str) -> None:
+        """
+        Saves the trace as a JSON file, which can be opened in Perfetto or Chrome's about:tracing.
+
+        :param file_path: path of the file to save to
+        """
+        with open(file_path, "w") as file:
+            json.dump(self.to_json_dict(), file, default=repr)
+
+    def clear(self) -> None:
+        """
+        Discards all of the events recorded so far.
+        """
+        with self._lock:
+            self._events.clear()
+            self._thread_names.clear()
+
+    def __repr__(self):
+        return "PlaybackTrace({})".format(self.max_events)
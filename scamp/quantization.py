@@ -29,6 +29,10 @@ from expenvelope import Envelope
 from ._dependencies import abjad
 from numbers import Number
 from typing import Sequence, Union, Tuple, Iterator
+from copy import deepcopy
+import math
+import itertools
+import bisect
 import textwrap
 
 
@@ -659,6 +663,25 @@ QuantizedMeasure.__doc__ = """Record of how a measure was quantized (named tuple
 """
 
 
+def get_ticks_per_beat(quantized_measure: QuantizedMeasure) -> int:
+    """
+    Finds the smallest number of ticks per beat (quarter note) such that every division point of every beat in the
+    given measure falls on a whole number of ticks. This is the least common multiple of the denominators of the beat
+    start points and division lengths, and allows the notation of the measure to be worked out in exact integer
+    arithmetic.
+
+    :param quantized_measure: a QuantizedMeasure
+    :return: the number of ticks per beat
+    """
+    ticks_per_beat = 1
+    for quantized_beat in quantized_measure.beats:
+        for time_point in (quantized_beat.start_beat_in_measure, quantized_beat.length,
+                           quantized_beat.length / (quantized_beat.divisor or 1)):
+            denominator = Fraction(time_point).limit_denominator().denominator
+            ticks_per_beat = ticks_per_beat * denominator // math.gcd(ticks_per_beat, denominator)
+    return ticks_per_beat
+
+
 class QuantizationRecord(SavesToJSON):
     """
     Record of how a :class:`~scamp.performance.PerformancePart` was quantized.
@@ -738,25 +761,169 @@ def quantize_performance_part(part: 'PerformancePart', quantization_scheme: Quan
                                                           onset_weighting, termination_weighting, inner_split_weighting)
         # make any simultaneous notes in the part chords
         _collapse_chords(voice)
-        # break the voice into a list of non-overlapping voices. If there was no overlap, this has length 1
-        non_overlapping_voices = _separate_into_non_overlapping_voices(voice)
+        _add_quantized_voice_to_part(part, voice_name, voice, quantization_record)
 
-        for i, new_voice in enumerate(non_overlapping_voices):
-            if i == 0:
-                # the first of the non-overlapping voices just retains the old voice name
-                new_voice_name = voice_name
-            else:
-                # any extra voice created has to be given a related name
-                # we follow the pattern 'original_voice', 'original_voice_2', 'original_voice_3', etc.
-                k = i+1
+
+def requantize_performance_part(part: 'PerformancePart', quantized_part: 'PerformancePart',
+                                quantization_scheme: QuantizationScheme, voice_cache: dict,
+                                dirty_beat_ranges: Sequence[Tuple[float, float]] = (),
+                                onset_weighting: float = "default", termination_weighting: float = "default",
+                                inner_split_weighting: float = "default"):
+    """
+    Quantizes the notes of a PerformancePart into quantized_part (a new PerformancePart with no notes in it), reusing
+    the results of a previous call wherever possible. The quantized notes and beat divisors of each voice are kept in
+    voice_cache, so that the next time around only the measures touched by the dirty_beat_ranges get re-quantized;
+    everything else is spliced back in from the cache. The original part is left unaltered.
+
+    :param part: the (unquantized) PerformancePart to quantize
+    :param quantized_part: a PerformancePart with no notes, into which the quantized voices are placed
+    :param quantization_scheme: a QuantizationScheme. This should be the same every time a given voice_cache is used.
+    :param voice_cache: dictionary mapping voice names to tuples of (quantized notes, beat divisors); updated in place.
+        Voices that are not in the cache (e.g. the first time around) are quantized in full.
+    :param dirty_beat_ranges: list of (start beat, end beat) tuples in which notes have changed since the cache was
+        last updated
+    :param onset_weighting: How much do we care about accurate onsets
+    :param termination_weighting: How much do we care about accurate terminations
+    :param inner_split_weighting: How much do we care about inner segmentation timing (e.g. tuple note lengths)
+    """
+    if not isinstance(quantization_scheme, QuantizationScheme):
+        raise ValueError("Couldn't understand quantization scheme.")
+    from .performance import PerformanceNote
+
+    quantized_part.voice_quantization_records = {}
+
+    for voice_name in list(voice_cache.keys()):
+        if voice_name not in part.voices:
+            del voice_cache[voice_name]
+
+    for voice_name, voice in list(part.voices.items()):
+        if voice_name in voice_cache:
+            cached_notes, cached_beat_divisors = voice_cache[voice_name]
+            windows = _get_requantization_windows(voice, cached_notes, dirty_beat_ranges, quantization_scheme)
+        else:
+            cached_notes, cached_beat_divisors = [], []
+            windows = [(float("-inf"), float("inf"))]
+
+        # window edges, in order; the number of edges at or before a beat tells us which window (if any) it falls in
+        window_edges = [edge for window in windows for edge in window]
+
+        def in_a_window(beat):
+            return bisect.bisect_right(window_edges, beat) % 2 == 1
+
+        if len(windows) > 0:
+            window_notes = deepcopy([note for note in voice if in_a_window(note.start_beat)])
+            quantization_record = _quantize_performance_voice(window_notes, quantization_scheme, onset_weighting,
+                                                              termination_weighting, inner_split_weighting)
+            _collapse_chords(window_notes)
+            for note in window_notes:
+                # since windows never cut through a note, all of the tied pieces that a note gets split into come from
+                # the same pass, so its _source_id only needs to differ from those of every other note (including the
+                # cached ones from earlier passes), which a fresh id guarantees. The _quantization_id marks this note as
+                # freshly quantized, so that any measure containing it is engraved anew.
+                if "_source_id" not in note.properties.temp:
+                    note.properties.temp["_source_id"] = PerformanceNote.next_id()
+                note.properties.temp["_quantization_id"] = PerformanceNote.next_id()
+            window_beat_divisors = [quantized_beat.divisor for quantized_measure
+                                    in quantization_record.quantized_measures for quantized_beat in quantized_measure.beats]
+
+            # splice the new beat divisors in with the cached ones from outside of the windows
+            beat_divisors = []
+            for i, (beat_scheme, beat_start) in zip(range(max(len(cached_beat_divisors), len(window_beat_divisors))),
+                                                    quantization_scheme.beat_scheme_iterator()):
+                source_divisors = window_beat_divisors if in_a_window(beat_start) else cached_beat_divisors
+                beat_divisors.append(source_divisors[i] if i < len(source_divisors) else None)
+
+            # and then splice in the notes. Sorting by region (rather than start beat) keeps the notes within each
+            # region in their original order, which matters for how they get separated into voices below.
+            notes = [note for note in cached_notes if not in_a_window(note.start_beat)] + window_notes
+            notes.sort(key=lambda note: bisect.bisect_right(window_edges, note.start_beat))
+            voice_cache[voice_name] = notes, beat_divisors
+        else:
+            notes, beat_divisors = cached_notes, cached_beat_divisors
+
+        end_beat = max((note.end_beat for note in notes), default=0)
+        quantized_part.voices[voice_name] = []
+        _add_quantized_voice_to_part(quantized_part, voice_name, notes,
+                                     _construct_quantization_record(list(beat_divisors), end_beat, quantization_scheme))
+
+
+def _get_requantization_windows(notes, quantized_notes, dirty_beat_ranges, quantization_scheme):
+    """
+    Finds the windows of beats that need to be re-quantized in order to account for the dirty_beat_ranges. Each window
+    runs from one bar line to another, and is expanded until no note (either as it is now, or as it was last quantized)
+    straddles its edges. This way, quantizing the notes inside of a window never affects anything outside of it.
+
+    :param notes: the notes in the voice as they are now
+    :param quantized_notes: the notes in the voice as they were last quantized
+    :param dirty_beat_ranges: list of (start beat, end beat) tuples in which notes have changed
+    :param quantization_scheme: the QuantizationScheme in use, which tells us where the bar lines are
+    :return: a sorted list of non-overlapping (start beat, end beat) tuples
+    """
+    def snap_to_bar_lines(start_beat, end_beat):
+        # the window start is the last bar line at or before start_beat (or -inf for a note before the first bar)
+        # and the window end is the first bar line at or after end_beat that is also after the window start
+        window_start = float("-inf") if start_beat < 0 else 0
+        for _, bar_line in quantization_scheme.measure_scheme_iterator():
+            if bar_line <= start_beat:
+                window_start = bar_line
+            elif end_beat == float("inf"):
+                return window_start, end_beat
+            if bar_line >= end_beat and bar_line > window_start:
+                return window_start, bar_line
+
+    windows = []
+    for start_beat, end_beat in dirty_beat_ranges:
+        window = snap_to_bar_lines(start_beat, end_beat)
+        while True:
+            for note in itertools.chain(notes, quantized_notes):
+                if note.start_beat < window[0] < note.end_beat or note.start_beat < window[1] < note.end_beat:
+                    start_beat = min(start_beat, note.start_beat)
+                    end_beat = max(end_beat, note.end_beat)
+            expanded_window = snap_to_bar_lines(start_beat, end_beat)
+            if expanded_window == window:
+                break
+            window = expanded_window
+        windows.append(window)
+
+    # merge any windows that overlap or abut one another
+    windows.sort()
+    merged_windows = []
+    for window in windows:
+        if len(merged_windows) > 0 and window[0] <= merged_windows[-1][1]:
+            merged_windows[-1] = merged_windows[-1][0], max(merged_windows[-1][1], window[1])
+        else:
+            merged_windows.append(window)
+    return merged_windows
+
+
+def _add_quantized_voice_to_part(part, voice_name, notes, quantization_record):
+    """
+    Places a quantized voice in the given part, breaking it up into several non-overlapping voices if necessary.
+
+    :param part: the PerformancePart to add the voice to
+    :param voice_name: name of the voice
+    :param notes: list of quantized PerformanceNotes in the voice
+    :param quantization_record: the QuantizationRecord for the voice
+    """
+    # break the voice into a list of non-overlapping voices. If there was no overlap, this has length 1
+    non_overlapping_voices = _separate_into_non_overlapping_voices(notes)
+
+    for i, new_voice in enumerate(non_overlapping_voices):
+        if i == 0:
+            # the first of the non-overlapping voices just retains the old voice name
+            new_voice_name = voice_name
+        else:
+            # any extra voice created has to be given a related name
+            # we follow the pattern 'original_voice', 'original_voice_2', 'original_voice_3', etc.
+            k = i+1
+            new_voice_name = voice_name + "_{}".format(str(k))
+            # in the ridiculous case someone names two voices 'voice' and 'voice_2', and the first one needs to
+            # be split up, we'll just have to increment to 'voice_3'
+            while new_voice_name in part.voices:
+                k += 1
                 new_voice_name = voice_name + "_{}".format(str(k))
-                # in the ridiculous case someone names two voices 'voice' and 'voice_2', and the first one needs to
-                # be split up, we'll just have to increment to 'voice_3'
-                while new_voice_name in part.voices:
-                    k += 1
-                    voice_name + "_{}".format(str(k))
-            part.voices[new_voice_name] = new_voice
-            part.voice_quantization_records[new_voice_name] = quantization_record
+        part.voices[new_voice_name] = new_voice
+        part.voice_quantization_records[new_voice_name] = quantization_record
 
 
 def _quantize_performance_voice(voice, quantization_scheme, onset_weighting="default", termination_weighting="default",
@@ -23,7 +23,8 @@ provide export functionality to both MusicXML and LilyPond.
 from numbers import Real
 from .settings import quantization_settings, engraving_settings
 from expenvelope import Envelope
-from .quantization import QuantizationRecord, QuantizationScheme, QuantizedMeasure, TimeSignature
+from .quantization import QuantizationRecord, QuantizationScheme, QuantizedMeasure, TimeSignature, \
+    get_ticks_per_beat
 from . import performance as performance_module  # to distinguish it from variables named performance
 from .utilities import prime_factor, floor_x_to_pow_of_y, is_x_pow_of_y, ceil_to_multiple, floor_to_multiple
 from ._engraving_translations import length_to_note_type, get_xml_notehead, get_lilypond_notehead_name, \
@@ -157,7 +158,6 @@ def _get_beat_division_grids(beat_hierarchy):
     return out
 
 
-# should maybe memoize?
 def _is_single_note_viable_grouping(length_in_subdivisions, max_dots=1):
     """
     This tests if a note that is length_in_subdivisions subdivisions long can be represented by a single note.
@@ -165,13 +165,18 @@ def _is_single_note_viable_grouping(length_in_subdivisions, max_dots=1):
     can represent, with one notehead, a not of length 7 16th notes. The answer is False with max_dots = 1, but
     True with max_dots = 2, since a double-dotted quarter satisfies our requirement.
 
-    :param length_in_subdivisions: how many subdivisions we wish to combine
+    :param length_in_subdivisions: how many subdivisions we wish to combine (an integer)
     :param max_dots: max dots we are allowing
     """
-    dot_multipliers = [2 - 2**(-x) for x in range(max_dots+1)]
-    for dot_multiplier in dot_multipliers:
-        if Fraction(math.log2(length_in_subdivisions / dot_multiplier)).limit_denominator().denominator == 1:
-            return True
+    for num_dots in range(max_dots + 1):
+        # a note with num_dots dots is (2^(num_dots + 1) - 1) / 2^num_dots times its undotted length, so we check
+        # that dividing out that multiplier leaves us with a whole power of two
+        numerator = length_in_subdivisions * 2 ** num_dots
+        denominator = 2 ** (num_dots + 1) - 1
+        if numerator % denominator == 0:
+            undotted_length = numerator // denominator
+            if undotted_length > 0 and undotted_length & (undotted_length - 1) == 0:
+                return True
     return False
 
 
@@ -424,6 +429,25 @@ def _join_same_source_xml_note_group(same_source_group):
         same_source_group[-1].notations.append(pymusicxml.StopSlur(slur_id))
 
 
+def _get_measure_bin_signature(measure_content, time_signature, show_time_signature):
+    """
+    Summarizes the contents of a measure bin (see Staff._from_measure_bins_of_voice_lists) in a form that can be
+    compared between builds of a score, so as to tell when a previously built Measure can be reused. Notes are
+    identified by the _quantization_id given to them by requantize_performance_part along with their position,
+    since the same note may be split across several measures.
+    """
+    if measure_content is None:
+        return None, time_signature, show_time_signature
+    return tuple(
+        None if voice_content is None else (
+            tuple((note.properties.temp.get("_quantization_id"), note.start_beat, note.length)
+                  for note in voice_content[0]),
+            voice_content[1]
+        )
+        for voice_content in measure_content
+    ), time_signature, show_time_signature
+
+
 def _get_clef_from_average_pitch_and_clef_choices(average_pitch: float,
                                                   clef_choices: Sequence[Union[str, Tuple[str, Real]]]) -> str:
     # find the clef whose pitch center is closest to the average pitch
@@ -739,6 +763,9 @@ class Score(ScoreComponent, ScoreContainer):
         self.title = title
         self.composer = composer
         self.tempo_envelope = tempo_envelope
+        # if this score was built from an unquantized Performance, this keeps track of the quantization scheme used
+        # and of the intermediate results for each part, so that the score can be updated incrementally
+        self._performance_build = None
 
     @property
     def parts(self) -> Sequence[Union['StaffGroup', 'Staff']]:
@@ -824,10 +851,80 @@ class Score(ScoreComponent, ScoreContainer):
             raise AttributeError("Either the quantization_scheme or one or more of the quantization-related arguments "
                                  "can be defined, but not both.")
 
-        return Score.from_quantized_performance(
-            performance if quantization_scheme is None else performance.quantized(quantization_scheme),
-            title=title, composer=composer
+        if quantization_scheme is None:
+            return Score.from_quantized_performance(performance, title=title, composer=composer)
+
+        out = cls(
+            title=engraving_settings.get_default_title() if title == "default" else title,
+            composer=engraving_settings.get_default_composer() if composer == "default" else composer
         )
+        out._performance_build = {"quantization_scheme": quantization_scheme, "part_builds": []}
+        out._build_from_performance_parts(performance)
+        return out
+
+    def update_from_performance(self, performance: 'performance_module.Performance') -> 'Score':
+        """
+        Brings this Score up to date with edits made to the Performance it was built from, without starting from
+        scratch. Only the measures in which notes have been added, removed, or flagged as changed (see
+        :func:`~scamp.performance.PerformancePart.mark_dirty`) are re-quantized and rebuilt; everything else is reused.
+        This only works for a Score made via :func:`Score.from_performance` from a Performance that was not already
+        quantized; any other Score is simply rebuilt in full. Changes to the engraving settings in the meantime are
+        not picked up by the measures that get reused.
+
+        :param performance: the edited Performance
+        :return: this Score, having been updated
+        """
+        if self._performance_build is None:
+            rebuilt_score = Score.from_performance(performance)
+            self._contents, self._performance_build = rebuilt_score._contents, rebuilt_score._performance_build
+            self.tempo_envelope = rebuilt_score.tempo_envelope
+        else:
+            self._build_from_performance_parts(performance)
+        return self
+
+    def _build_from_performance_parts(self, performance: 'performance_module.Performance'):
+        """
+        (Re)builds the contents of this score from the parts of the given (unquantized) Performance, reusing whatever
+        is still valid from the last build as recorded in self._performance_build.
+        """
+        quantization_scheme = self._performance_build["quantization_scheme"]
+        previous_part_builds = self._performance_build["part_builds"]
+        part_builds = []
+        contents = []
+        for part in performance.parts:
+            part_build = next((x for x in previous_part_builds if x["part"] is part), None)
+            if part_build is None:
+                # a part we haven't seen before; everything about it needs to be built from scratch
+                part_build = {"part": part, "num_dirty_ranges": None, "voice_cache": {}, "measure_cache": {}}
+            part_builds.append(part_build)
+
+            if part_build["num_dirty_ranges"] is None or part_build["num_dirty_ranges"] < len(part._dirty_beat_ranges):
+                dirty_beat_ranges = part._dirty_beat_ranges[part_build["num_dirty_ranges"] or 0:]
+                part_build["num_dirty_ranges"] = len(part._dirty_beat_ranges)
+                quantized_part = part._quantized_incrementally(quantization_scheme, part_build["voice_cache"],
+                                                               dirty_beat_ranges)
+                if engraving_settings.ignore_empty_parts and quantized_part.num_measures() == 0:
+                    part_build["score_part"], part_build["num_measures_by_staff"] = None, ()
+                    continue
+                staff_group = StaffGroup._from_quantized_performance_part(quantized_part, part_build["measure_cache"])
+                part_build["score_part"] = staff_group if len(staff_group.staves) > 1 \
+                    else staff_group.staves[0] if len(staff_group.staves) == 1 else None
+                part_build["num_measures_by_staff"] = tuple(len(staff.measures) for staff in staff_group.staves)
+            elif part_build["score_part"] is not None:
+                # nothing has changed, so we can reuse the part as is, once we trim off any padding added last time
+                staves = part_build["score_part"].staves if isinstance(part_build["score_part"], StaffGroup) \
+                    else [part_build["score_part"]]
+                for staff, num_measures in zip(staves, part_build["num_measures_by_staff"]):
+                    del staff.measures[num_measures:]
+
+            if part_build["score_part"] is not None:
+                contents.append(part_build["score_part"])
+
+        self._performance_build["part_builds"] = part_builds
+        self._contents = contents
+        self.tempo_envelope = performance.tempo_envelope
+        if engraving_settings.pad_incomplete_parts:
+            self._pad_incomplete_parts()
 
     @classmethod
     def from_quantized_performance(cls, performance: 'performance_module.Performance',
@@ -1198,6 +1295,18 @@ class StaffGroup(ScoreComponent, ScoreContainer):
 
         :param quantized_performance_part: an already quantized PerformancePart
         """
+        return cls._from_quantized_performance_part(quantized_performance_part)
+
+    @classmethod
+    def _from_quantized_performance_part(cls, quantized_performance_part: 'performance_module.PerformancePart',
+                                         measure_cache: dict = None) -> 'StaffGroup':
+        """
+        Implementation of from_quantized_performance_part, with the option of reusing previously built measures.
+
+        :param quantized_performance_part: an already quantized PerformancePart
+        :param measure_cache: (optional) dictionary in which to look for, and store, the Measures built for each staff
+            (see Staff._from_measure_bins_of_voice_lists)
+        """
         assert quantized_performance_part.is_quantized()
 
         fragments = StaffGroup._separate_voices_into_fragments(quantized_performance_part)
@@ -1208,7 +1317,7 @@ class StaffGroup(ScoreComponent, ScoreContainer):
 
         return StaffGroup._from_measure_voice_grid(
             measure_voice_grid, quantized_performance_part._get_longest_quantization_record(),
-            name=staff_group_name, clef_choices=quantized_performance_part.clef_preference
+            name=staff_group_name, clef_choices=quantized_performance_part.clef_preference, measure_cache=measure_cache
         )
 
     @staticmethod
@@ -1372,13 +1481,15 @@ class StaffGroup(ScoreComponent, ScoreContainer):
 
     @classmethod
     def _from_measure_voice_grid(cls, measure_bins, quantization_record: QuantizationRecord, name: str = None,
-                                 clef_choices: Sequence[Union[str, Tuple[str, Real]]] = None):
+                                 clef_choices: Sequence[Union[str, Tuple[str, Real]]] = None,
+                                 measure_cache: dict = None):
         """
         Creates a StaffGroup with Staves that accommodate engraving_settings.max_voices_per_part voices each
 
         :param measure_bins: a list of voice lists (can be many voices each)
         :param quantization_record: a QuantizationRecord
         :param name: name for the staff group; the staves will get named, e.g. "piano [1]", "piano [2]", etc.
+        :param measure_cache: (optional) dictionary mapping staff numbers to the measure caches for each staff
         """
         num_staffs_required = 1 if len(measure_bins) == 0 else \
             int(max(math.ceil(len(x) / engraving_settings.max_voices_per_part) for x in measure_bins))
@@ -1424,7 +1535,8 @@ class StaffGroup(ScoreComponent, ScoreContainer):
             [
                 Staff._from_measure_bins_of_voice_lists(
                     staff, quantization_record.time_signatures,
-                    name=name + " ({})".format(str(i + 1)) if len(staves) > 1 else name
+                    name=name + " ({})".format(str(i + 1)) if len(staves) > 1 else name,
+                    measure_cache=None if measure_cache is None else measure_cache.setdefault(i, {})
                 )
                 for i, staff in enumerate(staves)
             ], name=name, clef_choices=clef_choices
@@ -1495,7 +1607,7 @@ class Staff(ScoreComponent, ScoreContainer):
 
     @classmethod
     def _from_measure_bins_of_voice_lists(cls, measure_bins, time_signatures: Sequence[TimeSignature],
-                                          name: str = None) -> 'Staff':
+                                          name: str = None, measure_cache: dict = None) -> 'Staff':
         """
         Constructs a Staff from a specially formatted list of measures
 
@@ -1508,6 +1620,10 @@ class Staff(ScoreComponent, ScoreContainer):
 
             This format is constructed inside of StaffGroup._from_measure_voice_grid
         :param time_signatures: list of TimeSignature objects for each measure
+        :param name: name of the staff
+        :param measure_cache: (optional) dictionary mapping measure numbers to (signature, Measure) tuples from a
+            previous build of this staff. Any measure whose contents have the same signature is reused rather than
+            rebuilt, and the cache is updated with the measures of this build.
         """
         # Expects a list of measure bins formatted as outputted by StaffGroup._from_measure_bins_of_voice_lists
         #   (1) None, indicating an empty measure
@@ -1516,10 +1632,27 @@ class Staff(ScoreComponent, ScoreContainer):
         #       - None, in the case of an empty voice
         time_signature_changes = [True] + [time_signatures[i - 1] != time_signatures[i]
                                            for i in range(1, len(time_signatures))]
-        return cls([Measure.from_list_of_performance_voices(measure_content, time_signature, show_time_signature)
-                    if measure_content is not None else Measure.empty_measure(time_signature, show_time_signature)
-                    for measure_content, time_signature, show_time_signature in zip(measure_bins, time_signatures,
-                                                                                    time_signature_changes)], name=name)
+        measures = []
+        for measure_num, (measure_content, time_signature, show_time_signature) in \
+                enumerate(zip(measure_bins, time_signatures, time_signature_changes)):
+            if measure_cache is not None:
+                signature = _get_measure_bin_signature(measure_content, time_signature, show_time_signature)
+                if measure_num in measure_cache and measure_cache[measure_num][0] == signature:
+                    measure = measure_cache[measure_num][1]
+                    # the clef gets chosen afresh by the StaffGroup, just as it would be for a new measure
+                    measure.clef = None
+                    measures.append(measure)
+                    continue
+            measure = Measure.from_list_of_performance_voices(measure_content, time_signature, show_time_signature) \
+                if measure_content is not None else Measure.empty_measure(time_signature, show_time_signature)
+            if measure_cache is not None:
+                measure_cache[measure_num] = signature, measure
+            measures.append(measure)
+
+        if measure_cache is not None:
+            for measure_num in [x for x in measure_cache if x >= len(measures)]:
+                del measure_cache[measure_num]
+        return cls(measures, name=name)
 
     def _to_abjad(self):
         # from the point of view of the source_id_dict (which helps us connect tied notes), the staff is
@@ -1760,44 +1893,67 @@ class Voice(ScoreComponent, ScoreContainer):
         :param notes: the list of PerformanceNotes played in this measure
         :param measure_quantization: the quantization used for this measure for this voice
         """
-        length = measure_quantization.measure_length
+        # from here on, all time points are measured in integer ticks, chosen so that every quantized division point
+        # in the measure lands on a whole tick. This lets us do all the splitting and grouping with exact arithmetic.
+        ticks_per_beat = get_ticks_per_beat(measure_quantization)
+        length = int(round(measure_quantization.measure_length * ticks_per_beat))
 
         # split any notes that have a tuple length into segments of those lengths
         notes = [segment for note in notes for segment in note.split_at_length_divisions()]
 
-        # change each PerformanceNote to have a start_beat relative to the start of the measure
+        # change each PerformanceNote to have a start_beat (in ticks) relative to the start of the measure
         for note in notes:
-            note.start_beat -= measure_quantization.start_beat
+            Voice._convert_note_to_ticks(note, measure_quantization.start_beat, ticks_per_beat)
 
         notes = Voice._fill_in_rests(notes, length)
         # break notes that cross beat boundaries into two tied notes
         # later, some of these can be recombined, but we need to convert them to NoteLikes first
 
-        notes = Voice._split_notes_at_beats(notes, [beat.start_beat_in_measure for beat in measure_quantization.beats])
+        notes = Voice._split_notes_at_beats(notes, [int(round(beat.start_beat_in_measure * ticks_per_beat))
+                                                    for beat in measure_quantization.beats])
 
         # construct the processed contents of this voice (made up of NoteLikes Tuplets)
         processed_beats = []
         for beat_quantization in measure_quantization.beats:
             notes_from_this_beat = []
+            beat_end = int(round((beat_quantization.start_beat_in_measure + beat_quantization.length) * ticks_per_beat))
 
-            while len(notes) > 0 and \
-                    notes[0].start_beat + 1e-10 < beat_quantization.start_beat_in_measure + beat_quantization.length:
+            while len(notes) > 0 and notes[0].start_beat < beat_end:
                 # go through all the notes in this beat
                 notes_from_this_beat.append(notes.pop(0))
 
-            processed_beats.append(Voice._process_and_convert_beat(notes_from_this_beat, beat_quantization))
+            processed_beats.append(Voice._process_and_convert_beat(notes_from_this_beat, beat_quantization,
+                                                                   ticks_per_beat))
 
         processed_contents = Voice._recombine_processed_beats(processed_beats, measure_quantization)
 
         # instantiate and return the constructed voice
         return cls(processed_contents, measure_quantization.time_signature)
 
+    @staticmethod
+    def _convert_note_to_ticks(note, measure_start_beat, ticks_per_beat):
+        start_tick = int(round((note.start_beat - measure_start_beat) * ticks_per_beat))
+        end_tick = int(round((note.end_beat - measure_start_beat) * ticks_per_beat))
+        note.start_beat, note.length = start_tick, end_tick - start_tick
+        # glissando curves are defined over the length of the note, so they need to be stretched to match
+        if note.length > 0:
+            Voice._normalize_pitch_curves(note.pitch, note.length)
+
+    @staticmethod
+    def _normalize_pitch_curves(pitch, duration):
+        if isinstance(pitch, Envelope):
+            pitch.normalize_to_duration(duration)
+        elif isinstance(pitch, tuple):
+            for pitch_curve in pitch:
+                if isinstance(pitch_curve, Envelope):
+                    pitch_curve.normalize_to_duration(duration)
+
     @staticmethod
     def _fill_in_rests(notes, total_length):
         notes_and_rests = []
         t = 0
         for note in notes:
-            if t + 1e-10 < note.start_beat:
+            if t < note.start_beat:
                 notes_and_rests.append(performance_module.PerformanceNote(t, note.start_beat - t, None, None, {}))
             notes_and_rests.append(note)
             t = note.end_beat
@@ -1816,7 +1972,7 @@ class Voice(ScoreComponent, ScoreContainer):
         return notes
 
     @staticmethod
-    def _process_and_convert_beat(beat_notes, beat_quantization):
+    def _process_and_convert_beat(beat_notes, beat_quantization, ticks_per_beat):
         beat_start = beat_notes[0].start_beat
 
         # this covers the case in which a single voice was quantized, some notes overlapped so it had to be split in
@@ -1830,7 +1986,10 @@ class Voice(ScoreComponent, ScoreContainer):
         if divisor is None:
             # if there's no beat divisor, then it should just be a note or rest of the full length of the beat
             assert len(beat_notes) == 1
-            pitch, length, properties = beat_notes[0].pitch, beat_notes[0].length, beat_notes[0].properties
+            pitch, length, properties = \
+                beat_notes[0].pitch, Fraction(beat_notes[0].length, ticks_per_beat), beat_notes[0].properties
+            # put any glissando curves back in units of beats
+            Voice._normalize_pitch_curves(pitch, float(length))
 
             if _is_single_note_length(length):
                 return [NoteLike(pitch, length, properties)]
@@ -1841,8 +2000,11 @@ class Voice(ScoreComponent, ScoreContainer):
         # otherwise, if the divisor requires a tuplet, we construct it
         tuplet = Tuplet.from_length_and_divisor(beat_quantization.length, divisor) if divisor is not None else None
 
-        dilation_factor = 1 if tuplet is None else tuplet.dilation_factor()
-        written_division_length = beat_quantization.length / divisor * dilation_factor
+        beat_length_in_ticks = int(round(beat_quantization.length * ticks_per_beat))
+        ticks_per_division = beat_length_in_ticks // divisor
+        written_division_length = Fraction(beat_length_in_ticks, divisor * ticks_per_beat)
+        if tuplet is not None:
+            written_division_length *= Fraction(tuplet.tuplet_divisions, tuplet.normal_divisions)
 
         # these versions go from small to big prime factors and vice-versa
         # so for one 6 is 3x2, for the other it's 2x3. We try both options in case one fits better
@@ -1867,8 +2029,8 @@ class Voice(ScoreComponent, ScoreContainer):
             hierarchy2_badness = 0
 
         for note in beat_notes:
-            start_division = int(round((note.start_beat - beat_start) / beat_quantization.length * divisor))
-            length_in_divisions = int(round(note.length_sum() / beat_quantization.length * divisor))
+            start_division = (note.start_beat - beat_start) // ticks_per_division
+            length_in_divisions = note.length_sum() // ticks_per_division
             end_division = start_division + length_in_divisions
 
             division_points1, score1 = Voice._get_division_points_for_note(
@@ -1888,22 +2050,24 @@ class Voice(ScoreComponent, ScoreContainer):
             note_division_points_list = note_division_points_list2
 
         for note, division_points in zip(beat_notes, note_division_points_list):
-            written_length_components = [
-                (div_point - last_div_point) * written_division_length
+            segment_lengths_in_divisions = [
+                div_point - last_div_point
                 for last_div_point, div_point in zip(division_points[:-1], division_points[1:])
             ]
 
             note_parts = []
             remainder = note
-            for segment_length in written_length_components:
+            for segment_divisions in segment_lengths_in_divisions:
 
-                split_note = remainder.split_at_beat(remainder.start_beat + segment_length / dilation_factor)
+                split_note = remainder.split_at_beat(remainder.start_beat + segment_divisions * ticks_per_division)
                 if len(split_note) > 1:
                     this_segment, remainder = split_note
                 else:
                     this_segment = split_note[0]
 
-                note_parts.append(NoteLike(this_segment.pitch, segment_length, this_segment.properties))
+                Voice._normalize_pitch_curves(this_segment.pitch, this_segment.length / ticks_per_beat)
+                note_parts.append(NoteLike(this_segment.pitch, segment_divisions * written_division_length,
+                                           this_segment.properties))
 
             note_list.extend(note_parts)
 
@@ -2245,7 +2409,9 @@ class NoteLike(ScoreComponent):
                  properties: NotePropertiesDictionary):
 
         self.pitch = pitch
-        self.written_length = Fraction(written_length).limit_denominator()
+        # lengths computed from integer ticks arrive as exact Fractions already
+        self.written_length = written_length if isinstance(written_length, Fraction) \
+            else Fraction(written_length).limit_denominator()
         self.properties = properties if isinstance(properties, NotePropertiesDictionary) \
             else NotePropertiesDictionary.from_unknown_format(properties)
 
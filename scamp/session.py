@@ -23,14 +23,23 @@ from .transcriber import Transcriber
 from ._midi import get_available_midi_input_devices, get_port_number_of_midi_device, \
     print_available_midi_input_devices, print_available_midi_output_devices, start_midi_listener
 from .instruments import Ensemble, ScampInstrument
-from clockblocks import Clock, current_clock
+from clockblocks import Clock, current_clock, DeadClockError
 from .utilities import SavesToJSON
 from ._dependencies import pynput, pythonosc
 from threading import Thread, current_thread
 from .spelling import SpellingPolicy
-from typing import Union, Tuple, Iterator, Callable, Sequence
+from typing import Union, Tuple, Iterator, Callable, Sequence, Dict, Optional
 from .performance import Performance
+from .performance_archive import PerformanceArchive
+from ._input_coalescer import InputCoalescer
+from .playback_metrics import PlaybackMetrics
+from .playback_trace import PlaybackTrace
+from contextlib import contextmanager
+import functools
 import threading
+import inspect
+import logging
+import time
 
 
 class Session(Clock, Ensemble, Transcriber, SavesToJSON):
@@ -48,19 +57,37 @@ class Session(Clock, Ensemble, Transcriber, SavesToJSON):
         overridden at instrument creation.)
     :param default_midi_output_device: the default midi_output_device (by name or port number) for outgoing midi
         streams. (Again, can be overridden at instrument creation.)
+    :param playback_latency: the latency, in seconds, with which instruments in this session produce their output, so
+        that the musical logic can run ahead of the sound. (See :attr:`~scamp.instruments.Ensemble.playback_latency`.)
+        If "default", defers to the scamp global playback_settings default.
+    :param render_only: if True, this Session never plays anything back, but only generates music as fast as possible
+        for transcription. (See :attr:`render_only`.)
     """
 
     def __init__(self, tempo: float = 60, default_soundfont: str = "default", default_audio_driver: str = "default",
                  default_midi_output_device: Union[str, int] = "default",
                  default_spelling_policy: Union[SpellingPolicy, str, tuple] = None,
-                 instruments: Sequence['ScampInstrument'] = None, max_threads=200):
+                 instruments: Sequence['ScampInstrument'] = None, max_threads=200, playback_latency: float = "default",
+                 render_only: bool = False):
         Clock.__init__(self, name="MASTER", initial_tempo=tempo, pool_size=max_threads)
         Ensemble.__init__(self, default_soundfont=default_soundfont, default_audio_driver=default_audio_driver,
                           default_midi_output_device=default_midi_output_device,
-                          default_spelling_policy=default_spelling_policy, instruments=instruments)
+                          default_spelling_policy=default_spelling_policy, instruments=instruments,
+                          playback_latency=playback_latency)
         Transcriber.__init__(self)
 
         self._listeners = {"midi": {}, "osc": {}}
+        # rate-limits the mouse and OSC listeners that ask for it
+        self._input_coalescer = InputCoalescer(self)
+        # the asyncio event loop this session is being served on (see serve_async), if any
+        self._event_loop = None
+        # set while recording metrics (see start_recording_metrics)
+        self._playback_metrics = None
+        # set while tracing (see start_tracing)
+        self._playback_trace = None
+        self._render_only = False
+        if render_only:
+            self.render_only = True
 
     def run_as_server(self) -> 'Session':
         """
@@ -71,16 +98,92 @@ class Session(Clock, Ensemble, Transcriber, SavesToJSON):
         """
         def run_server():
             current_thread().__clock__ = self
-            while True:
-                current_clock().wait_forever()
+            try:
+                while True:
+                    current_clock().wait_forever()
+            except DeadClockError:
+                # the session has been killed, so there's nothing more to serve
+                pass
 
         Thread(target=run_server, daemon=True).start()
         # don't have the thread that called this recognize the Session as its clock anymore
         current_thread().__clock__ = None
         return self
 
+    async def serve_async(self) -> None:
+        """
+        The asyncio counterpart of :func:`run_as_server`, for embedding a Session in an asyncio application: run it as
+        a task (e.g. :code:`asyncio.create_task(s.serve_async())`), and the Session acts as a server for as long as the
+        task is running. In the meantime, OSC listeners are served by datagram endpoints on the event loop, rather than
+        by threads of their own that poll for messages, and coroutines can use :func:`run_async`, :func:`wait_async`
+        and :func:`~scamp.instruments.ScampInstrument.play_note_async`. When the task is cancelled (e.g. when the
+        application shuts down), all of the listeners are removed and the Session is killed.
+        """
+        import asyncio
+        self._event_loop = asyncio.get_running_loop()
+        self.run_as_server()
+        try:
+            await self._event_loop.create_future()
+        finally:
+            self._event_loop = None
+            self.remove_all_listeners()
+            self.kill()
+
+    async def run_async(self, function: Callable, *args, **kwargs):
+        """
+        Forks the given function on this Session, and waits for it to finish without blocking the event loop. For
+        use in coroutines while the Session is running as a server (see :func:`serve_async`).
+
+        :param function: the function to run
+        :param args: positional arguments to pass to the function
+        :param kwargs: keyword arguments to pass to the function
+        :return: whatever the function returns (or raises)
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(result, exception):
+            if future.done():
+                # the awaiting coroutine was cancelled
+                return
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+
+        def process():
+            try:
+                result = function(*args, **kwargs)
+            except Exception as e:
+                loop.call_soon_threadsafe(resolve, None, e)
+            else:
+                loop.call_soon_threadsafe(resolve, result, None)
+
+        self.fork(process)
+        return await future
+
+    async def wait_async(self, dt: float, units: str = "beats") -> None:
+        """
+        Waits for the given number of beats (or seconds) of this Session's clock without blocking the event loop. For
+        use in coroutines while the Session is running as a server (see :func:`serve_async`).
+
+        :param dt: how long to wait
+        :param units: either "beats" or "time"
+        """
+        await self.run_async(lambda: current_clock().wait(dt, units=units))
+
     # ----------------------------------- Listeners ----------------------------------
 
+    @property
+    def num_dropped_input_events(self) -> int:
+        """
+        How many incoming mouse movements and OSC messages have been dropped by rate-limited listeners (see the
+        `max_rate` argument of :func:`register_osc_listener` and the `max_move_rate` argument of
+        :func:`register_mouse_listener`), since a later event superseded them before they could be passed on.
+        """
+        return self._input_coalescer.num_dropped_events
+
     @staticmethod
     def get_available_midi_input_devices() -> Iterator[Tuple[int, str]]:
         """
@@ -102,7 +205,8 @@ class Session(Clock, Ensemble, Transcriber, SavesToJSON):
         """
         return print_available_midi_output_devices()
 
-    def register_midi_listener(self, port_number_or_device_name: Union[int, str], callback_function: Callable) -> None:
+    def register_midi_listener(self, port_number_or_device_name: Union[int, str], callback_function: Callable,
+                               batch_interval: float = None, coalesce_controllers: bool = False) -> None:
         """
         Register a callback_function to respond to incoming midi events from port_number_or_device_name
 
@@ -110,6 +214,11 @@ class Session(Clock, Ensemble, Transcriber, SavesToJSON):
             number will be determined. (Fuzzy string matching is used to pick the device with closest name.)
         :param callback_function: the callback function used when a new midi event arrives. Should take either one
             argument (the midi message) or two arguments (the midi message, and the dt since the last message)
+        :param batch_interval: if not None, incoming messages are queued up and passed to the callback function in
+            batches, at most every this many seconds, waking up the session once per batch rather than once per
+            message. Useful for dense streams of controller data (MPE, aftertouch, etc.).
+        :param coalesce_controllers: if True (requires a batch_interval), only the latest value of each controller,
+            pitch bend and aftertouch in a batch is passed on to the callback function
         """
         port_number = get_port_number_of_midi_device(port_number_or_device_name, "input") \
             if isinstance(port_number_or_device_name, str) else port_number_or_device_name
@@ -121,7 +230,10 @@ class Session(Clock, Ensemble, Transcriber, SavesToJSON):
 
         if port_number in self._listeners["midi"]:
             self.remove_midi_listener(port_number)
-        self._listeners["midi"][port_number] = start_midi_listener(port_number, callback_function, clock=self)
+        callback_function = self._traced_callback(callback_function, "midi")
+        self._listeners["midi"][port_number] = start_midi_listener(port_number, callback_function, clock=self,
+                                                                   batch_interval=batch_interval,
+                                                                   coalesce_controllers=coalesce_controllers)
 
     def remove_midi_listener(self, port_number_or_device_name: Union[int, str]) -> None:
         """
@@ -138,7 +250,7 @@ class Session(Clock, Ensemble, Transcriber, SavesToJSON):
         del self._listeners["midi"][port_number]
 
     def register_osc_listener(self, port: int, osc_address_pattern: str, callback_function: Callable,
-                              ip_address: str = "127.0.0.1") -> None:
+                              ip_address: str = "127.0.0.1", max_rate: float = None) -> None:
         """
         Register a callback function for OSC messages on a given address/port with given pattern
 
@@ -147,18 +259,42 @@ class Session(Clock, Ensemble, Transcriber, SavesToJSON):
         :param callback_function: function to call upon receiving a message. The first argument of the function will
             be the address, and the remaining arguments will be those passed along in the osc message.
         :param ip_address: ip address on which to receive messages
+        :param max_rate: if given, the callback function is called at most this many times per second for each
+            address; when messages come in faster than that, only the latest one for each address is passed on, and
+            the rest are dropped (and counted in :attr:`num_dropped_input_events`). Useful for sensor-style streams.
         """
         if pythonosc is None:
             raise ImportError("Package python-osc not found; cannot set up osc listener.")
 
-        def callback_wrapper(*args, **kwargs):
-            self.rouse_and_hold()
-            threading.current_thread().__clock__ = self
-            callback_function(*args, **kwargs)
-            threading.current_thread().__clock__ = None
-            self.release_from_suspension()
+        callback_function = self._traced_callback(callback_function, "osc")
+        if max_rate is not None:
+            # pythonosc calls every handler whose pattern matches the address, so the key includes which handler this
+            # is; otherwise two rate-limited listeners matching the same address would supersede each other's events
+            coalescing_key = ("osc", ip_address, port, osc_address_pattern, id(callback_function))
 
-        if (ip_address, port) not in self._listeners["osc"]:
+            def callback_wrapper(address, *args):
+                self._input_coalescer.submit(coalescing_key + (address, ), 1 / max_rate,
+                                             callback_function, (address, ) + args)
+        else:
+            def callback_wrapper(*args, **kwargs):
+                self.rouse_and_hold()
+                threading.current_thread().__clock__ = self
+                callback_function(*args, **kwargs)
+                threading.current_thread().__clock__ = None
+                self.release_from_suspension()
+
+        if (ip_address, port) not in self._listeners["osc"] and self._event_loop is not None:
+            # we're being served on an event loop, so just open a datagram endpoint on it
+            import asyncio
+            dispatcher = pythonosc.dispatcher.Dispatcher()
+            server = pythonosc.osc_server.AsyncIOOSCUDPServer((ip_address, port), dispatcher, self._event_loop)
+            self._listeners["osc"][(ip_address, port)] = {
+                # a concurrent.futures.Future for the (transport, protocol) pair; we can't wait for it here, since we
+                # may well be on the event loop's thread
+                "endpoint": asyncio.run_coroutine_threadsafe(server.create_serve_endpoint(), self._event_loop),
+                "dispatcher": dispatcher
+            }
+        elif (ip_address, port) not in self._listeners["osc"]:
             dispatcher = pythonosc.dispatcher.Dispatcher()
             self._listeners["osc"][(ip_address, port)] = {
                 "server": pythonosc.osc_server.ThreadingOSCUDPServer((ip_address, port), dispatcher),
@@ -176,7 +312,14 @@ class Session(Clock, Ensemble, Transcriber, SavesToJSON):
         :param ip_address: ip_address of the listener to remove
         """
         if (ip_address, port) in self._listeners["osc"]:
-            self._listeners["osc"][(ip_address, port)]["server"].shutdown()
+            listener = self._listeners["osc"][(ip_address, port)]
+            if "endpoint" in listener:
+                # close the transport once it exists (which it may not yet)
+                listener["endpoint"].add_done_callback(
+                    lambda endpoint: endpoint.exception() is None and endpoint.result()[0].close()
+                )
+            else:
+                listener["server"].shutdown()
             del self._listeners["osc"][(ip_address, port)]
 
     def register_keyboard_listener(self, on_press: Callable = None, on_release: Callable = None,
@@ -192,6 +335,8 @@ class Session(Clock, Ensemble, Transcriber, SavesToJSON):
             raise ImportError("Cannot use keyboard input because package pynput was not found. "
                               "Install pynput and try again.")
         self.remove_keyboard_listener()  # in case one is already running
+        on_press = self._traced_callback(on_press, "key_press")
+        on_release = self._traced_callback(on_release, "key_release")
 
         keys_down = []
         if on_press is not None:
@@ -276,7 +421,7 @@ class Session(Clock, Ensemble, Transcriber, SavesToJSON):
 
     def register_mouse_listener(self, on_move: Callable = None, on_press: Callable = None, on_release: Callable = None,
                                 on_scroll: Callable = None, suppress: bool = False, relative_coordinates: bool = False,
-                                **kwargs) -> None:
+                                max_move_rate: float = None, **kwargs) -> None:
         """
         Register a callback_function to respond to incoming mouse events
 
@@ -289,11 +434,17 @@ class Session(Clock, Ensemble, Transcriber, SavesToJSON):
         :param relative_coordinates: if True (requires tkinter library), x and y values are normalized to screen width
             and height and are floating point. Otherwise they are ints in units of pixels.
         :param suppress: if true, mouse events are consumed and not passed on to other processes
+        :param max_move_rate: if given, on_move is called at most this many times per second, with the latest
+            position; the movements in between are dropped (and counted in :attr:`num_dropped_input_events`)
         """
         if pynput is None:
             raise ImportError("Cannot use mouse input because package pynput was not found. "
                               "Install pynput and try again.")
         self.remove_mouse_listener()  # in case one is already running
+        on_move = self._traced_callback(on_move, "mouse_move")
+        on_press = self._traced_callback(on_press, "mouse_press")
+        on_release = self._traced_callback(on_release, "mouse_release")
+        on_scroll = self._traced_callback(on_scroll, "mouse_scroll")
 
         if relative_coordinates:
             try:
@@ -309,7 +460,11 @@ class Session(Clock, Ensemble, Transcriber, SavesToJSON):
 
         # on_move and on_scroll are surrounded with a very simple wrapper that rouses the session and defines it as
         # the current clock on the thread of the callback function
-        if on_move is not None:
+        if on_move is not None and max_move_rate is not None:
+            def on_move_wrapper(x, y):
+                self._input_coalescer.submit(("mouse_move", ), 1 / max_move_rate, on_move,
+                                             (x * x_scale, y * y_scale))
+        elif on_move is not None:
             def on_move_wrapper(x, y):
                 self.rouse_and_hold()
                 threading.current_thread().__clock__ = self
@@ -358,10 +513,219 @@ class Session(Clock, Ensemble, Transcriber, SavesToJSON):
             self._listeners["mouse"].stop()
             del self._listeners["mouse"]
 
+    def _traced_callback(self, callback_function, listener_type):
+        # wraps a listener callback so that, whenever this session is being traced, each call shows up as a span
+        if callback_function is None:
+            return None
+
+        # functools.wraps makes the wrapper report the signature of the callback function, which is inspected by the
+        # MIDI listener to see whether it takes a dt argument
+        @functools.wraps(callback_function)
+        def traced_callback_function(*args, **kwargs):
+            trace = self._playback_trace
+            if trace is None:
+                return callback_function(*args, **kwargs)
+            with trace.span(listener_type, "listener"):
+                return callback_function(*args, **kwargs)
+
+        return traced_callback_function
+
+    def remove_all_listeners(self) -> None:
+        """
+        Removes all of the MIDI, OSC, keyboard and mouse listeners from this Session.
+        """
+        for port_number in list(self._listeners["midi"]):
+            self.remove_midi_listener(port_number)
+        for ip_address, port in list(self._listeners["osc"]):
+            self.remove_osc_listener(port, ip_address)
+        self.remove_keyboard_listener()
+        self.remove_mouse_listener()
+
+    # ------------------------------- Metrics and Tracing ------------------------------
+
+    def start_recording_metrics(self, log_interval: float = None, sample_interval: float = 0.1,
+                                max_samples: int = 10000) -> PlaybackMetrics:
+        """
+        Starts measuring how punctually this Session carries out its playback: how late notes start and end compared
+        to when they were scheduled (per instrument), how late the updates of animated parameters are, how many of the
+        threads in the thread pool are in use, and how many forked processes are running. (See
+        :class:`~scamp.playback_metrics.PlaybackMetrics` for details.)
+
+        :param log_interval: if given, a summary of the metrics is logged (at the INFO level) every this many seconds
+        :param sample_interval: how often (in seconds) to sample the thread pool and the number of processes
+        :param max_samples: how many of the most recent measurements of each metric to keep
+        :return: the PlaybackMetrics object that the measurements are recorded to (also available as
+            :attr:`playback_metrics`)
+        """
+        self.stop_recording_metrics()
+        metrics = self._playback_metrics = PlaybackMetrics(max_samples)
+
+        def sample_periodically():
+            last_log_time = time.time()
+            while self._playback_metrics is metrics and self.alive:
+                if self._pool_semaphore is not None:
+                    metrics.record("pool_threads_in_use",
+                                   self._pool_semaphore._initial_value - self._pool_semaphore._value)
+                metrics.record("active_processes", len(self.descendants()))
+                if log_interval is not None and time.time() - last_log_time >= log_interval:
+                    logging.info(metrics.report())
+                    last_log_time = time.time()
+                time.sleep(sample_interval)
+
+        Thread(target=sample_periodically, daemon=True, name="SCAMP_METRICS").start()
+        return metrics
+
+    def stop_recording_metrics(self) -> Optional[PlaybackMetrics]:
+        """
+        Stops measuring playback metrics.
+
+        :return: the PlaybackMetrics object that the measurements were recorded to, if metrics were being recorded
+        """
+        metrics, self._playback_metrics = self._playback_metrics, None
+        return metrics
+
+    @property
+    def playback_metrics(self) -> Optional[PlaybackMetrics]:
+        """
+        The PlaybackMetrics object that measurements are currently being recorded to (None if metrics are not being
+        recorded). See :func:`start_recording_metrics`.
+        """
+        return self._playback_metrics
+
+    def start_tracing(self, max_events: int = 1000000) -> PlaybackTrace:
+        """
+        Starts recording a timeline of this Session's playback: a span for the lifetime of each note, for the
+        transcription of each finished note, for each run of an animated parameter, for each process forked on the
+        Session and each wait call on it, and for each call to a listener callback, all tagged with the thread they
+        ran on. Save it with :func:`~scamp.playback_trace.PlaybackTrace.save` (or by passing a file path to
+        :func:`stop_tracing`) and open it in Perfetto (https://ui.perfetto.dev) to see where time is being spent.
+        Processes forked before tracing started, and those forked from other clocks, are not traced.
+
+        :param max_events: how many of the most recent events to keep
+        :return: the PlaybackTrace object that events are recorded to (also available as :attr:`playback_trace`)
+        """
+        self._playback_trace = PlaybackTrace(max_events)
+        return self._playback_trace
+
+    def stop_tracing(self, file_path: str = None) -> Optional[PlaybackTrace]:
+        """
+        Stops recording the timeline of this Session's playback.
+
+        :param file_path: if given, the trace is saved to this file, in the Trace Event (JSON) format
+        :return: the PlaybackTrace object that events were recorded to, if tracing was on
+        """
+        trace, self._playback_trace = self._playback_trace, None
+        if trace is not None and file_path is not None:
+            trace.save(file_path)
+        return trace
+
+    @property
+    def playback_trace(self) -> Optional[PlaybackTrace]:
+        """
+        The PlaybackTrace object that events are currently being recorded to (None if not tracing). See
+        :func:`start_tracing`.
+        """
+        return self._playback_trace
+
+    def fork(self, process_function: Callable, *args, **kwargs) -> Clock:
+        trace = self._playback_trace
+        if trace is not None:
+            untraced_process_function = process_function
+
+            # functools.wraps lets the clock see the signature of the original function, which it inspects to decide
+            # whether to pass the child clock as the first argument
+            @functools.wraps(untraced_process_function)
+            def process_function(*process_args, **process_kwargs):
+                clock = current_clock()
+                with trace.span(getattr(untraced_process_function, "__name__", "process"), "clock",
+                                clock=clock.name if clock is not None else None):
+                    untraced_process_function(*process_args, **process_kwargs)
+
+        return super().fork(process_function, *args, **kwargs)
+
+    def wait(self, dt: float, units: str = "beats", sub_call: bool = False) -> float:
+        trace = self._playback_trace
+        if trace is None or sub_call:
+            return super().wait(dt, units=units, sub_call=sub_call)
+        with trace.span("wait", "clock", dt=dt, units=units):
+            return super().wait(dt, units=units, sub_call=sub_call)
+
+    def wait_for_children_to_finish(self) -> None:
+        trace = self._playback_trace
+        if trace is None:
+            return super().wait_for_children_to_finish()
+        with trace.span("wait_for_children_to_finish", "clock"):
+            return super().wait_for_children_to_finish()
+
+    fork.__doc__ = Clock.fork.__doc__
+    wait.__doc__ = Clock.wait.__doc__
+    wait_for_children_to_finish.__doc__ = Clock.wait_for_children_to_finish.__doc__
+
+    # ----------------------------------- Rendering ----------------------------------
+
+    @property
+    def render_only(self) -> bool:
+        """
+        When True, this Session renders music instead of playing it back: the master clock fast-forwards indefinitely,
+        so that every call to `wait` advances the clock instantly, and all notes are silent, so that they are only
+        transcribed. New parts are created without any playback implementations (i.e. :func:`new_part`,
+        :func:`new_midi_part` and :func:`new_osc_part` all act like :func:`new_silent_part`), so that no soundfont is
+        loaded and no MIDI or OSC port opened. Since the timing of each process is determined solely by its wait calls,
+        the resulting transcription is identical from one run to the next. (Note that a process that loops forever
+        will never let a render finish.)
+        """
+        return self._render_only
+
+    @render_only.setter
+    def render_only(self, value: bool):
+        if value == self._render_only:
+            return
+        self._render_only = value
+        # fast-forwarding to infinity means the master clock never sleeps
+        self._fast_forward_goal = float("inf") if value else None
+
+    @contextmanager
+    def rendering(self) -> Iterator['Session']:
+        """
+        Context manager that puts this Session in :attr:`render_only` mode for the duration of a with block, and then
+        waits for all forked processes to finish (still rendering), before going back to real-time playback. For
+        example: :code:`with session.rendering(): session.fork(...)`.
+        """
+        was_render_only = self.render_only
+        self.render_only = True
+        try:
+            yield self
+            self.wait_for_children_to_finish()
+        finally:
+            self.render_only = was_render_only
+
+    def new_part(self, *args, **kwargs) -> ScampInstrument:
+        return self._new_silent_part_if_rendering(super().new_part, *args, **kwargs)
+
+    def new_midi_part(self, *args, **kwargs) -> ScampInstrument:
+        return self._new_silent_part_if_rendering(super().new_midi_part, *args, **kwargs)
+
+    def new_osc_part(self, *args, **kwargs) -> ScampInstrument:
+        return self._new_silent_part_if_rendering(super().new_osc_part, *args, **kwargs)
+
+    new_part.__doc__ = Ensemble.new_part.__doc__
+    new_midi_part.__doc__ = Ensemble.new_midi_part.__doc__
+    new_osc_part.__doc__ = Ensemble.new_osc_part.__doc__
+
+    def _new_silent_part_if_rendering(self, new_part_method, *args, **kwargs):
+        if not self.render_only:
+            return new_part_method(*args, **kwargs)
+        # bind the arguments as the new part method would, and keep only the ones that apply to a silent part
+        arguments = inspect.signature(new_part_method).bind(*args, **kwargs).arguments
+        return self.new_silent_part(**{key: value for key, value in arguments.items()
+                                       if key in ("name", "default_spelling_policy", "clef_preference")})
+
     # --------------------------------- Transcription Stuff -------------------------------
 
     def start_transcribing(self, instrument_or_instruments: Union[ScampInstrument, Sequence[ScampInstrument]] = None,
-                           clock: Clock = None, units: str = "beats") -> Performance:
+                           clock: Clock = None, units: str = "beats", deferred: bool = False,
+                           spill_directory: Union[str, PerformanceArchive] = None, spill_interval: float = 60,
+                           envelope_tolerance: Union[float, Dict[str, float]] = None) -> Performance:
         """
         Starts transcribing everything played in this Session's (or by the given instruments) to a Performance.
         Defaults to using this Session as the clock.
@@ -369,6 +733,20 @@ class Session(Clock, Ensemble, Transcriber, SavesToJSON):
         :param instrument_or_instruments: which instruments to transcribe. Defaults to all session instruments
         :param clock: which clock to record on, i.e. what are all the timings notated relative to
         :param units: one of ["beats", "time"]. Do we use the beats of the clock or the time?
+        :param deferred: if True, notes are only logged as they are played, and converted into the Performance when
+            transcription stops (or when :func:`~scamp.transcriber.Transcriber.update_deferred_transcriptions` is
+            called). This minimizes the work done on the playback thread.
+        :param spill_directory: if given, the transcription is periodically appended to a
+            :class:`~scamp.performance_archive.PerformanceArchive` in this (empty) directory, or to the given
+            PerformanceArchive, and removed from memory. The Performance returned by
+            :func:`~scamp.transcriber.Transcriber.stop_transcribing` is then empty. (See
+            :func:`~scamp.transcriber.Transcriber.start_transcribing`.)
+        :param spill_interval: when spilling to disk, how often (in beats or seconds, depending on units) to do so.
+            This is separate from how the archive groups the notes into files: an archive created from a path uses the
+            default segment_length of 60 beats, so to choose another, pass a PerformanceArchive created with it.
+        :param envelope_tolerance: tolerance (or dictionary of per-parameter tolerances) within which to simplify
+            the envelopes of animated parameters as they are transcribed. (See
+            :func:`~scamp.transcriber.Transcriber.start_transcribing`.)
 
         :return: the Performance we will be transcribing to
         """
@@ -378,9 +756,24 @@ class Session(Clock, Ensemble, Transcriber, SavesToJSON):
 
         return super().start_transcribing(
             self.instruments if instrument_or_instruments is None else instrument_or_instruments,
-            self if clock is None else clock, units=units
+            self if clock is None else clock, units=units, deferred=deferred, spill_directory=spill_directory,
+            spill_interval=spill_interval, envelope_tolerance=envelope_tolerance
         )
 
+    def kill(self) -> None:
+        """
+        Kills this Session's clock (and with it all of the processes forked on it), after which it can no longer be
+        used. Any output still waiting to be sent out because of the :attr:`playback_latency` (e.g. the ends of notes)
+        is sent out before this returns. The soundfont channels used by this Session's instruments are then given
+        back, so that any soundfont synth no longer in use shuts down after a short while.
+        """
+        super().kill()
+        if self._output_dispatcher is not None:
+            self._output_dispatcher.close()
+        for instrument in self.instruments:
+            for playback_implementation in instrument.playback_implementations:
+                playback_implementation._release_shared_resources()
+
     def _to_dict(self):
         json_dict = Ensemble._to_dict(self)
         json_dict["tempo"] = self.tempo
@@ -138,7 +138,9 @@ class PlaybackSettings(_ScampSettings):
     :ivar named_soundfonts: Dictionary mapping names of frequently-used soundfonts to their file paths
     :ivar default_soundfont: Soundfont (by name or path) to default to in playback
     :ivar default_audio_driver: Name of the audio driver use for soundfont playback by default. If "auto", we test to
-        see what audio driver will work, and replace this value with that driver.
+        see what audio driver will work the first time a soundfont instrument is created, and use that driver. The
+        result of this test is cached (per platform, fluidsynth version and audio environment) in
+        settings/audioDriverCache.json, and only repeated if the cached driver stops working.
     :ivar default_midi_output_device: Name or number of the midi output device to default to
     :ivar default_max_soundfont_pitch_bend: When playing back with soundfonts, instruments will be immediately set
         to use this value for the maximum pitch bend. (Makes sense to set this to a large value for maximum flexibility)
@@ -160,6 +162,21 @@ class PlaybackSettings(_ScampSettings):
         be altered in response to different articulations/notations/etc.
     :ivar try_system_fluidsynth_first: if True, always tries system copy of the fluidsynth libraries first before using
         the one embedded in the scamp package.
+    :ivar audio_driver_probe_timeout: when testing for a working audio driver, how long (in seconds) to wait for each
+        candidate driver before giving up on it.
+    :ivar note_state_pool_size: how many finished :class:`~scamp.instruments.NoteState` records to keep around for
+        reuse by new notes, saving on allocation when playing lots of notes. (0 means that they are not recycled.)
+    :ivar default_playback_latency: the playback latency, in seconds, that ensembles (and sessions) use by default.
+        (See :attr:`~scamp.instruments.Ensemble.playback_latency`.) 0 means that output happens immediately.
+    :ivar use_soundfont_sequencer: if True, soundfont playback schedules its events with fluidsynth's own sequencer,
+        timestamped a little in the future, rather than sending them to the synth right away.
+    :ivar soundfont_sequencer_latency: how far into the future (in seconds) events are scheduled when using the
+        fluidsynth sequencer, unless the ensemble has a playback latency of its own.
+    :ivar soundfont_synth_shards: how many separate fluidsynth synths (each rendering on its own audio thread)
+        soundfont instruments are spread across. These synths, and the soundfonts loaded into them, are shared by all
+        the ensembles and sessions in the process. Raising this lets large ensembles make use of several CPU cores,
+        but requires an audio driver that can mix several output streams (e.g. pulseaudio, jack or coreaudio).
+        Another synth is also added whenever the existing ones run out of MIDI channels.
     """
 
     #: Default playback settings (from when SCAMP was installed)
@@ -192,6 +209,12 @@ class PlaybackSettings(_ScampSettings):
             "marcato": NotePlaybackAdjustment.scale_params(volume=1.5),
         }),
         "try_system_fluidsynth_first": False,
+        "audio_driver_probe_timeout": 3.0,
+        "note_state_pool_size": 0,
+        "default_playback_latency": 0,
+        "use_soundfont_sequencer": False,
+        "soundfont_sequencer_latency": 0.02,
+        "soundfont_synth_shards": 1,
     }
 
     _settings_name = "Playback settings"
@@ -204,7 +227,9 @@ class PlaybackSettings(_ScampSettings):
             self.default_midi_output_device = self.default_max_soundfont_pitch_bend = \
             self.default_max_streaming_midi_pitch_bend = self.soundfont_volume_to_velocity_curve = \
             self.streaming_midi_volume_to_velocity_curve = self.osc_message_addresses = \
-            self.adjustments = self.try_system_fluidsynth_first = self.soundfont_search_paths = None
+            self.adjustments = self.try_system_fluidsynth_first = self.soundfont_search_paths = \
+            self.audio_driver_probe_timeout = self.note_state_pool_size = self.default_playback_latency = \
+            self.use_soundfont_sequencer = self.soundfont_sequencer_latency = self.soundfont_synth_shards = None
         super().__init__(settings_dict)
         assert isinstance(self.adjustments, PlaybackAdjustmentsDictionary)
 
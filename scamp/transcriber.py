@@ -18,10 +18,54 @@
 #  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
 
 from .performance import Performance
+from .performance_archive import PerformanceArchive
 from expenvelope import Envelope
 from clockblocks import Clock, TempoEnvelope
-from .instruments import ScampInstrument
-from typing import Union, Sequence
+from .instruments import ScampInstrument, NoteState
+from typing import Union, Sequence, Dict, Optional
+import itertools
+import os
+
+
+class _Transcription:
+    """
+    Bookkeeping for a single transcription in progress.
+
+    :param performance: the Performance being transcribed to
+    :param clock: the clock all timings are relative to
+    :param clock_start_beat: the beat of that clock on which the transcription started
+    :param units: one of ["beats", "time"]
+    :param log_position: if the transcription is deferred, the index in the Transcriber's note log up to which notes
+        have already been added to the performance; None if the transcription is not deferred
+    :param archive: if the transcription spills to disk, the PerformanceArchive it spills to
+    :param spill_interval: how often (in beats or seconds, depending on units) to spill to the archive
+    :param envelope_tolerance: tolerance (or dictionary of per-parameter tolerances) used to simplify the envelopes
+        of animated parameters; None if they are not simplified
+    """
+
+    __slots__ = ("performance", "clock", "clock_start_beat", "units", "log_position", "archive", "spill_interval",
+                 "next_spill_beat", "envelope_tolerance")
+
+    def __init__(self, performance: Performance, clock: Clock, clock_start_beat: float, units: str,
+                 log_position: int = None, archive: PerformanceArchive = None, spill_interval: float = None,
+                 envelope_tolerance: Union[float, Dict[str, float]] = None):
+        self.performance = performance
+        self.clock = clock
+        self.clock_start_beat = clock_start_beat
+        self.units = units
+        self.log_position = log_position
+        self.archive = archive
+        self.spill_interval = spill_interval
+        self.next_spill_beat = spill_interval
+        self.envelope_tolerance = envelope_tolerance
+
+    def get_envelope_tolerance(self, param: str) -> Union[float, None]:
+        if isinstance(self.envelope_tolerance, dict):
+            return self.envelope_tolerance.get(param, None)
+        return self.envelope_tolerance
+
+    def is_deferred(self) -> bool:
+        return self.log_position is not None
 
 
 class Transcriber:
@@ -33,17 +77,44 @@ class Transcriber:
 
     def __init__(self):
         self._transcriptions_in_progress = []
+        # append-only log of (instrument, note_info) records for deferred transcriptions. Appending to a list is
+        # atomic, so the playback thread never has to wait on the conversion of these records into PerformanceNotes
+        self._note_log = []
 
     def start_transcribing(self, instrument_or_instruments: Union[ScampInstrument, Sequence[ScampInstrument]],
-                           clock: Clock, units: str = "beats") -> Performance:
+                           clock: Clock, units: str = "beats", deferred: bool = False,
+                           spill_directory: Union[str, PerformanceArchive] = None, spill_interval: float = 60,
+                           envelope_tolerance: Union[float, Dict[str, float]] = None) -> Performance:
         """
         Starts transcribing new performance on the given clock, consisting of the given instrument
 
         :param instrument_or_instruments: the instruments we notate in this Performance
         :param clock: which clock all timings are relative to
         :param units: one of ["beats", "time"]. Do we use the beats of the clock or the time?
-        :return: the Performance that this transcription writes to, which will be updated as notes are played and acts
-            as a handle when calling stop_transcribing.
+        :param deferred: if True, finished notes are simply appended to a log as they are played, and only converted
+            into the notes of the Performance when :func:`stop_transcribing` or :func:`update_deferred_transcriptions`
+            is called. This puts almost no load on the thread doing the playback, but means that the Performance
+            is not filled in while the music is playing.
+        :param spill_directory: if given, the transcription is periodically moved out of memory and appended to a
+            :class:`~scamp.performance_archive.PerformanceArchive` in this directory, so that memory use stays bounded
+            no matter how long the transcription runs. The directory must not already contain anything; to append to
+            an existing archive, pass the PerformanceArchive itself instead of a path. The spilled notes are written
+            to disk on a background thread, so that playback never waits on the disk. In this mode, the returned
+            Performance only ever holds the notes that have not yet been spilled, and the Performance returned by
+            :func:`stop_transcribing` is empty. The full transcription (or any window of it) should instead be read
+            back with :func:`~scamp.performance_archive.PerformanceArchive.load` from the archive, which is available
+            from :func:`get_spill_archive`.
+        :param spill_interval: when spilling to disk, how often (in beats or seconds, depending on units) to do so.
+            This is separate from how the archive groups the notes into files: an archive created from a path uses the
+            default segment_length of 60 beats, so to choose another, pass a PerformanceArchive created with it.
+        :param envelope_tolerance: if given, the envelopes of animated parameters (e.g. from calls to `change_pitch`
+            or `change_parameter`) are simplified as they are transcribed, by dropping any breakpoints that can be
+            removed without the curve deviating by more than this amount. Can also be a dictionary mapping parameter
+            names to tolerances (e.g. {"pitch": 0.05, "volume": 0.01}), in which case parameters not listed are left
+            as they are. A tolerance of 0 only merges consecutive flat or collinear segments, and so does not change
+            the shape of the curve at all.
+        :return: the Performance that this transcription writes to, which will be updated as notes are played (or,
+            if deferred, when the log is processed) and acts as a handle when calling stop_transcribing.
         """
         assert units in ("beats", "time")
 
@@ -53,128 +124,254 @@ class Transcriber:
         if len(instrument_or_instruments) == 0:
             raise ValueError("No instruments specified for transcription!")
 
+        if isinstance(spill_directory, str):
+            if os.path.isdir(spill_directory) and len(os.listdir(spill_directory)) > 0:
+                raise ValueError("Spill directory \"{}\" is not empty. Choose a new directory, or pass a "
+                                 "PerformanceArchive to append to an existing archive.".format(spill_directory))
+            archive = PerformanceArchive(spill_directory)
+        else:
+            archive = spill_directory
+
         performance = Performance()
         for instrument in instrument_or_instruments:
             performance.new_part(instrument)
             if self not in instrument._transcribers_to_notify:
                 instrument._transcribers_to_notify.append(self)
 
-        self._transcriptions_in_progress.append(
-            (performance, clock, clock.beat(), units)
-        )
+        self._transcriptions_in_progress.append(_Transcription(
+            performance, clock, clock.beat(), units, len(self._note_log) if deferred else None,
+            archive, spill_interval,
+            envelope_tolerance
+        ))
 
         return performance
 
-    def register_note(self, instrument: ScampInstrument, note_info: dict) -> None:
+    def register_note(self, instrument: ScampInstrument, note_info: NoteState) -> bool:
         """
         Called when an instrument wants to register that it finished a note, records note in all transcriptions
 
         :param instrument: the ScampInstrument that played the note
-        :param note_info: the note info dictionary on that note, containing time stamps, parameter changes, etc.
+        :param note_info: the NoteState of that note, containing time stamps, parameter changes, etc.
+        :return: True if the note info has been kept for later processing (by a deferred transcription), in which
+            case it must not be recycled
         """
-        assert note_info["end_time_stamp"] is not None, "Cannot register unfinished note!"
-        param_change_segments = note_info["parameter_change_segments"]
+        assert note_info.end_time_stamp is not None, "Cannot register unfinished note!"
 
-        if note_info["start_time_stamp"].time_in_master == note_info["end_time_stamp"].time_in_master:
-            return
+        if note_info.start_time_stamp.time_in_master == note_info.end_time_stamp.time_in_master:
+            return False
 
+        logged = False
         # loop through all the transcriptions in progress
-        for performance, clock, clock_start_beat, units in self._transcriptions_in_progress:
-            # figure out the start_beat and length relative to this transcription's clock and start beat
-            start_beat_in_clock = Transcriber._resolve_time_stamp(note_info["start_time_stamp"], clock, units)
-            end_beat_in_clock = Transcriber._resolve_time_stamp(note_info["end_time_stamp"], clock, units)
-
-            note_start_beat = start_beat_in_clock - clock_start_beat
-            note_length = end_beat_in_clock - start_beat_in_clock
-
-            # handle split points (if applicable) by creating a note length sections tuple
-            note_length_sections = None
-            if len(note_info["split_points"]) > 0:
-                note_length_sections = []
-                last_split = note_start_beat
-                for split_point in note_info["split_points"]:
-                    split_point_beat = Transcriber._resolve_time_stamp(split_point, clock, units)
-                    note_length_sections.append(split_point_beat - last_split)
-                    last_split = split_point_beat
-                if end_beat_in_clock > last_split:
-                    note_length_sections.append(end_beat_in_clock - last_split)
-                note_length_sections = tuple(note_length_sections)
-
-            # get curves for all the parameters
-            extra_parameters = {}
-            for param in note_info["parameter_start_values"]:
-                if param in param_change_segments and len(param_change_segments[param]) > 0:
-                    levels = [note_info["parameter_start_values"][param]]
-                    # keep track of this in case of gaps between segments
-                    beat_of_last_level_recorded = start_beat_in_clock
-                    durations = []
-                    curve_shapes = []
-                    for param_change_segment in param_change_segments[param]:
-                        # no need to transcribe a param_change_segment that was aborted immediately
-                        if param_change_segment.duration == 0 and \
-                                param_change_segment.end_level == param_change_segment.start_level:
-                            continue
-
-                        param_start_beat_in_clock = Transcriber._resolve_time_stamp(
-                            param_change_segment.start_time_stamp, clock, units)
-                        param_end_beat_in_clock = Transcriber._resolve_time_stamp(
-                            param_change_segment.end_time_stamp, clock, units)
-
-                        # if there's a gap between the last level we recorded and this segment, we need to fill it with
-                        # a flat segment that holds the last level recorded
-                        if param_start_beat_in_clock > beat_of_last_level_recorded:
-                            durations.append(param_start_beat_in_clock - beat_of_last_level_recorded)
-                            levels.append(levels[-1])
-                            curve_shapes.append(0)
-
-                        durations.append(param_end_beat_in_clock - param_start_beat_in_clock)
-                        levels.append(param_change_segment.end_level)
-                        curve_shapes.append(param_change_segment.curve_shape)
-
-                        beat_of_last_level_recorded = param_end_beat_in_clock
-
-                    # again, if we end the curve early, then we need to add a flat filler segment
-                    if beat_of_last_level_recorded < note_start_beat + note_length:
-                        durations.append(note_start_beat + note_length - beat_of_last_level_recorded)
+        for transcription in self._transcriptions_in_progress:
+            if transcription.is_deferred():
+                # just log the raw record (once, no matter how many deferred transcriptions there are)
+                if not logged:
+                    self._note_log.append((instrument, note_info))
+                    logged = True
+            else:
+                Transcriber._transcribe_note(transcription, instrument, note_info)
+        return logged
+
+    def get_spill_archive(self, which_performance: Performance = None) -> Optional[PerformanceArchive]:
+        """
+        Returns the PerformanceArchive that a transcription in progress is spilling to (see the `spill_directory`
+        argument of :func:`start_transcribing`), or None if it isn't spilling to disk.
+
+        :param which_performance: the Performance returned by :func:`start_transcribing` for the transcription in
+            question; defaults to the oldest transcription in progress
+        """
+        for transcription in self._transcriptions_in_progress:
+            if which_performance is None or transcription.performance is which_performance:
+                return transcription.archive
+        raise ValueError("No such transcription in progress.")
+
+    def update_deferred_transcriptions(self) -> None:
+        """
+        Converts any notes logged by deferred transcriptions (see :func:`start_transcribing`) into notes in their
+        respective Performances, so that they are up to date with everything played so far.
+        """
+        log_length = len(self._note_log)
+        for transcription in self._transcriptions_in_progress:
+            if transcription.is_deferred():
+                Transcriber._process_note_log(transcription, self._note_log, log_length)
+
+    @staticmethod
+    def _process_note_log(transcription: _Transcription, note_log: list, log_length: int) -> None:
+        for instrument, note_info in itertools.islice(note_log, transcription.log_position, log_length):
+            Transcriber._transcribe_note(transcription, instrument, note_info)
+        transcription.log_position = log_length
+
+    @staticmethod
+    def _transcribe_note(transcription: _Transcription, instrument: ScampInstrument, note_info: NoteState) -> None:
+        performance, clock, clock_start_beat, units = \
+            transcription.performance, transcription.clock, transcription.clock_start_beat, transcription.units
+        param_change_segments = note_info.parameter_change_segments
+
+        # figure out the start_beat and length relative to this transcription's clock and start beat
+        start_beat_in_clock = Transcriber._resolve_time_stamp(note_info.start_time_stamp, clock, units)
+        end_beat_in_clock = Transcriber._resolve_time_stamp(note_info.end_time_stamp, clock, units)
+
+        note_start_beat = start_beat_in_clock - clock_start_beat
+        note_length = end_beat_in_clock - start_beat_in_clock
+
+        # handle split points (if applicable) by creating a note length sections tuple
+        note_length_sections = None
+        if len(note_info.split_points) > 0:
+            note_length_sections = []
+            last_split = note_start_beat
+            for split_point in note_info.split_points:
+                split_point_beat = Transcriber._resolve_time_stamp(split_point, clock, units)
+                note_length_sections.append(split_point_beat - last_split)
+                last_split = split_point_beat
+            if end_beat_in_clock > last_split:
+                note_length_sections.append(end_beat_in_clock - last_split)
+            note_length_sections = tuple(note_length_sections)
+
+        # get curves for all the parameters
+        extra_parameters = {}
+        for param in note_info.parameter_start_values:
+            if param in param_change_segments and len(param_change_segments[param]) > 0:
+                levels = [note_info.parameter_start_values[param]]
+                # keep track of this in case of gaps between segments
+                beat_of_last_level_recorded = start_beat_in_clock
+                durations = []
+                curve_shapes = []
+                for param_change_segment in param_change_segments[param]:
+                    # no need to transcribe a param_change_segment that was aborted immediately
+                    if param_change_segment.duration == 0 and \
+                            param_change_segment.end_level == param_change_segment.start_level:
+                        continue
+
+                    param_start_beat_in_clock = Transcriber._resolve_time_stamp(
+                        param_change_segment.start_time_stamp, clock, units)
+                    param_end_beat_in_clock = Transcriber._resolve_time_stamp(
+                        param_change_segment.end_time_stamp, clock, units)
+
+                    # if there's a gap between the last level we recorded and this segment, we need to fill it with
+                    # a flat segment that holds the last level recorded
+                    if param_start_beat_in_clock > beat_of_last_level_recorded:
+                        durations.append(param_start_beat_in_clock - beat_of_last_level_recorded)
                         levels.append(levels[-1])
                         curve_shapes.append(0)
 
-                    # assign to specific variables for pitch and volume, otherwise put in a dictionary of extra params
-                    if param == "pitch":
-                        # note that if the length of levels is 1, then there's been no meaningful animation
-                        # so just act like it's not animated. This probably shouldn't really come up. (It was
-                        # coming up before with zero-length notes, but now those are just skipped anyway.)
-                        if len(levels) == 1:
-                            pitch = levels[0]
-                        else:
-                            pitch = Envelope.from_levels_and_durations(levels, durations, curve_shapes)
-                    elif param == "volume":
-                        if len(levels) == 1:
-                            volume = levels[0]
-                        else:
-                            volume = Envelope.from_levels_and_durations(levels, durations, curve_shapes)
+                    durations.append(param_end_beat_in_clock - param_start_beat_in_clock)
+                    levels.append(param_change_segment.end_level)
+                    curve_shapes.append(param_change_segment.curve_shape)
+
+                    beat_of_last_level_recorded = param_end_beat_in_clock
+
+                # again, if we end the curve early, then we need to add a flat filler segment
+                if beat_of_last_level_recorded < note_start_beat + note_length:
+                    durations.append(note_start_beat + note_length - beat_of_last_level_recorded)
+                    levels.append(levels[-1])
+                    curve_shapes.append(0)
+
+                envelope_tolerance = transcription.get_envelope_tolerance(param)
+                if envelope_tolerance is not None and len(levels) > 2:
+                    levels, durations, curve_shapes = Transcriber._simplify_envelope_segments(
+                        levels, durations, curve_shapes, envelope_tolerance
+                    )
+
+                # assign to specific variables for pitch and volume, otherwise put in a dictionary of extra params
+                if param == "pitch":
+                    # note that if the length of levels is 1, then there's been no meaningful animation
+                    # so just act like it's not animated. This probably shouldn't really come up. (It was
+                    # coming up before with zero-length notes, but now those are just skipped anyway.)
+                    if len(levels) == 1:
+                        pitch = levels[0]
                     else:
-                        if len(levels) == 1:
-                            extra_parameters[param] = levels[0]
-                        else:
-                            extra_parameters[param] = Envelope.from_levels_and_durations(levels, durations,
-                                                                                         curve_shapes)
+                        pitch = Envelope.from_levels_and_durations(levels, durations, curve_shapes)
+                elif param == "volume":
+                    if len(levels) == 1:
+                        volume = levels[0]
+                    else:
+                        volume = Envelope.from_levels_and_durations(levels, durations, curve_shapes)
                 else:
-                    # assign to specific variables for pitch and volume, otherwise put in a dictionary of extra params
-                    if param == "pitch":
-                        pitch = note_info["parameter_start_values"]["pitch"]
-                    elif param == "volume":
-                        volume = note_info["parameter_start_values"]["volume"]
+                    if len(levels) == 1:
+                        extra_parameters[param] = levels[0]
                     else:
-                        extra_parameters[param] = note_info["parameter_start_values"][param]
+                        extra_parameters[param] = Envelope.from_levels_and_durations(levels, durations,
+                                                                                     curve_shapes)
+            else:
+                # assign to specific variables for pitch and volume, otherwise put in a dictionary of extra params
+                if param == "pitch":
+                    pitch = note_info.parameter_start_values["pitch"]
+                elif param == "volume":
+                    volume = note_info.parameter_start_values["volume"]
+                else:
+                    extra_parameters[param] = note_info.parameter_start_values[param]
+
+        for instrument_part in performance.get_parts_by_instrument(instrument):
+            # it'd be kind of weird for more than one part to have the same instrument, but if they did,
+            # I suppose that each part should transcribe the note
+            instrument_part.new_note(
+                note_start_beat, note_length_sections if note_length_sections is not None else note_length,
+                pitch, volume, note_info.properties
+            )
+
+        if transcription.archive is not None and note_start_beat + note_length >= transcription.next_spill_beat:
+            # notes are registered as they end, so the end of this note tells us roughly how far along we are. The
+            # notes are taken out of the performance right away, but written to disk on the archive's writer thread,
+            # since we may well be on a playback thread, holding the instrument's lock
+            transcription.archive.append(performance, in_background=True)
+            while transcription.next_spill_beat <= note_start_beat + note_length:
+                transcription.next_spill_beat += transcription.spill_interval
+
+    @staticmethod
+    def _simplify_envelope_segments(levels: list, durations: list, curve_shapes: list, tolerance: float) -> tuple:
+        """
+        Removes breakpoints from the given envelope segments wherever this leaves the curve within the given tolerance
+        of the original (using the Ramer-Douglas-Peucker algorithm on each run of linear segments, and measuring the
+        error in level at each dropped breakpoint). Curved segments and zero-length segments (i.e. jumps) are left
+        untouched, since their endpoints can't be moved without changing their shape. Errors down at the level of
+        floating point rounding are ignored, so that a tolerance of 0 still merges collinear segments.
+
+        :return: tuple of the simplified (levels, durations, curve_shapes)
+        """
+        times = [0]
+        for duration in durations:
+            times.append(times[-1] + duration)
+        # a segment that starts and ends on the same level is flat whatever its curve shape
+        curve_shapes = [0 if levels[i] == levels[i + 1] else curve_shape for i, curve_shape in enumerate(curve_shapes)]
+
+        # breakpoints that must be kept: the ends, and the ends of any curved or zero-length segments
+        anchors = [0]
+        for i, (duration, curve_shape) in enumerate(zip(durations, curve_shapes)):
+            if duration == 0 or curve_shape != 0:
+                anchors.extend((i, i + 1))
+        anchors.append(len(levels) - 1)
+        anchors = sorted(set(anchors))
+
+        keep = [False] * len(levels)
+        for anchor in anchors:
+            keep[anchor] = True
+        for run_start, run_end in zip(anchors, anchors[1:]):
+            # everything between consecutive anchors is a run of linear segments of positive length
+            ranges_to_check = [(run_start, run_end)]
+            # collinear points rarely line up exactly in floating point, so allow for rounding relative to the levels
+            rounding_slack = 1e-9 * max(abs(level) for level in levels[run_start:run_end + 1])
+            while len(ranges_to_check) > 0:
+                first, last = ranges_to_check.pop()
+                if last - first < 2:
+                    continue
+                slope = (levels[last] - levels[first]) / (times[last] - times[first])
+                worst_error, worst_index = -1, None
+                for i in range(first + 1, last):
+                    error = abs(levels[i] - levels[first] - slope * (times[i] - times[first]))
+                    if error > worst_error:
+                        worst_error, worst_index = error, i
+                if worst_error > tolerance + rounding_slack:
+                    keep[worst_index] = True
+                    ranges_to_check.append((first, worst_index))
+                    ranges_to_check.append((worst_index, last))
 
-            for instrument_part in performance.get_parts_by_instrument(instrument):
-                # it'd be kind of weird for more than one part to have the same instrument, but if they did,
-                # I suppose that each part should transcribe the note
-                instrument_part.new_note(
-                    note_start_beat, note_length_sections if note_length_sections is not None else note_length,
-                    pitch, volume, note_info["properties"]
-                )
+        kept_indices = [i for i in range(len(levels)) if keep[i]]
+        return (
+            [levels[i] for i in kept_indices],
+            [times[j] - times[i] for i, j in zip(kept_indices, kept_indices[1:])],
+            # consecutive kept points are either an original (possibly curved) segment, or a merged linear run
+            [curve_shapes[i] if j == i + 1 else 0 for i, j in zip(kept_indices, kept_indices[1:])]
+        )
 
     @staticmethod
     def _resolve_time_stamp(time_stamp, clock, units):
@@ -188,7 +385,8 @@ class Transcriber:
 
         :param which_performance: which performance to stop transcribing; defaults to oldest started
         :param tempo_envelope_tolerance: error tolerance when extracting the absolute tempo envelope for the Performance
-        :return: the created Performance
+        :return: the created Performance. (If the transcription was spilling to disk, this is empty, since all of its
+            notes have been moved to the archive; see :func:`get_spill_archive`.)
         """
         transcription = None
         if which_performance is None:
@@ -197,13 +395,20 @@ class Transcriber:
             transcription = self._transcriptions_in_progress.pop(0)
         else:
             for i, transcription in enumerate(self._transcriptions_in_progress):
-                if transcription[0] == which_performance:
+                if transcription.performance == which_performance:
                     transcription = self._transcriptions_in_progress.pop(i)
                     break
             if transcription is None:
                 raise ValueError("Cannot stop transcribing given performance, as it was never started!")
 
-        transcribed_performance, transcription_clock, transcription_start_beat, units = transcription
+        if transcription.is_deferred():
+            Transcriber._process_note_log(transcription, self._note_log, len(self._note_log))
+            if not any(other.is_deferred() for other in self._transcriptions_in_progress):
+                # nobody else needs the log, so we can let go of it
+                self._note_log = []
+
+        transcribed_performance, transcription_clock, transcription_start_beat, units = \
+            transcription.performance, transcription.clock, transcription.clock_start_beat, transcription.units
         if units == "beats":
             transcribed_performance.tempo_envelope = transcription_clock.extract_absolute_tempo_envelope(
                 transcription_start_beat, tolerance=tempo_envelope_tolerance
@@ -215,4 +420,9 @@ class Transcriber:
             transcribed_performance.tempo_envelope = transcription_clock.parent.extract_absolute_tempo_envelope(
                 transcription_start_beat, tolerance=tempo_envelope_tolerance
             )
+
+        if transcription.archive is not None:
+            # spill whatever is left (waiting for any background writes to finish), and store the tempo envelope
+            transcription.archive.append(transcribed_performance)
+            transcription.archive.set_tempo_envelope(transcribed_performance.tempo_envelope)
         return transcribed_performance
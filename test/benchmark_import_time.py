@@ -0,0 +1,78 @@
+#! /usr/bin/python3
+
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+#  SCAMP (Suite for Computer-Assisted Music in Python)                                           #
+#  Copyright © 2020 Marc Evanstein <marc@marcevanstein.com>.                                     #
+#                                                                                                #
+#  This program is free software: you can redistribute it and/or modify it under the terms of    #
+#  the GNU General Public License as published by the Free Software Foundation, either version   #
+#  3 of the License, or (at your option) any later version.                                      #
+#                                                                                                #
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;     #
+#  without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#  See the GNU General Public License for more details.                                          #
+#                                                                                                #
+#  You should have received a copy of the GNU General Public License along with this program.    #
+#  If not, see <http://www.gnu.org/licenses/>.                                                   #
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+
+"""
+Measures how long it takes to import scamp, and to load the main subsystems on top of that. Each measurement is
+taken in a fresh interpreter, so that nothing is cached from previous runs. Usage:
+
+    python3 benchmark_import_time.py [num_runs]
+
+Passing "-x" as the last argument also prints python's own import time breakdown (python -X importtime) for a bare
+`import scamp`, sorted by cumulative time.
+"""
+
+import subprocess
+import statistics
+import sys
+import os
+
+
+NUM_RUNS = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1] != "-x" else 10
+SHOW_BREAKDOWN = sys.argv[-1] == "-x"
+
+# make sure that we are benchmarking this copy of scamp, rather than an installed one
+REPO_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+benchmarks = {
+    "import scamp": "import scamp",
+    "import scamp + notation": "import scamp; scamp.Performance; scamp.Score",
+    "import scamp + playback": "import scamp; scamp.Session",
+    "from scamp import *": "from scamp import *",
+}
+
+timing_template = """
+import time
+_start = time.perf_counter()
+{}
+print(time.perf_counter() - _start)
+"""
+
+
+def time_statement(statement):
+    result = subprocess.run(
+        [sys.executable, "-c", timing_template.format(statement)],
+        cwd=REPO_DIRECTORY, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True, check=True
+    )
+    return float(result.stdout.strip().split("\n")[-1])
+
+
+for name, statement in benchmarks.items():
+    times = [time_statement(statement) for _ in range(NUM_RUNS)]
+    print("{}: median {:.1f} ms, min {:.1f} ms ({} runs)".format(
+        name, statistics.median(times) * 1000, min(times) * 1000, NUM_RUNS
+    ))
+
+if SHOW_BREAKDOWN:
+    breakdown = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import scamp"],
+        cwd=REPO_DIRECTORY, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True
+    ).stderr
+    lines = [line for line in breakdown.split("\n") if line.startswith("import time:") and "|" in line]
+    # the second column is the cumulative time in microseconds
+    lines.sort(key=lambda line: int(line.split("|")[1].strip()) if line.split("|")[1].strip().isdigit() else 0)
+    print("\n".join(lines[-20:]))
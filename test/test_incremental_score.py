@@ -0,0 +1,85 @@
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+#  SCAMP (Suite for Computer-Assisted Music in Python)                                           #
+#  Copyright © 2020 Marc Evanstein <marc@marcevanstein.com>.                                     #
+#                                                                                                #
+#  This program is free software: you can redistribute it and/or modify it under the terms of    #
+#  the GNU General Public License as published by the Free Software Foundation, either version   #
+#  3 of the License, or (at your option) any later version.                                      #
+#                                                                                                #
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;     #
+#  without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#  See the GNU General Public License for more details.                                          #
+#                                                                                                #
+#  You should have received a copy of the GNU General Public License along with this program.    #
+#  If not, see <http://www.gnu.org/licenses/>.                                                   #
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+
+import random
+import difflib
+from copy import deepcopy
+from scamp import Performance, PerformancePart, Score, Envelope, engraving_settings
+
+TIME_SIGNATURE = ["3/4", "5/8", "4/4", "loop"]
+
+
+def _random_note_args(rng, start_beat):
+    # a mix of short notes, notes tied across bar lines and glissandi (chords come from notes starting together)
+    length = rng.choice([0.25, 0.5, 1, 1.5, rng.random() * 3, rng.random() * 7])
+    pitch = rng.choice([60 + rng.randint(0, 24),
+                        Envelope.from_levels([60 + rng.randint(0, 24), 60 + rng.randint(0, 24)])])
+    properties = rng.choice([None, "staccato", "voice: 2", "accent, voice: 2"])
+    return start_beat, length, pitch, 0.5, properties
+
+
+def _make_performance(rng):
+    performance = Performance()
+    for name in ("flute", "cello"):
+        part = PerformancePart(name=name, instrument_id=(name, 0))
+        performance.add_part(part)
+        beat = 0
+        for _ in range(30):
+            beat += rng.choice([0, 0.25, 0.5, 1, rng.random() * 2])
+            part.new_note(*_random_note_args(rng, beat))
+    return performance
+
+
+def _edit_performance(rng, performance):
+    part = rng.choice(performance.parts)
+    all_notes = [note for voice in part.voices.values() for note in voice]
+    edit = rng.choice(["add", "remove", "alter"])
+    if edit == "add" or len(all_notes) == 0:
+        part.new_note(*_random_note_args(rng, rng.random() * (part.end_beat + 4)))
+    elif edit == "remove":
+        part.remove_note(rng.choice(all_notes))
+    else:
+        note = rng.choice(all_notes)
+        old_range = note.start_beat, note.end_beat
+        note.pitch += rng.choice([-2, -1, 1, 2])
+        note.length = max(0.1, note.length + rng.choice([-1, -0.5, 0.5, 1]))
+        part.mark_dirty(*old_range)
+        part.mark_dirty(note.start_beat, note.end_beat)
+    return "{} in part {}".format(edit, performance.parts.index(part))
+
+
+def test_incremental_update_matches_fresh_build():
+    # the string representation of a score spells out every measure, voice, tuplet and note, so comparing them
+    # checks that Score.update_from_performance gives exactly the same result as starting from scratch
+    rng = random.Random(0)
+    old_pad_incomplete_parts = engraving_settings.pad_incomplete_parts
+    engraving_settings.pad_incomplete_parts = True
+    try:
+        performance = _make_performance(rng)
+        score = Score.from_performance(performance, time_signature=TIME_SIGNATURE, title="Test", composer="SCAMP")
+        for i in range(12):
+            edit_description = _edit_performance(rng, performance)
+            score.update_from_performance(performance)
+            fresh_score = Score.from_performance(deepcopy(performance), time_signature=TIME_SIGNATURE,
+                                                 title="Test", composer="SCAMP")
+            assert str(score) == str(fresh_score), "Edit {} ({}) differs from a fresh build:\n{}".format(
+                i + 1, edit_description, "\n".join(difflib.unified_diff(
+                    str(fresh_score).splitlines(), str(score).splitlines(), "fresh build", "incremental update",
+                    lineterm="", n=2
+                ))
+            )
+    finally:
+        engraving_settings.pad_incomplete_parts = old_pad_incomplete_parts
@@ -0,0 +1,55 @@
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+#  SCAMP (Suite for Computer-Assisted Music in Python)                                           #
+#  Copyright © 2020 Marc Evanstein <marc@marcevanstein.com>.                                     #
+#                                                                                                #
+#  This program is free software: you can redistribute it and/or modify it under the terms of    #
+#  the GNU General Public License as published by the Free Software Foundation, either version   #
+#  3 of the License, or (at your option) any later version.                                      #
+#                                                                                                #
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;     #
+#  without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#  See the GNU General Public License for more details.                                          #
+#                                                                                                #
+#  You should have received a copy of the GNU General Public License along with this program.    #
+#  If not, see <http://www.gnu.org/licenses/>.                                                   #
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+
+from scamp import Session
+from scamp._note_properties import NotePropertiesDictionary
+
+
+def test_interned_properties_cannot_be_modified_in_place():
+    properties = NotePropertiesDictionary.interned("staccato, notehead: x")
+    assert NotePropertiesDictionary.interned("staccato, notehead: x") is properties
+    for modification in (lambda: properties.articulations.append("accent"),
+                         lambda: properties.temp.update(a=1),
+                         lambda: properties.__setitem__("voice", "1")):
+        try:
+            modification()
+        except (TypeError, AttributeError):
+            pass
+        else:
+            assert False, "Interned properties were modified"
+    thawed = properties.thawed()
+    thawed.articulations.append("accent")
+    assert list(properties.articulations) == ["staccato"]
+
+
+def test_interning_distinguishes_value_types():
+    assert NotePropertiesDictionary.interned({"voice": True}) is not NotePropertiesDictionary.interned({"voice": 1})
+
+
+def test_same_parameter_properties_at_different_lengths():
+    # the parameter envelope gets normalized to the length of each note, so it mustn't be shared between notes
+    session = Session()
+    session.fast_forward_in_beats(float("inf"))
+    part = session.new_silent_part("synth")
+    vibrato_properties = {"param_vibrato": [2, 6, 1]}
+    session.start_transcribing()
+    part.play_note(60, 0.5, 1, vibrato_properties)
+    part.play_note(60, 0.5, 4, vibrato_properties)
+    performance = session.stop_transcribing()
+    session.kill()
+    first_note, second_note = performance.parts[0].voices["_unspecified_"]
+    assert tuple(first_note.properties["param_vibrato"].durations) == (0.5, 0.5)
+    assert tuple(second_note.properties["param_vibrato"].durations) == (2.0, 2.0)
@@ -0,0 +1,49 @@
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+#  SCAMP (Suite for Computer-Assisted Music in Python)                                           #
+#  Copyright © 2020 Marc Evanstein <marc@marcevanstein.com>.                                     #
+#                                                                                                #
+#  This program is free software: you can redistribute it and/or modify it under the terms of    #
+#  the GNU General Public License as published by the Free Software Foundation, either version   #
+#  3 of the License, or (at your option) any later version.                                      #
+#                                                                                                #
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;     #
+#  without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#  See the GNU General Public License for more details.                                          #
+#                                                                                                #
+#  You should have received a copy of the GNU General Public License along with this program.    #
+#  If not, see <http://www.gnu.org/licenses/>.                                                   #
+#  ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++  #
+
+from scamp import Session
+from scamp.performance_archive import PerformanceArchive
+
+
+def _transcribe_to_archive(spill_directory, num_notes):
+    session = Session()
+    session.fast_forward_in_beats(float("inf"))
+    part = session.new_silent_part("synth")
+    session.start_transcribing(spill_directory=spill_directory, spill_interval=4)
+    session.set_tempo_target(120, 10)
+    for i in range(num_notes):
+        part.play_note(60 + i % 12, 0.5, 1)
+    session.stop_transcribing()
+    session.kill()
+
+
+def test_reopen_archive_after_stop(tmp_path):
+    _transcribe_to_archive(str(tmp_path), 20)
+
+    # opening the finished spill directory again, as a later process would
+    archive = PerformanceArchive(str(tmp_path))
+    assert archive.num_notes == 20
+    performance = archive.load()
+    assert len(performance.parts[0].voices["_unspecified_"]) == 20
+    assert performance.tempo_envelope.tempo_at(10) == 120
+    window = archive.load(5, 7)
+    assert [note.start_beat for note in window.parts[0].voices["_unspecified_"]] == [5, 6]
+
+
+def test_append_to_reopened_archive(tmp_path):
+    _transcribe_to_archive(str(tmp_path), 8)
+    _transcribe_to_archive(PerformanceArchive(str(tmp_path)), 8)
+    assert PerformanceArchive(str(tmp_path)).num_notes == 16